@@ -1,5 +1,7 @@
 import geopandas as gpd
 import math
+import numpy as np
+import shapely
 
 def polsby_popper_score(geom):
     """Calculate Polsby–Popper compactness score for a polygon."""
@@ -17,9 +19,106 @@ def perimeter_area_ratio(geom):
         return float('inf')
     return perimeter / area
 
+def shape_metrics(geoms):
+    """
+    Vectorized (area, perimeter, Polsby-Popper, perimeter/area) arrays over a geometry array,
+    with the same edge cases as the scalar functions (PP 0 for zero perimeter, ratio inf for
+    zero area).
+    """
+    geoms = np.asarray(getattr(geoms, "values", geoms))
+    area, perimeter = shapely.area(geoms), shapely.length(geoms)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pp = np.where(perimeter > 0, 4 * math.pi * area / perimeter**2, 0.0)
+        ratio = np.where(area > 0, perimeter / area, np.inf)
+    return area, perimeter, pp, ratio
+
 def calculate_scores(gdf):
     """Add compactness metrics to a GeoDataFrame."""
     gdf = gdf.copy()
-    gdf['polsby_popper'] = gdf.geometry.apply(polsby_popper_score)
-    gdf['perimeter_area_ratio'] = gdf.geometry.apply(perimeter_area_ratio)
+    _, _, gdf['polsby_popper'], gdf['perimeter_area_ratio'] = shape_metrics(gdf.geometry.values)
     return gdf
+
+def _pp(area, perimeter):
+    return (4 * math.pi * area) / (perimeter ** 2) if perimeter > 0 else 0.0
+
+class DistrictShapes:
+    """
+    Per-district area and perimeter kept from block-level tables, no dissolve needed.
+    District area is the sum of block areas; district perimeter is the blocks' outer (state
+    boundary) length plus every shared edge whose other side is in a different district.
+    Moving one block updates both districts in O(degree).
+    Needs graph.area, graph.outer_len and graph.nbr_len (see BlockGraph.from_edges).
+    """
+    def __init__(self, graph, assignment, k=None):
+        if graph.area is None or graph.outer_len is None or graph.nbr_len is None:
+            raise ValueError("graph needs area, outer_len and nbr_len for incremental compactness")
+        assignment = np.asarray(assignment)
+        k = int(assignment.max()) + 1 if k is None else k
+        self.ptr, self.idx, _ = graph.csr_lists()
+        self.lens, self.block_area, self.block_outer = graph.shape_lists()
+        cut = assignment[graph.edge_rows()] != assignment[graph.indices]
+        self.area = np.bincount(assignment, weights=graph.area, minlength=k).tolist()
+        self.perimeter = (np.bincount(assignment, weights=graph.outer_len, minlength=k)
+                          + np.bincount(assignment[graph.edge_rows()][cut], weights=graph.nbr_len[cut], minlength=k)).tolist()
+
+    def polsby_popper(self, d):
+        return _pp(self.area[d], self.perimeter[d])
+
+    def scores(self):
+        return [_pp(a, p) for a, p in zip(self.area, self.perimeter)]
+
+    def move_delta(self, n, assignment, dst):
+        """(d_area, d_perim_src, d_perim_dst) if block n moved from assignment[n] to dst."""
+        src = assignment[n]
+        outer = self.block_outer[n]
+        d_src, d_dst = -outer, outer
+        for j in range(self.ptr[n], self.ptr[n+1]):
+            a = assignment[self.idx[j]]
+            L = self.lens[j]
+            # src: edge to a src block becomes cut, edge to anything else stops being src's
+            d_src += L if a == src else -L
+            # dst: edge to a dst block becomes internal, any other edge becomes dst's boundary
+            d_dst += -L if a == dst else L
+        return self.block_area[n], d_src, d_dst
+
+    def unit_delta(self, nodes, assignment, dst):
+        """move_delta for blocks of one district moving to dst together; edges among them don't change."""
+        if len(nodes) == 1:
+            return self.move_delta(nodes[0], assignment, dst)
+        src = assignment[nodes[0]]
+        inside = set(nodes)
+        da = d_src = d_dst = 0.0
+        for n in nodes:
+            outer = self.block_outer[n]
+            da += self.block_area[n]
+            d_src -= outer
+            d_dst += outer
+            for j in range(self.ptr[n], self.ptr[n+1]):
+                m = self.idx[j]
+                if m in inside:
+                    continue
+                a = assignment[m]
+                L = self.lens[j]
+                d_src += L if a == src else -L
+                d_dst += -L if a == dst else L
+        return da, d_src, d_dst
+
+    def move_gain(self, n, assignment, dst):
+        """Change in PP(src) + PP(dst) if block n moved to dst."""
+        return self.unit_gain((n,), assignment, dst)
+
+    def unit_gain(self, nodes, assignment, dst):
+        """Change in PP(src) + PP(dst) if `nodes` (all in one district) moved to dst together."""
+        src = assignment[nodes[0]]
+        da, dps, dpd = self.unit_delta(nodes, assignment, dst)
+        before = self.polsby_popper(src) + self.polsby_popper(dst)
+        after = (_pp(self.area[src] - da, self.perimeter[src] + dps)
+                 + _pp(self.area[dst] + da, self.perimeter[dst] + dpd))
+        return after - before
+
+    def apply(self, n, assignment, dst):
+        """Update district totals for moving n to dst; call before assignment[n] is changed."""
+        src = assignment[n]
+        da, dps, dpd = self.move_delta(n, assignment, dst)
+        self.area[src] -= da; self.area[dst] += da
+        self.perimeter[src] += dps; self.perimeter[dst] += dpd
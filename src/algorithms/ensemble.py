@@ -0,0 +1,173 @@
+# src/algorithms/ensemble.py
+"""
+Multi-seed ensemble: run seed/grow/repair many times over one prepared graph.
+
+The graph is written once as .npy files and every worker memory-maps it, so the CSR arrays are
+shared through the page cache instead of being pickled per task; the per-node loops read the
+mapping through memoryviews (BlockGraph.csr_lists) rather than private Python lists. Run i
+always uses rng = default_rng([base_seed, i]), so any plan can be reproduced on its own.
+Workers only send back the int16 assignment vector and a few summary numbers.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import json
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from src.algorithms.graph import BlockGraph
+from src.algorithms.seed_grow import grow_regions
+from src.algorithms.repair_swap import border_swaps
+from src.algorithms.objectives import build_objectives, county_labels
+from src.processing.run_report import rss_mb
+
+
+def plan_metrics(graph: BlockGraph, assignment, k: int, target: float, counties=None, objectives=None) -> dict:
+    """
+    Population deviation and cut-boundary stats for one assignment, plus county splits/pieces
+    when county labels per node are given (see objectives.county_labels) and COI splits when
+    `objectives` (in sync with the assignment) tracks COIs.
+    """
+    region_pop = np.bincount(assignment, weights=graph.pop, minlength=k)
+    dev = np.abs(region_pop - target) / target
+    cut = assignment[graph.edge_rows()] != assignment[graph.indices]
+    # each undirected edge appears twice in CSR
+    cut_edges = int(cut.sum()) // 2
+    if graph.nbr_len is not None and graph.nbr_len.sum() > 0:
+        cut_frac = float(graph.nbr_len[cut].sum() / graph.nbr_len.sum())
+    else:
+        cut_frac = cut_edges / max(graph.n_edges, 1)
+    metrics = {
+        "pop_max_dev": float(dev.max()),
+        "pop_mean_dev": float(dev.mean()),
+        "cut_edges": cut_edges,
+        "cut_frac": cut_frac,
+    }
+    if counties is not None:
+        pairs = np.unique(counties.astype(np.int64) * k + assignment)
+        per_county = np.bincount(pairs // k)
+        metrics["county_pieces"] = int(len(pairs))
+        metrics["county_splits"] = int((per_county > 1).sum())
+    if objectives is not None and "coi" in objectives.trackers:
+        metrics["coi_splits"] = objectives.trackers["coi"].splits
+    return metrics
+
+
+def plan_score(metrics: dict, weights: dict, tol: float) -> float:
+    """
+    Lower is better. Population deviation is measured in units of the tolerance; compactness
+    uses the share of internal boundary length that is cut (shorter district borders = more
+    compact) and each split county or COI costs its weight. Weights without a metric here are
+    ignored.
+    """
+    score = metrics["pop_max_dev"] / tol if tol else metrics["pop_max_dev"]
+    score += weights.get("compactness", 0.0) * metrics["cut_frac"] * 100
+    score += weights.get("county_splits", 0.0) * metrics.get("county_splits", 0)
+    score += weights.get("coi", 0.0) * metrics.get("coi_splits", 0)
+    return float(score)
+
+
+# per-process state set by _init_worker
+_graph = None
+_counties = None
+_coi_layers = None
+
+def _init_worker(graph_dir, coi_layers=None):
+    global _graph, _counties, _coi_layers
+    _graph = BlockGraph.load(graph_dir, mmap=True)
+    _counties = county_labels(_graph.geoids)[0] if _graph.geoids is not None else None
+    _coi_layers = coi_layers
+
+
+def _run_one(task):
+    run_id, base_seed, k, target, tol, max_swaps, compactness_weight, weights, seed_strategy = task
+    t0 = time.perf_counter()
+    rng = np.random.default_rng([base_seed, run_id])
+    grow_stats = {}
+    assignment, _ = grow_regions(_graph, k, target, tol, rng=rng, stats=grow_stats, seed_strategy=seed_strategy)
+    swap_stats = {}
+    objectives = build_objectives(_graph, assignment, weights, _coi_layers)
+    border_swaps(_graph, assignment, target, tol, max_iters=max_swaps,
+                 compactness_weight=compactness_weight, objectives=objectives, stats=swap_stats)
+    metrics = plan_metrics(_graph, assignment, k, target, counties=_counties, objectives=objectives)
+    metrics["leftovers"] = grow_stats["leftovers_repaired"]
+    metrics["swap_moves"] = swap_stats["moves"]
+    metrics["swap_iterations"] = swap_stats["iterations"]
+    metrics["seconds"] = time.perf_counter() - t0
+    metrics["worker_rss_mb"] = rss_mb() or float("nan")
+    return run_id, assignment, metrics
+
+
+def run_ensemble(graph: BlockGraph, k: int, target: float, tol: float, n_runs: int,
+                 workers: int = 1, base_seed: int = 0, weights: dict | None = None,
+                 keep: int = 10, max_swaps: int = 20000, workdir: Path | None = None,
+                 seed_strategy: str = "random", coi_layers: dict | None = None):
+    """
+    Run n_runs independent seed/grow/repair plans across a process pool; `coi_layers` (see
+    objectives.load_coi_layers) feed the COI objective like in a single run.
+    Returns (records, best) where records has one metrics dict per run (with run_id, seed and
+    score) and best is a list of (record, assignment) for the `keep` lowest scores.
+    """
+    global _graph, _counties, _coi_layers
+    weights = weights or {}
+    tmp = Path(tempfile.mkdtemp(prefix="ensemble_graph_", dir=workdir))
+    try:
+        graph_dir = graph.save(tmp)
+        # repair only steers by compactness when the graph carries the block shape tables
+        cw = weights.get("compactness", 0.0) if graph.area is not None and graph.outer_len is not None else 0.0
+        tasks = [(i, base_seed, k, target, tol, max_swaps, cw, weights, seed_strategy) for i in range(n_runs)]
+        records, best = [], []
+
+        def collect(run_id, assignment, metrics):
+            rec = {"run_id": run_id, "seed": [base_seed, run_id], **metrics}
+            rec["score"] = plan_score(metrics, weights, tol)
+            records.append(rec)
+            best.append((rec, assignment))
+            best.sort(key=lambda ra: (ra[0]["score"], ra[0]["run_id"]))
+            del best[keep:]
+            print(f"[ensemble] run {run_id}: max dev {rec['pop_max_dev']:.4f}, "
+                  f"cut {rec['cut_frac']:.4f}, score {rec['score']:.3f}")
+
+        if workers <= 1:
+            _init_worker(graph_dir, coi_layers)
+            try:
+                for t in tasks:
+                    collect(*_run_one(t))
+            finally:
+                # they point into the temp dir removed below
+                _graph = _counties = _coi_layers = None
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(str(graph_dir), coi_layers)) as pool:
+                for result in pool.map(_run_one, tasks, chunksize=max(1, n_runs // (workers * 4))):
+                    collect(*result)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    records.sort(key=lambda r: r["run_id"])
+    return records, best
+
+
+def write_ensemble(out_path: Path, records: list, best: list, meta: dict | None = None) -> Path:
+    """
+    One .npz per ensemble: `assignments` (keep x n int16, best first), `best_run_ids`, one array
+    per metric over all runs (ordered by run_id) and a JSON `meta` string.
+    """
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    columns = {}
+    for name in records[0]:
+        if name == "seed":
+            columns["seeds"] = np.array([r["seed"] for r in records], dtype=np.int64)
+        else:
+            columns[name] = np.array([r[name] for r in records])
+    np.savez(
+        out_path,
+        assignments=np.stack([a for _, a in best]),
+        best_run_ids=np.array([r["run_id"] for r, _ in best]),
+        meta=np.array(json.dumps(meta or {})),
+        **columns,
+    )
+    return out_path
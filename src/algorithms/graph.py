@@ -0,0 +1,216 @@
+# src/algorithms/graph.py
+"""
+Compact array-backed block graph used by the partitioning algorithms.
+
+Nodes are int32 positions (the row order of the block table); adjacency is CSR
+(indptr/indices). GEOIDs only live in `geoids` so they can be mapped back at the edges of
+the pipeline. networkx is only needed for the from_networkx/to_networkx adapters.
+"""
+from pathlib import Path
+import numpy as np
+
+UNASSIGNED = -1
+ASSIGNMENT_DTYPE = np.int16
+BLOCK_GEOID_LEN = 15
+
+
+def geoid_strings(geoids) -> np.ndarray:
+    """GEOIDs as fixed-width strings; int64 block keys (build_block_graph.geoid_key) get their leading zeros back."""
+    geoids = np.asarray(geoids)
+    if geoids.dtype.kind in "iu":
+        return np.char.zfill(geoids.astype(str), BLOCK_GEOID_LEN)
+    return geoids.astype(str)
+
+
+def gather_edges(indptr, nodes):
+    """Concatenated CSR edge positions (indices into `indices`) of `nodes`, vectorized."""
+    nodes = np.asarray(nodes)
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    # position of each output slot inside its own slice, then offset by that slice's start
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+    return offsets + np.arange(total)
+
+
+def gather_neighbors(indptr, indices, nodes):
+    """Concatenated CSR neighbor lists of `nodes` (vectorized, no Python loop)."""
+    return indices[gather_edges(indptr, nodes)]
+
+
+class BlockGraph:
+    """
+    Undirected graph in CSR form.
+      indptr   int64[n+1]
+      indices  int32[2m]   neighbor ids, sorted within each row
+      pop      int64[n]
+      geoids   optional array of GEOIDs (node id -> GEOID): int64 block keys or strings
+      nbr_len  optional float64[2m], shared boundary length aligned with `indices`
+      area     optional float64[n], block area
+      outer_len optional float64[n], block boundary not shared with any other block (state edge)
+      xy       optional float64[n, 2], block centroid (for geographic seed placement)
+    """
+    __slots__ = ("indptr", "indices", "pop", "geoids", "nbr_len", "area", "outer_len", "xy", "mmapped",
+                 "_lists", "_shape_lists")
+
+    def __init__(self, indptr, indices, pop, geoids=None, nbr_len=None, area=None, outer_len=None, xy=None):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.pop = np.asarray(pop, dtype=np.int64)
+        self.geoids = None if geoids is None else np.asarray(geoids)
+        self.nbr_len = None if nbr_len is None else np.asarray(nbr_len, dtype=np.float64)
+        self.area = None if area is None else np.asarray(area, dtype=np.float64)
+        self.outer_len = None if outer_len is None else np.asarray(outer_len, dtype=np.float64)
+        self.xy = None if xy is None else np.asarray(xy, dtype=np.float64)
+        self.mmapped = False
+        self._lists = self._shape_lists = None
+
+    @classmethod
+    def from_edges(cls, n, src, dst, pop, geoids=None, shared_len=None, area=None, perimeter=None, xy=None):
+        """
+        Build from an undirected edge list (each edge once, either direction).
+        With shared_len and block perimeters, outer_len = perimeter - shared boundary.
+        """
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+        rows = np.concatenate([src, dst])
+        cols = np.concatenate([dst, src])
+        order = np.lexsort((cols, rows))
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        nbr_len = None
+        if shared_len is not None:
+            shared_len = np.asarray(shared_len, dtype=np.float64)
+            nbr_len = np.concatenate([shared_len, shared_len])[order]
+        outer_len = None
+        if perimeter is not None and nbr_len is not None:
+            shared = np.bincount(rows, weights=np.concatenate([shared_len, shared_len]), minlength=n)
+            outer_len = np.clip(np.asarray(perimeter, dtype=np.float64) - shared, 0.0, None)
+        return cls(indptr, cols[order], pop, geoids=geoids, nbr_len=nbr_len, area=area, outer_len=outer_len, xy=xy)
+
+    @property
+    def n(self) -> int:
+        return len(self.indptr) - 1
+
+    @property
+    def n_edges(self) -> int:
+        return len(self.indices) // 2
+
+    def degree(self):
+        return np.diff(self.indptr)
+
+    def neighbors(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def edge_rows(self):
+        """Source node id of every CSR entry (aligned with `indices`)."""
+        return np.repeat(np.arange(self.n, dtype=np.int32), self.degree())
+
+    def edges(self):
+        """(src, dst) arrays with src < dst, each undirected edge once."""
+        rows = self.edge_rows()
+        keep = rows < self.indices
+        return rows[keep], self.indices[keep]
+
+    def _seq(self, arr):
+        # memoryview indexing is about as fast as a list's and copies nothing out of the mapping
+        return memoryview(arr) if self.mmapped else arr.tolist()
+
+    def csr_lists(self):
+        """
+        (indptr, indices, pop) as Python sequences for the per-node loops in seed_grow / repair_swap.
+        Built once per graph object and shared by every caller, so don't modify them. Lists, or
+        zero-copy memoryviews for a memory-mapped graph (load(mmap=True)), so that processes
+        sharing the mapping don't each hold a private copy.
+        """
+        if self._lists is None:
+            self._lists = (self._seq(self.indptr), self._seq(self.indices), self._seq(self.pop))
+        return self._lists
+
+    def shape_lists(self):
+        """(nbr_len, area, outer_len) like csr_lists, for compactness.DistrictShapes."""
+        if self._shape_lists is None:
+            self._shape_lists = (self._seq(self.nbr_len), self._seq(self.area), self._seq(self.outer_len))
+        return self._shape_lists
+
+    def adjacency_lists(self):
+        """Neighbor ids as a list of Python lists; faster than ndarray slicing in tight loops."""
+        ptr, idx, _ = self.csr_lists()
+        return [idx[ptr[i]:ptr[i + 1]] for i in range(self.n)]
+
+    # ---- on-disk form (.npy per array, memory-mappable) ----
+    _ARRAYS = ("indptr", "indices", "pop", "geoids", "nbr_len", "area", "outer_len", "xy")
+
+    def save(self, out_dir: Path) -> Path:
+        """
+        Write the arrays as .npy files so other processes can np.load(mmap_mode='r') them.
+        String GEOIDs are stored fixed-width (object arrays can't be memory-mapped); int64 keys as is.
+        """
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        for name in self._ARRAYS:
+            arr = getattr(self, name)
+            if name == "geoids" and arr is not None and arr.dtype.kind not in "iu":
+                arr = arr.astype(str)
+            if arr is not None:
+                np.save(out_dir / f"{name}.npy", arr)
+        return out_dir
+
+    @classmethod
+    def load(cls, in_dir: Path, mmap: bool = True):
+        """Inverse of save(); with mmap the arrays are read-only views shared through the page cache."""
+        in_dir = Path(in_dir)
+        mode = "r" if mmap else None
+        arrays = {name: np.load(in_dir / f"{name}.npy", mmap_mode=mode)
+                  for name in cls._ARRAYS if (in_dir / f"{name}.npy").exists()}
+        graph = cls(**arrays)
+        graph.mmapped = mmap
+        return graph
+
+    # ---- GEOID <-> node id ----
+    def index_of(self) -> dict:
+        if self.geoids is None:
+            raise ValueError("graph has no geoids")
+        return {g: i for i, g in enumerate(self.geoids.tolist())}
+
+    def assignment_to_dict(self, assignment) -> dict:
+        if self.geoids is None:
+            raise ValueError("graph has no geoids")
+        return dict(zip(self.geoids.tolist(), np.asarray(assignment).tolist()))
+
+    def assignment_from_dict(self, mapping: dict):
+        return np.array([mapping[g] for g in self.geoids.tolist()], dtype=ASSIGNMENT_DTYPE)
+
+    # ---- networkx adapters (optional dependency) ----
+    @classmethod
+    def from_networkx(cls, G, geoid_to_pop: dict):
+        nodes = list(G.nodes())
+        index = {g: i for i, g in enumerate(nodes)}
+        src, dst, lens = [], [], []
+        has_len = True
+        for u, v, data in G.edges(data=True):
+            src.append(index[u]); dst.append(index[v])
+            if "shared_len" in data:
+                lens.append(data["shared_len"])
+            else:
+                has_len = False
+        pop = np.array([geoid_to_pop[g] for g in nodes], dtype=np.int64)
+        return cls.from_edges(len(nodes), src, dst, pop, geoids=np.array(nodes, dtype=object),
+                              shared_len=lens if has_len else None)
+
+    def to_networkx(self):
+        import networkx as nx
+        labels = self.geoids if self.geoids is not None else np.arange(self.n)
+        G = nx.Graph()
+        G.add_nodes_from(labels.tolist())
+        src, dst = self.edges()
+        if self.nbr_len is not None:
+            rows = self.edge_rows()
+            lens = self.nbr_len[rows < self.indices]
+            G.add_weighted_edges_from(zip(labels[src].tolist(), labels[dst].tolist(), lens.tolist()),
+                                      weight="shared_len")
+        else:
+            G.add_edges_from(zip(labels[src].tolist(), labels[dst].tolist()))
+        return G
@@ -0,0 +1,108 @@
+# src/algorithms/multilevel.py
+"""
+Multilevel (coarsen -> partition -> project -> refine) partitioning over the GEOID hierarchy.
+
+Block GEOIDs are SSCCCTTTTTTBBBB: state(2) county(3) tract(6) block(4), and the block group is
+the first block digit. Blocks are collapsed to block groups or tracts by GEOID prefix, seed
+growth + repair run on the small coarse graph, and the result is projected back down one level
+at a time with border_swaps refining only around district borders.
+"""
+import time
+import numpy as np
+
+from src.algorithms.graph import BlockGraph, geoid_strings
+from src.algorithms.seed_grow import grow_regions
+from src.algorithms.repair_swap import border_swaps
+from src.algorithms.objectives import build_objectives
+
+# GEOID prefix length for each level
+LEVELS = {"county": 5, "tract": 11, "bg": 12, "block": 15}
+
+
+def level_labels(geoids, level: str):
+    """(labels int32[n], coarse ids) grouping nodes by the GEOID prefix of `level`."""
+    if level not in LEVELS:
+        raise ValueError(f"Unknown level {level!r}; expected one of {sorted(LEVELS)}")
+    prefixes = geoid_strings(geoids).astype(f"U{LEVELS[level]}")
+    ids, labels = np.unique(prefixes, return_inverse=True)
+    return labels.astype(np.int32), ids
+
+
+def coarsen(graph: BlockGraph, labels, geoids=None) -> BlockGraph:
+    """
+    Collapse nodes with the same label into one: populations, areas and outer lengths are
+    summed, parallel edges merged (shared lengths summed) and internal edges dropped.
+    Centroids become the area-weighted (else plain) mean of the merged nodes.
+    """
+    labels = np.asarray(labels)
+    c = int(labels.max()) + 1
+    src, dst = graph.edges()
+    lu, lv = labels[src].astype(np.int64), labels[dst].astype(np.int64)
+    between = lu != lv
+    a, b = np.minimum(lu, lv)[between], np.maximum(lu, lv)[between]
+    keys, inverse = np.unique(a * c + b, return_inverse=True)
+
+    shared_len = None
+    if graph.nbr_len is not None:
+        rows = graph.edge_rows()
+        lens = graph.nbr_len[rows < graph.indices][between]
+        shared_len = np.bincount(inverse, weights=lens, minlength=len(keys))
+
+    coarse = BlockGraph.from_edges(
+        c, keys // c, keys % c, np.bincount(labels, weights=graph.pop, minlength=c),
+        geoids=geoids, shared_len=shared_len,
+        area=None if graph.area is None else np.bincount(labels, weights=graph.area, minlength=c),
+    )
+    if graph.outer_len is not None:
+        coarse.outer_len = np.bincount(labels, weights=graph.outer_len, minlength=c)
+    if graph.xy is not None:
+        w = graph.area if graph.area is not None else np.ones(graph.n)
+        tot = np.bincount(labels, weights=w, minlength=c)
+        tot[tot == 0] = 1
+        coarse.xy = np.column_stack([np.bincount(labels, weights=w * graph.xy[:, i], minlength=c) / tot
+                                     for i in range(2)])
+    return coarse
+
+
+def multilevel_partition(graph: BlockGraph, k: int, target: float, tol: float, levels=("tract",),
+                         rng=None, max_swaps=20000, compactness_weight=0.0, objective_weights=None,
+                         coi_layers=None, seed_strategy="random", stats: dict | None = None):
+    """
+    Partition `graph` (block level, with geoids) by growing on the coarsest of `levels` and
+    refining on every finer level down to blocks. `levels` is ordered coarse -> fine,
+    e.g. ("tract", "bg"). Refinement on every level also steers by county splits / COIs when
+    `objective_weights` ask for them (COIs only once the level resolves block groups).
+    Returns (assignment int16[n], region_pop list).
+    """
+    if graph.geoids is None:
+        raise ValueError("multilevel partitioning needs graph.geoids")
+    levels = sorted(levels, key=lambda lv: LEVELS[lv])
+    t0 = time.perf_counter()
+    info = {"levels": []}
+
+    # build the hierarchy bottom-up: labels map each level's nodes onto the next coarser one
+    graphs, maps = [graph], []
+    fine_geoids = graph.geoids
+    for level in reversed(levels):
+        labels, ids = level_labels(fine_geoids, level)
+        graphs.append(coarsen(graphs[-1], labels, geoids=ids))
+        maps.append(labels)
+        fine_geoids = ids
+
+    coarsest = graphs[-1]
+    grow_stats = {}
+    assignment, _ = grow_regions(coarsest, k, target, tol, rng=rng, stats=grow_stats, seed_strategy=seed_strategy)
+    info["grow"] = grow_stats
+    for g, labels, name in zip(reversed(graphs), [None] + maps[::-1], levels + ["block"]):
+        if labels is not None:
+            assignment = assignment[labels]  # project one level down
+        swap_stats = {}
+        border_swaps(g, assignment, target, tol, max_iters=max_swaps,
+                     compactness_weight=compactness_weight if g.area is not None else 0.0,
+                     objectives=build_objectives(g, assignment, objective_weights, coi_layers), stats=swap_stats)
+        info["levels"].append({"level": name, "nodes": g.n, "edges": g.n_edges, **swap_stats})
+
+    region_pop = np.bincount(assignment, weights=graph.pop, minlength=k).astype(np.int64).tolist()
+    if stats is not None:
+        stats.update(info, seconds=time.perf_counter() - t0)
+    return assignment, region_pop
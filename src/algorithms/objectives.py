@@ -0,0 +1,215 @@
+# src/algorithms/objectives.py
+"""
+Incremental plan objectives driven by the states.yaml weights.
+
+GroupTracker keeps, for a block -> group membership (counties from the GEOID prefix, or
+communities of interest given as block-group lists), per-(group, district) block and
+population counters. Splits (groups in more than one district) and pieces (sum over groups
+of the districts they touch) then change in O(groups per block) when one block moves, so
+border_swaps and chains can score every candidate move without recomputing the plan.
+
+Objectives bundles the trackers the weights ask for. vra and competitiveness need
+demographic / election data that isn't in the pipeline yet, so they are not computed.
+"""
+from pathlib import Path
+import json
+
+import numpy as np
+
+from src.algorithms.graph import BlockGraph, geoid_strings
+
+COUNTY_PREFIX = 5   # SSCCC
+BG_PREFIX = 12      # SSCCCTTTTTTB
+
+
+class GroupTracker:
+    """
+    Per-(group, district) counters for a membership given in CSR form: block n belongs to
+    groups grp[ptr[n]:ptr[n+1]] (usually exactly one; zero or several for COI layers).
+    The membership and `pop` are read through memoryviews, not copied into lists.
+    """
+    def __init__(self, ptr, grp, n_groups: int, pop, assignment):
+        self.ptr = memoryview(np.ascontiguousarray(ptr, dtype=np.int64))
+        self.grp = memoryview(np.ascontiguousarray(grp, dtype=np.int32))
+        self.n_groups = n_groups
+        self.pop = memoryview(np.ascontiguousarray(pop, dtype=np.int64))
+        self.blocks = [dict() for _ in range(n_groups)]   # group -> {district: blocks}
+        self.pops = [dict() for _ in range(n_groups)]     # group -> {district: population}
+        for n, d in enumerate(np.asarray(assignment).tolist()):
+            for g in self.grp[self.ptr[n]:self.ptr[n+1]]:
+                self.blocks[g][d] = self.blocks[g].get(d, 0) + 1
+                self.pops[g][d] = self.pops[g].get(d, 0) + self.pop[n]
+        self.pieces = sum(len(b) for b in self.blocks)
+        self.splits = sum(len(b) > 1 for b in self.blocks)
+
+    @classmethod
+    def from_labels(cls, labels, pop, assignment, n_groups: int | None = None):
+        """One group per block (labels[n] >= 0), e.g. counties."""
+        labels = np.asarray(labels)
+        n_groups = int(labels.max()) + 1 if n_groups is None else n_groups
+        return cls(np.arange(len(labels) + 1), labels, n_groups, pop, assignment)
+
+    def move_delta(self, n, src, dst):
+        """(d_splits, d_pieces) if block n moved from district src to dst."""
+        d_splits = d_pieces = 0
+        for g in self.grp[self.ptr[n]:self.ptr[n+1]]:
+            b = self.blocks[g]
+            leaves = b[src] == 1
+            enters = dst not in b
+            d_pieces += enters - leaves
+            before = len(b)
+            after = before + enters - leaves
+            d_splits += (after > 1) - (before > 1)
+        return d_splits, d_pieces
+
+    def unit_delta(self, nodes, src, dst):
+        """(d_splits, d_pieces) if `nodes` moved from src to dst together."""
+        if len(nodes) == 1:
+            return self.move_delta(nodes[0], src, dst)
+        count = {}
+        for n in nodes:
+            for g in self.grp[self.ptr[n]:self.ptr[n+1]]:
+                count[g] = count.get(g, 0) + 1
+        d_splits = d_pieces = 0
+        for g, c in count.items():
+            b = self.blocks[g]
+            leaves = b[src] == c
+            enters = dst not in b
+            d_pieces += enters - leaves
+            before = len(b)
+            after = before + enters - leaves
+            d_splits += (after > 1) - (before > 1)
+        return d_splits, d_pieces
+
+    def apply(self, n, src, dst):
+        p = self.pop[n]
+        for g in self.grp[self.ptr[n]:self.ptr[n+1]]:
+            b, q = self.blocks[g], self.pops[g]
+            before = len(b)
+            if b[src] == 1:
+                del b[src], q[src]
+                self.pieces -= 1
+            else:
+                b[src] -= 1
+                q[src] -= p
+            if dst in b:
+                b[dst] += 1
+                q[dst] += p
+            else:
+                b[dst], q[dst] = 1, p
+                self.pieces += 1
+            self.splits += (len(b) > 1) - (before > 1)
+
+    def split_pop(self) -> int:
+        """Population outside each group's largest piece (people 'split off' from their group)."""
+        return int(sum(sum(q.values()) - max(q.values()) for q in self.pops if q))
+
+    def summary(self, name: str) -> dict:
+        return {f"{name}_splits": self.splits,
+                f"{name}_pieces": self.pieces,
+                f"{name}_split_pop": self.split_pop()}
+
+
+def county_labels(geoids):
+    """(labels int32[n], county GEOIDs) from the first 5 GEOID characters (works at block/bg/tract level)."""
+    prefixes = geoid_strings(geoids).astype(f"U{COUNTY_PREFIX}")
+    ids, labels = np.unique(prefixes, return_inverse=True)
+    return labels.astype(np.int32), ids
+
+
+def coi_membership(geoids, layers: dict):
+    """
+    CSR (ptr, grp, names) of block -> COI membership, for COI layers given as
+    {name: [block-group GEOIDs]}. Needs block or block-group level geoids; a block can be in
+    several COIs or none.
+    """
+    geoids = geoid_strings(geoids)
+    if len(geoids) and len(geoids[0]) < BG_PREFIX:
+        raise ValueError("COI layers need block- or block-group-level GEOIDs")
+    names = sorted(layers)
+    bg = geoids.astype(f"U{BG_PREFIX}")
+    rows, cols = [], []
+    for g, name in enumerate(names):
+        hit = np.flatnonzero(np.isin(bg, np.asarray(layers[name], dtype=str)))
+        rows.append(hit)
+        cols.append(np.full(len(hit), g, dtype=np.int32))
+    rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    cols = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int32)
+    order = np.argsort(rows, kind="stable")
+    ptr = np.zeros(len(geoids) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(geoids)), out=ptr[1:])
+    return ptr, cols[order], names
+
+
+def load_coi_layers(path: Path) -> dict:
+    """COI layers file: JSON or YAML mapping name -> list of block-group GEOIDs."""
+    path = Path(path)
+    text = path.read_text()
+    if path.suffix.lower() in (".yaml", ".yml"):
+        import yaml
+        layers = yaml.safe_load(text)
+    else:
+        layers = json.loads(text)
+    return {str(name): [str(g) for g in bgs] for name, bgs in layers.items()}
+
+
+class Objectives:
+    """
+    Weighted county-split / COI penalty for one assignment. move_cost(n, assignment, dst) is
+    the weighted change in pieces (extra districts per county / COI) if block n moved to dst,
+    in the same units border_swaps uses for its other terms; lower is better.
+    apply() must be called before assignment[n] changes.
+    """
+    def __init__(self, graph: BlockGraph, assignment, weights: dict, coi_layers: dict | None = None):
+        self.trackers = {}
+        self.weights = {}
+        if weights.get("county_splits", 0) > 0:
+            if graph.geoids is None:
+                raise ValueError("county_splits needs graph.geoids")
+            labels, _ = county_labels(graph.geoids)
+            self.trackers["county"] = GroupTracker.from_labels(labels, graph.pop, assignment)
+            self.weights["county"] = weights["county_splits"]
+        if weights.get("coi", 0) > 0 and coi_layers:
+            ptr, grp, names = coi_membership(graph.geoids, coi_layers)
+            self.trackers["coi"] = GroupTracker(ptr, grp, len(names), graph.pop, assignment)
+            self.weights["coi"] = weights["coi"]
+
+    def __bool__(self):
+        return bool(self.trackers)
+
+    def move_cost(self, n, assignment, dst) -> float:
+        src = assignment[n]
+        return sum(w * self.trackers[name].move_delta(n, src, dst)[1] for name, w in self.weights.items())
+
+    def unit_cost(self, nodes, assignment, dst) -> float:
+        """move_cost for `nodes` (all in one district) moving to dst together."""
+        src = assignment[nodes[0]]
+        return sum(w * self.trackers[name].unit_delta(nodes, src, dst)[1] for name, w in self.weights.items())
+
+    def apply(self, n, assignment, dst):
+        src = assignment[n]
+        for t in self.trackers.values():
+            t.apply(n, src, dst)
+
+    def apply_many(self, nodes, old, new):
+        """Bulk update after a chain step reassigned `nodes` from old[i] to new[i]."""
+        for n, a, b in zip(np.asarray(nodes).tolist(), np.asarray(old).tolist(), np.asarray(new).tolist()):
+            if a != b:
+                for t in self.trackers.values():
+                    t.apply(n, a, b)
+
+    def summary(self) -> dict:
+        out = {}
+        for name, t in self.trackers.items():
+            out.update(t.summary(name))
+        return out
+
+
+def build_objectives(graph: BlockGraph, assignment, weights: dict | None, coi_layers: dict | None = None):
+    """Objectives for the weights that apply to `graph`, or None if none do."""
+    if not weights or graph.geoids is None:
+        return None
+    if coi_layers and len(geoid_strings(graph.geoids[:1])[0]) < BG_PREFIX:
+        coi_layers = None  # coarser than block groups: COIs can't be resolved on this graph
+    obj = Objectives(graph, assignment, weights, coi_layers)
+    return obj if obj else None
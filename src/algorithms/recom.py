@@ -0,0 +1,160 @@
+# src/algorithms/recom.py
+"""
+ReCom (recombination) Markov chain on a BlockGraph.
+
+Each step picks a random cut edge, merges the two districts on either side, draws a random
+spanning tree of the merged region and cuts one tree edge whose two sides are both within
+pop tolerance of the target (spanning_tree.split_region). Everything per step is array/list
+based on the CSR graph; no networkx objects are built.
+"""
+from pathlib import Path
+import json
+import time
+
+import numpy as np
+
+from src.algorithms.graph import BlockGraph, gather_edges
+from src.algorithms.spanning_tree import split_region
+
+
+class ChainState:
+    """
+    Incremental bookkeeping for a ReCom chain on `assignment` (held, not copied): the member
+    nodes of every district and the set of cut edges (CSR entries, both directions, so a
+    uniform draw from it is a uniform cut edge). A step only touches the two merged districts
+    and the edges at the nodes that changed district instead of rescanning all N nodes and
+    E edges. Cut edges live in an append-only list with lazily dropped stale entries that is
+    compacted once more than half of it is stale.
+    """
+
+    def __init__(self, graph: BlockGraph, assignment):
+        self.graph = graph
+        self.assignment = assignment
+        self.rows = graph.edge_rows()
+        # CSR entries are sorted by (row, col), so the reverse of (u, v) is found by bisection
+        key = self.rows.astype(np.int64) * graph.n + graph.indices
+        self.rev = np.searchsorted(key, graph.indices.astype(np.int64) * graph.n + self.rows)
+        k = int(assignment.max()) + 1
+        order = np.argsort(assignment, kind="stable")
+        bounds = np.searchsorted(assignment[order], np.arange(k + 1))
+        self.members = [order[bounds[d]:bounds[d + 1]] for d in range(k)]
+        self.is_cut = assignment[self.rows] != assignment[graph.indices]
+        self._compact()
+
+    def _compact(self):
+        self.cut_list = np.flatnonzero(self.is_cut)
+        self.listed = self.is_cut.copy()
+        self.size = self.n_cut = len(self.cut_list)
+
+    def random_cut_edge(self, rng):
+        """A uniformly drawn cut edge (CSR entry), or None if there is none."""
+        if self.n_cut == 0:
+            return None
+        while True:
+            e = self.cut_list[rng.integers(self.size)]
+            if self.is_cut[e]:
+                return int(e)
+
+    def update(self, changed):
+        """Refresh the cut flags of the edges at `changed` nodes after their district changed."""
+        out = gather_edges(self.graph.indptr, changed)
+        edges = np.unique(np.concatenate((out, self.rev[out])))
+        now = self.assignment[self.rows[edges]] != self.assignment[self.graph.indices[edges]]
+        self.n_cut += int(now.sum()) - int(self.is_cut[edges].sum())
+        self.is_cut[edges] = now
+        new = edges[now & ~self.listed[edges]]
+        if len(new):
+            self.listed[new] = True
+            if self.size + len(new) > len(self.cut_list):
+                grown = np.empty(max(2 * len(self.cut_list), self.size + len(new)), dtype=np.int64)
+                grown[:self.size] = self.cut_list[:self.size]
+                self.cut_list = grown
+            self.cut_list[self.size:self.size + len(new)] = new
+            self.size += len(new)
+        if self.size > 2 * self.n_cut + 1024:
+            self._compact()
+
+
+def recom_step(graph: BlockGraph, state: ChainState, local, target, tol, rng, max_attempts=50,
+               objectives=None) -> bool:
+    """
+    One recombination move on `state.assignment` (in place). `local` is a reusable int32[n]
+    buffer filled with -1. Returns False if no balanced split was found within max_attempts
+    spanning trees (assignment unchanged). `objectives` (see objectives.Objectives) is updated
+    for the blocks that changed district.
+    """
+    e = state.random_cut_edge(rng)
+    if e is None:
+        return False
+    assignment = state.assignment
+    a, b = assignment[state.rows[e]], assignment[graph.indices[e]]
+    nodes = np.concatenate((state.members[a], state.members[b]))
+    side = split_region(graph, nodes, local, target*(1-tol), target*(1+tol), rng, max_attempts)
+    if side is None:
+        return False
+    old = assignment[nodes]
+    new = np.where(side, a, b).astype(assignment.dtype)
+    assignment[nodes] = new
+    state.members[a], state.members[b] = nodes[side], nodes[~side]
+    state.update(nodes[old != new])
+    if objectives is not None:
+        objectives.apply_many(nodes, old, new)
+    return True
+
+
+def recom_chain(graph: BlockGraph, assignment, target: float, tol: float, steps: int,
+                rng=None, max_attempts=50, objectives=None, stats: dict | None = None):
+    """
+    Generator over `steps` ReCom steps starting from `assignment` (copied, not modified).
+    Yields the live int16 assignment after every step (including rejected ones, which repeat
+    the previous state); copy it if you need to keep it. If `objectives` (built on the starting
+    assignment) is given it tracks the chain and its counts go into `stats`.
+    """
+    rng = np.random.default_rng(rng)
+    state = ChainState(graph, np.array(assignment, copy=True))
+    local = np.full(graph.n, -1, dtype=np.int32)
+    accepted = 0
+    t0 = time.perf_counter()
+    if stats is not None:
+        stats.update({"steps": 0, "accepted": 0, "seconds": 0.0})
+    for i in range(steps):
+        if recom_step(graph, state, local, target, tol, rng, max_attempts, objectives):
+            accepted += 1
+        if stats is not None:
+            stats.update({"steps": i + 1, "accepted": accepted, "seconds": time.perf_counter() - t0})
+            if objectives is not None:
+                stats.update({f"{name}_{what}": getattr(t, what)
+                              for name, t in objectives.trackers.items() for what in ("splits", "pieces")})
+        yield state.assignment
+
+
+def write_chain(path: Path, chain, n: int, every: int = 1, meta: dict | None = None,
+                flush_every: int = 100) -> int:
+    """
+    Stream a chain's assignments to disk: raw int16 rows appended to `path`, with a JSON header
+    at `path`.json (n, dtype, rows written so far) refreshed every `flush_every` rows so a
+    partially written chain is still readable. Keeps every `every`-th state. Returns rows written.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    header = path.with_name(path.name + ".json")
+    info = {"n": int(n), "dtype": "int16", "every": every, "rows": 0, **(meta or {})}
+    rows = 0
+    with path.open("wb") as f:
+        for i, assignment in enumerate(chain):
+            if i % every:
+                continue
+            f.write(np.asarray(assignment, dtype=np.int16).tobytes())
+            rows += 1
+            if rows % flush_every == 0:
+                f.flush()
+                header.write_text(json.dumps({**info, "rows": rows}))
+    header.write_text(json.dumps({**info, "rows": rows}))
+    return rows
+
+
+def read_chain(path: Path):
+    """Memory-mapped (rows, n) view of a chain written by write_chain."""
+    path = Path(path)
+    info = json.loads(path.with_name(path.name + ".json").read_text())
+    return np.memmap(path, dtype=info["dtype"], mode="r", shape=(info["rows"], info["n"]))
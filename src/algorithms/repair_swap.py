@@ -1,38 +1,356 @@
 # src/algorithms/repair_swap.py
-def border_swaps(G, assignment, geoid_to_pop, target, tol, max_iters=5000):
+import bisect
+import heapq
+import time
+import numpy as np
+from src.algorithms.graph import BlockGraph
+from src.algorithms.compactness import DistrictShapes
+from src.algorithms.spanning_tree import split_region
+
+def _stays_connected(n, d, assignment, ptr, idx, budget):
+    """
+    Contiguity test: would district d stay connected if n left it?
+    First a cheap BFS inside d (minus n) from one of n's same-district neighbors until all of
+    them are reached; if that visits more than `budget` nodes without an answer it falls back
+    to the exact check in _detached.
+    """
+    same = [m for m in idx[ptr[n]:ptr[n+1]] if assignment[m] == d]
+    if len(same) <= 1:
+        return True
+    want = set(same[1:])
+    seen = {n, same[0]}
+    queue = [same[0]]
+    head = 0
+    while head < len(queue):
+        u = queue[head]; head += 1
+        for v in idx[ptr[u]:ptr[u+1]]:
+            if v in seen or assignment[v] != d:
+                continue
+            want.discard(v)
+            if not want:
+                return True
+            seen.add(v)
+            queue.append(v)
+        if len(seen) > budget:
+            return _detached(n, d, assignment, ptr, idx, limit=None) == []
+    return False
+
+def _detached(n, d, assignment, ptr, idx, limit=None):
     """
-    Greedy boundary swap: move a border node from the largest-over target district
-    to the smallest-under target neighbor if it reduces max deviation and keeps contiguity.
+    Nodes of d that would be cut off from the rest of d if n left it ([] = stays connected).
+    One BFS per same-district neighbor of n, advanced in lockstep and merged when they meet;
+    a group of searches that runs out of nodes while others are still going is a cut-off
+    piece. The search that is left over is the main body and is never explored in full, so
+    the cost is bounded by the cut-off side (times deg), not by the size of d.
+    With `limit`, returns None as soon as the cut-off nodes (or the search) would exceed it.
+    """
+    same = [m for m in idx[ptr[n]:ptr[n+1]] if assignment[m] == d]
+    if len(same) <= 1:
+        return []
+    owner = {n: -1}
+    group = list(range(len(same)))
+    def find(i):
+        while group[i] != i:
+            group[i] = group[group[i]]
+            i = group[i]
+        return i
+    queues = [[s] for s in same]
+    for i, s in enumerate(same):
+        owner[s] = i
+    heads = [0] * len(same)
+    alive = set(range(len(same)))   # roots of groups still being searched
+    cut = []
+    expanded = 0
+    while len(alive) > 1:
+        for i in range(len(same)):
+            if heads[i] == len(queues[i]) or find(i) not in alive:
+                continue
+            q = queues[i]
+            u = q[heads[i]]; heads[i] += 1
+            expanded += 1
+            for v in idx[ptr[u]:ptr[u+1]]:
+                if assignment[v] != d:
+                    continue
+                j = owner.get(v)
+                if j is None:
+                    owner[v] = i
+                    q.append(v)
+                elif j >= 0:
+                    a, b = find(i), find(j)
+                    if a != b:
+                        group[b] = a
+                        alive.discard(b)
+        if len(alive) <= 1:
+            break
+        # a group whose searches are all exhausted is closed off from the others
+        busy = {find(i) for i in range(len(same)) if heads[i] < len(queues[i])}
+        for r in alive - busy:
+            alive.discard(r)
+            cut += [v for i in range(len(same)) if find(i) == r for v in queues[i]]
+            if len(alive) <= 1:
+                break
+        if limit is not None and (len(cut) > limit or expanded > limit * len(same)):
+            return None
+    return cut
+
+def border_swaps(graph: BlockGraph, assignment, target, tol, max_iters=20000,
+                 contiguity_budget=300, compactness_weight=0.0, max_candidates=64,
+                 objectives=None, piece_limit=25, max_chain=6, recom_attempts=20, rng=0,
+                 stats: dict | None = None):
     """
-    from collections import defaultdict
-    def district_pop():
-        acc = defaultdict(int)
-        for n, d in assignment.items(): acc[d] += geoid_to_pop[n]
-        return acc
+    Greedy repair toward `tol`, worst district first: a border node (with the piece of at most
+    `piece_limit` nodes it would cut off) moves to a neighboring district whenever that strictly
+    lowers the sum of squared deviations; when no such move is left, population is shifted by
+    spanning-tree re-splits along a path of up to `max_chain` districts (see recombine below).
+    With compactness_weight > 0 or `objectives` (objectives.Objectives, kept in sync) the best
+    of `max_candidates` moves by Polsby-Popper gain minus county/COI cost is taken.
+    `assignment` is updated in place and returned; `stats` gets iterations, moves and timings.
+    """
+    t0 = time.perf_counter()
+    ptr, idx, pop = graph.csr_lists()
+    assign = assignment.tolist()
+    k = int(assignment.max()) + 1
+    region_pop = np.bincount(assignment, weights=graph.pop, minlength=k).astype(np.int64).tolist()
+    size = np.bincount(assignment, minlength=k).tolist()
     def deviation(p): return abs(p - target)/target
+    band = target * tol
+
+    # border[d] = nodes of d with at least one neighbor outside d
+    rows = graph.edge_rows()
+    cut = assignment[rows] != assignment[graph.indices]
+    border = [set() for _ in range(k)]
+    for n in np.unique(rows[cut]).tolist():
+        border[assign[n]].add(n)
+
+    def refresh_border(n):
+        d = assign[n]
+        if any(assign[m] != d for m in idx[ptr[n]:ptr[n+1]]):
+            border[d].add(n)
+        else:
+            border[d].discard(n)
+
+    ranking = sorted((deviation(p), d) for d, p in enumerate(region_pop))
+    def set_pop(d, p):
+        del ranking[bisect.bisect_left(ranking, (deviation(region_pop[d]), d))]
+        region_pop[d] = p
+        bisect.insort(ranking, (deviation(p), d))
+
+    # rejected[d]: nodes of d that can't leave it (alone or with a small piece); that only
+    # depends on d's own membership
+    rejected = [set() for _ in range(k)]
+    def unit(n, src):
+        """Nodes leaving src with n: (n,), n plus the small piece it would cut off, or None."""
+        if n in rejected[src]:
+            return None
+        if size[src] > 1:
+            if _stays_connected(n, src, assign, ptr, idx, contiguity_budget):
+                return (n,)
+            if piece_limit:
+                cut = _detached(n, src, assign, ptr, idx, limit=piece_limit)
+                if cut:
+                    return (n, *cut)
+        rejected[src].add(n)
+        counters["contiguity_rejects"] += 1
+        return None
+
+    def valid(u, a, b):
+        """Unit move keeps the sum of squared deviations strictly dropping (see border_swaps)."""
+        if len(u) == 1:
+            return True  # candidates() already checked the single node
+        p = sum(pop[v] for v in u)
+        return 0 < p < region_pop[a] - region_pop[b]
 
-    region_pop = district_pop()
-    for _ in range(max_iters):
-        # find worst-offender (highest deviation)
-        worst = max(region_pop, key=lambda d: deviation(region_pop[d]))
-        # candidate border nodes in 'worst'
-        border = [n for n in G.nodes if assignment[n]==worst and any(assignment[m]!=worst for m in G.neighbors(n))]
-        improved = False
-        for n in border:
-            # neighbors’ districts
-            nbr_ds = {assignment[m] for m in G.neighbors(n) if assignment[m]!=worst}
-            # try moving to the neighbor district with lowest pop
-            target_d = min(nbr_ds, key=lambda d: region_pop[d])
-            new_pop_worst = region_pop[worst] - geoid_to_pop[n]
-            new_pop_target = region_pop[target_d] + geoid_to_pop[n]
-            old_max = max(deviation(p) for p in region_pop.values())
-            new_max = max(max(deviation(new_pop_worst), deviation(new_pop_target)),
-                          *[deviation(p) for d,p in region_pop.items() if d not in (worst,target_d)])
-            if new_max < old_max:
-                assignment[n] = target_d
-                region_pop[worst] = new_pop_worst
-                region_pop[target_d] = new_pop_target
-                improved = True
+    shapes = DistrictShapes(graph, assignment, k) if compactness_weight > 0 else None
+    objectives = objectives or None
+    scored = shapes is not None or objectives is not None
+
+    def candidates(d):
+        """Pop-valid moves (node, src, dst) touching district d, worst-district side first."""
+        if region_pop[d] > target:
+            # push a border node out to a (sufficiently lighter) neighboring district
+            for n in border[d]:
+                p = pop[n]
+                if p == 0:
+                    continue
+                dsts = sorted(e for e in {assign[m] for m in idx[ptr[n]:ptr[n+1]]} if region_pop[d] - region_pop[e] > p)
+                if not dsts:
+                    continue
+                if not scored:
+                    yield n, d, min(dsts, key=lambda e: region_pop[e])
+                else:
+                    for e in dsts:
+                        yield n, d, e
+        else:
+            # pull in a node from a (sufficiently heavier) neighboring district across the border
+            tried = set()
+            for n in border[d]:
+                for m in idx[ptr[n]:ptr[n+1]]:
+                    src = assign[m]
+                    if src == d or m in tried:
+                        continue
+                    tried.add(m)
+                    if 0 < pop[m] < region_pop[src] - region_pop[d]:
+                        yield m, src, d
+
+    def move_score(move):
+        u, a, b = move
+        p = sum(pop[v] for v in u)  # the whole unit: n plus any piece it carries along
+        d_sq = (((region_pop[a] - p - target)**2 + (region_pop[b] + p - target)**2)
+                - ((region_pop[a] - target)**2 + (region_pop[b] - target)**2)) / (band * band)
+        score = -d_sq
+        if shapes is not None:
+            score += compactness_weight * 100 * shapes.unit_gain(u, assign, b)
+        if objectives is not None:
+            score -= objectives.unit_cost(u, assign, b)
+        return score
+
+    def find_move(d):
+        if not scored:
+            for n, a, b in candidates(d):
+                u = unit(n, a)
+                if u is not None and valid(u, a, b):
+                    return u, a, b
+            return None
+        # lazy best-first: rank by the node alone, and only the move on top gets its unit
+        # (the contiguity check) and, if that carries a piece, is rescored with it
+        heap = []
+        for i, (n, a, b) in enumerate(candidates(d)):
+            heap.append((-move_score(((n,), a, b)), i, None, n, a, b))
+            if len(heap) >= max_candidates:
+                break
+        heapq.heapify(heap)
+        while heap:
+            neg, i, u, n, a, b = heapq.heappop(heap)
+            if u is not None:
+                return u, a, b
+            u = unit(n, a)
+            if u is None or not valid(u, a, b):
+                continue
+            heapq.heappush(heap, (neg if len(u) == 1 else -move_score((u, a, b)), i, u, n, a, b))
+        return None
+
+    def apply(n, a, b):
+        p = pop[n]
+        if shapes is not None:
+            shapes.apply(n, assign, b)
+        if objectives is not None:
+            objectives.apply(n, assign, b)
+        border[a].discard(n)
+        assign[n] = b
+        labels[n] = b
+        size[a] -= 1; size[b] += 1
+        set_pop(a, region_pop[a] - p)
+        set_pop(b, region_pop[b] + p)
+        rejected[a].clear(); rejected[b].clear()
+        refresh_border(n)
+        for m in idx[ptr[n]:ptr[n+1]]:
+            refresh_border(m)
+
+    def district_neighbors(d):
+        return {assign[m] for n in border[d] for m in idx[ptr[n]:ptr[n+1]]} - {d}
+
+    local = np.full(graph.n, -1, dtype=np.int32)
+    labels = assignment.copy()  # array twin of `assign` for the vectorized member scan in resplit
+    rng = np.random.default_rng(rng)
+
+    def outside(path):
+        """Squared population outside the tolerance band, over the districts in path."""
+        return sum(max(0, abs(region_pop[v] - target) - band)**2 for v in path)
+
+    def resplit(a, b, want, nxt, done):
+        """
+        Re-split a and b so that a ends as near `want` people as a cut finds (within a band),
+        b keeping a node next to district nxt (if given) for the following hop; moves go onto `done`.
+        """
+        nodes = np.flatnonzero((labels == a) | (labels == b))
+        keep = next((n for n in border[b]
+                     if nxt is None or any(assign[m] == nxt for m in idx[ptr[n]:ptr[n+1]])), None)
+        if keep is None:
+            return False
+        nodes = np.concatenate(([keep], nodes[nodes != keep]))
+        side = split_region(graph, nodes, local, want - band, want + band, rng, recom_attempts,
+                            one_side=True, want=want)
+        if side is None:
+            return False
+        for v, old, new in zip(nodes.tolist(), labels[nodes].tolist(), np.where(side, a, b).tolist()):
+            if old != new:
+                apply(v, old, new)
+                done.append((v, old, new))
+        return True
+
+    def recombine(d):
+        """Recombination shift between d and a heavier (lighter) district; True if applied."""
+        prev, hops, frontier = {d: None}, {d: 0}, [d]
+        for h in range(1, max_chain):
+            nxt = []
+            for u in frontier:
+                for v in sorted(district_neighbors(u)):
+                    if v not in prev:
+                        prev[v], hops[v] = u, h
+                        nxt.append(v)
+            frontier = nxt
+        # x[e] = people moved from e to d (negative: from d to e): up to d's gap, as much as e can
+        # spare while staying within half a band of target, or else half their difference
+        gap, sign = target - region_pop[d], 1 if region_pop[d] < target else -1
+        x = {}
+        for e in prev:
+            room = region_pop[e] - target + sign * band / 2
+            x[e] = sign * min(sign * gap, max(sign * room, sign * (region_pop[e] - region_pop[d]) / 2))
+        ends = sorted((e for e in x if e != d and x[e] * sign > 0), key=lambda e: (hops[e], -abs(x[e])))
+        for e in ends[:2 * max_chain]:
+            path = [e]
+            while prev[path[-1]] is not None:
+                path.append(prev[path[-1]])
+            path.reverse()
+            wants = [region_pop[d] + x[e]] + [region_pop[v] for v in path[1:-1]]
+            before, before_max = outside(path), ranking[-1][0]
+            done = []
+            if all(resplit(a, b, want, nxt, done)
+                   for a, b, want, nxt in zip(path, path[1:], wants, path[2:] + [None])) and \
+                    outside(path) < before and ranking[-1][0] <= before_max:
+                return True
+            for v, a, b in reversed(done):
+                apply(v, b, a)
+        return False
+
+    counters = {"contiguity_rejects": 0}
+    max_dev_before = ranking[-1][0]
+    iters = moves = pieces = recombinations = 0
+    while iters < max_iters:
+        iters += 1
+        if ranking[-1][0] <= tol:
+            break
+        move = None
+        for _, d in list(reversed(ranking)):
+            move = find_move(d)
+            if move is not None:
                 break
-        if not improved: break
+        if move is not None:
+            u, a, b = move
+            for v in u:
+                apply(v, a, b)
+            moves += 1
+            pieces += len(u) > 1
+            continue
+        # stuck on single moves: recombine, worst district first, among those out of tolerance
+        if not any(recombine(d) for dev, d in list(reversed(ranking)) if dev > tol):
+            break
+        recombinations += 1
+
+    assignment[:] = assign
+    if stats is not None:
+        stats.update({
+            "iterations": iters,
+            "moves": moves,
+            "piece_moves": pieces,
+            "recombinations": recombinations,
+            "contiguity_rejects": counters["contiguity_rejects"],
+            "max_dev_before": float(max_dev_before),
+            "max_dev_after": float(ranking[-1][0]),
+            "within_tol": bool(ranking[-1][0] <= tol),
+            "seconds": time.perf_counter() - t0,
+            **({"pp_mean": float(np.mean(shapes.scores())), "pp_min": float(np.min(shapes.scores()))}
+               if shapes is not None else {}),
+            **(objectives.summary() if objectives is not None else {}),
+        })
     return assignment
@@ -1,7 +1,9 @@
 # src/algorithms/scoring.py
 import math
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+from src.algorithms.compactness import DistrictShapes, shape_metrics
 
 def polsby_popper(geom):
     A = geom.area
@@ -18,7 +20,7 @@ def score_plan(districts_gdf: gpd.GeoDataFrame, target: float):
     g = districts_gdf.copy()
     if "pop" not in g.columns:
         raise ValueError("districts_gdf must include a 'pop' column")
-    g["pp"] = g.geometry.apply(polsby_popper)
+    g["pp"] = shape_metrics(g.geometry.values)[2]
     max_dev, mean_dev = population_deviation(g["pop"], target)
     plan = {
         "n_districts": len(g),
@@ -29,3 +31,28 @@ def score_plan(districts_gdf: gpd.GeoDataFrame, target: float):
         "pp_min": float(g["pp"].min()),
     }
     return plan, g[["district","pop","pp"]]
+
+
+def score_assignment(district, pop, target: float | None = None, k: int | None = None, graph=None):
+    """
+    score_plan for an assignment-only plan: district populations come from a bincount over the
+    block populations, so no polygons are loaded. If `graph` carries the block shape tables
+    (area/outer_len/nbr_len) Polsby-Popper is computed from them as well.
+    """
+    district = np.asarray(district)
+    k = int(district.max()) + 1 if k is None else k
+    d_pop = np.bincount(district, weights=np.asarray(pop), minlength=k).astype(np.int64)
+    target = float(d_pop.sum() / k if target is None else target)
+    per_d = pd.DataFrame({"district": np.arange(k), "pop": d_pop})
+    max_dev, mean_dev = population_deviation(per_d["pop"], target)
+    plan = {
+        "n_districts": k,
+        "pop_target": target,
+        "pop_max_dev": max_dev,
+        "pop_mean_dev": mean_dev,
+    }
+    if graph is not None and graph.area is not None and graph.outer_len is not None and graph.nbr_len is not None:
+        shapes = DistrictShapes(graph, district, k)
+        per_d["area"], per_d["perimeter"], per_d["pp"] = shapes.area, shapes.perimeter, shapes.scores()
+        plan.update(pp_mean=float(per_d["pp"].mean()), pp_min=float(per_d["pp"].min()))
+    return plan, per_d
@@ -1,62 +1,225 @@
-import math, random
-import networkx as nx
-import pandas as pd
-
-def seed_nodes(G: nx.Graph, geoid_to_pop: dict, k: int):
-    # pick k seeds weighted by population clusters (naive: random heavy nodes)
-    nodes = list(G.nodes())
-    weights = [max(geoid_to_pop[n],1) for n in nodes]
-    seeds = set()
-    while len(seeds) < k:
-        seeds.add(random.choices(nodes, weights=weights, k=1)[0])
-    return list(seeds)
-
-def grow_regions(G: nx.Graph, geoid_to_pop: dict, k: int, target_pop: float, tol: float):
-    # region assignment via BFS expansion from seeds until near target_pop
-    seeds = seed_nodes(G, geoid_to_pop, k)
-    assignment = {n: None for n in G.nodes()}
+from collections import deque
+import heapq
+import numpy as np
+from src.algorithms.graph import BlockGraph, UNASSIGNED, ASSIGNMENT_DTYPE
+
+SEED_STRATEGIES = ("random", "kmeans++", "balanced")
+
+def _power_assign(xy, centers, offset, chunk=100_000):
+    """(label, squared distance to it) of argmin |x - c|^2 - offset_c, in row chunks to bound memory."""
+    label = np.empty(len(xy), dtype=np.int64)
+    dist = np.empty(len(xy))
+    for i in range(0, len(xy), chunk):
+        d = xy[i:i+chunk, None, :] - centers[None, :, :]
+        d2 = np.einsum("ijk,ijk->ij", d, d)
+        lab = np.argmin(d2 - offset, axis=1)
+        label[i:i+chunk] = lab
+        dist[i:i+chunk] = d2[np.arange(len(lab)), lab]
+    return label, dist
+
+def _kmeanspp_centers(xy, w, k, rng):
+    """Population-weighted k-means++: each next center is drawn with p ~ pop * D^2."""
+    centers = [xy[rng.choice(len(xy), p=w / w.sum())]]
+    d2 = ((xy - centers[0])**2).sum(axis=1)
+    for _ in range(1, k):
+        p = w * d2
+        total = p.sum()
+        i = rng.choice(len(xy), p=p / total) if total > 0 else rng.choice(len(xy), p=w / w.sum())
+        centers.append(xy[i])
+        d2 = np.minimum(d2, ((xy - xy[i])**2).sum(axis=1))
+    return np.array(centers)
+
+def _balanced_centers(xy, w, k, rng, iters=25, step=0.5):
+    """
+    Population-balanced k-means: Lloyd iterations on a power diagram. Each block goes to
+    argmin(|x - c|^2 - offset_c) and every round the offsets of under-populated cells grow
+    (over-populated ones shrink) in proportion to their relative deviation, so the cells drift
+    toward equal population while staying compact.
+    """
+    centers = _kmeanspp_centers(xy, w, k, rng)
+    offset = np.zeros(k)
+    target = w.sum() / k
+    for _ in range(iters):
+        label, dist = _power_assign(xy, centers, offset)
+        cell_w = np.bincount(label, weights=w, minlength=k)
+        for i in range(2):
+            s = np.bincount(label, weights=w * xy[:, i], minlength=k)
+            centers[:, i] = np.where(cell_w > 0, s / np.maximum(cell_w, 1e-12), centers[:, i])
+        # typical squared cell radius sets the offset scale
+        scale = np.median(dist) + 1e-12
+        offset += step * scale * (target - cell_w) / target
+    return centers, _power_assign(xy, centers, offset)[0]
+
+def seed_nodes(graph: BlockGraph, k: int, rng=None, strategy: str = "random"):
+    """
+    k distinct seed nodes.
+      random    population-weighted draw without replacement (ignores geography)
+      kmeans++  population-weighted k-means++ over block centroids (graph.xy)
+      balanced  kmeans++ refined into population-balanced cells; seeds are the populated
+                nodes nearest each cell center
+    """
+    return _place_seeds(graph, k, rng, strategy)[0]
+
+def _place_seeds(graph: BlockGraph, k: int, rng, strategy: str):
+    """(seeds, cells): cells is the balanced power-diagram label per node, else None."""
+    rng = np.random.default_rng(rng)
+    weights = np.maximum(graph.pop, 1).astype(np.float64)
+    if strategy == "random":
+        return rng.choice(graph.n, size=k, replace=False, p=weights / weights.sum()).tolist(), None
+    if strategy not in SEED_STRATEGIES:
+        raise ValueError(f"Unknown seed strategy {strategy!r}; expected one of {SEED_STRATEGIES}")
+    if graph.xy is None:
+        raise ValueError(f"seed strategy {strategy!r} needs block centroids (graph.xy)")
+    xy = graph.xy
+    # recentre/rescale so squared distances stay well-conditioned in projected or lon/lat units
+    xy = (xy - xy.mean(axis=0)) / (xy.std() or 1.0)
+    cells = None
+    if strategy == "kmeans++":
+        centers = _kmeanspp_centers(xy, weights, k, rng)
+    else:
+        centers, cells = _balanced_centers(xy, weights, k, rng)
+    # snap each center to the nearest populated, not yet taken node
+    empty = graph.pop <= 0
+    seeds = []
+    for c in centers:
+        d2 = ((xy - c)**2).sum(axis=1)
+        d2[empty] = np.inf
+        d2[seeds] = np.inf
+        seeds.append(int(np.argmin(d2)))
+    return seeds, cells
+
+def assign_leftovers(graph: BlockGraph, assignment: list, region_pop: list, cells=None) -> int:
+    """
+    Repair pass after growth: hand every UNASSIGNED node in `assignment` (a list, updated in
+    place with `region_pop`) to the adjacent region with the lowest pop. Leftovers go out in BFS
+    order from the assigned nodes, so one without an assigned neighbor yet goes to a region
+    next to it by the time it's reached (that of its nearest assigned node). A leftover
+    component with no path to any region (an island) starts from one node given to the owner
+    of its power-diagram cell (`cells`), else of the nearest assigned node by centroid, else
+    the smallest region. Returns the number of leftovers.
+    """
+    ptr, idx, pop = graph.csr_lists()
+    leftovers = [i for i, a in enumerate(assignment) if a == UNASSIGNED]
+    # assigned-node mask for the nearest-centroid island fallback, kept up to date below
+    owned = np.asarray(assignment) != UNASSIGNED if cells is None and graph.xy is not None else None
+    queue = deque(leftovers)
+    while True:
+        while queue:
+            n = queue.popleft()
+            if assignment[n] != UNASSIGNED:
+                continue
+            options = {assignment[m] for m in idx[ptr[n]:ptr[n+1]] if assignment[m] != UNASSIGNED}
+            if not options:
+                continue  # queued again by whichever neighbor gets assigned first
+            # choose region with smallest pop
+            r = min(sorted(options), key=lambda r_: region_pop[r_])
+            assignment[n] = r
+            region_pop[r] += pop[n]
+            if owned is not None:
+                owned[n] = True
+            queue.extend(m for m in idx[ptr[n]:ptr[n+1]] if assignment[m] == UNASSIGNED)
+        rest = [n for n in leftovers if assignment[n] == UNASSIGNED]
+        if not rest:
+            return len(leftovers)
+        n = rest[0]
+        if cells is not None:
+            r = int(cells[n])
+        elif owned is not None:
+            near = np.flatnonzero(owned)
+            r = assignment[near[np.argmin(((graph.xy[near] - graph.xy[n])**2).sum(axis=1))]]
+        else:
+            r = min(range(len(region_pop)), key=lambda r_: region_pop[r_])
+        assignment[n] = r
+        region_pop[r] += pop[n]
+        if owned is not None:
+            owned[n] = True
+        queue.extend(m for m in idx[ptr[n]:ptr[n+1]] if assignment[m] == UNASSIGNED)
+
+def grow_regions(graph: BlockGraph, k: int, target_pop: float, tol: float, rng=None,
+                 stats: dict | None = None, seed_strategy: str = "random"):
+    """
+    Region assignment via BFS expansion from seeds until near target_pop.
+    Each region keeps its frontier as a max-heap keyed by (pop desc, node id) that is only
+    extended with the neighbors of nodes it claims; entries claimed by another region are
+    dropped lazily when popped. Each claim therefore costs O(deg log frontier) instead of a
+    rescan of every node.
+    Returns (assignment int16[n] with district ids 0..k-1, region_pop list).
+    If `stats` is given it is filled with pass/claim counts, the largest frontier seen and the
+    number of leftover nodes handed out by the repair pass.
+    `seed_strategy` picks how seeds are placed (see seed_nodes). With "balanced" each region
+    first only grows inside its own power-diagram cell, which is already close to target
+    population, and then continues unrestricted for whatever the cells left over.
+    """
+    seeds, cells = _place_seeds(graph, k, rng, seed_strategy)
+    cell = cells.tolist() if cells is not None else None
+    ptr, idx, pop = graph.csr_lists()
+    lo, hi = target_pop*(1-tol), target_pop*(1+tol)
+
+    assignment = [UNASSIGNED]*graph.n
     region_pop = [0]*k
-    frontiers = [set([s]) for s in seeds]
+    heaps = [[] for _ in range(k)]
+    queued = [set() for _ in range(k)]  # nodes ever pushed onto region r's frontier
+
+    def extend(r, node, out):
+        q = queued[r]
+        for m in idx[ptr[node]:ptr[node+1]]:
+            if assignment[m] == UNASSIGNED and m not in q and (cell is None or cell[m] == r):
+                q.add(m)
+                out.append((-pop[m], m))
+
     for r, s in enumerate(seeds):
         assignment[s] = r
-        region_pop[r] += geoid_to_pop[s]
+        region_pop[r] += pop[s]
+    for r, s in enumerate(seeds):
+        extend(r, s, heaps[r])
+        heapq.heapify(heaps[r])
 
-    # Pre-build neighbor order for speed
-    nbrs = {n: list(G.neighbors(n)) for n in G.nodes()}
+    passes = claimed = max_frontier = 0
 
-    changed = True
-    while changed:
-        changed = False
-        for r in range(k):
-            # expand until within tolerance
-            if region_pop[r] >= target_pop*(1-tol):
-                continue
-            # frontier = unassigned neighbors of any assigned node in region r
-            frontier = set()
-            for n in list(assignment):
-                if assignment[n]==r:
-                    for m in nbrs[n]:
-                        if assignment[m] is None:
-                            frontier.add(m)
-            # pick the heaviest node first (greedy) to converge faster
-            frontier = sorted(frontier, key=lambda n: geoid_to_pop[n], reverse=True)
-            for cand in frontier:
-                if assignment[cand] is None and region_pop[r] + geoid_to_pop[cand] <= target_pop*(1+tol):
-                    assignment[cand] = r
-                    region_pop[r] += geoid_to_pop[cand]
-                    changed = True
-                    if region_pop[r] >= target_pop*(1 - tol):
-                        break
-
-    # Repair pass: assign any leftover nodes to adjacent region with lowest pop that keeps contiguity
-    leftovers = [n for n,a in assignment.items() if a is None]
-    for n in leftovers:
-        options = [assignment[m] for m in nbrs[n] if assignment[m] is not None]
-        if not options:
-            options = list(range(k))
-        # choose region with smallest pop
-        r = min(set(options), key=lambda r_: region_pop[r_])
-        assignment[n] = r
-        region_pop[r] += geoid_to_pop[n]
+    def grow():
+        nonlocal passes, claimed, max_frontier
+        changed = True
+        while changed:
+            changed = False
+            passes += 1
+            for r in range(k):
+                # expand until within tolerance
+                if region_pop[r] >= lo:
+                    continue
+                # pop the heaviest frontier node first (greedy) to converge faster. Nodes claimed
+                # this pass only open their neighbors for the next round, like a BFS layer.
+                heap, opened = heaps[r], []
+                max_frontier = max(max_frontier, len(heap))
+                while heap:
+                    neg_p, cand = heapq.heappop(heap)
+                    if assignment[cand] != UNASSIGNED:
+                        continue  # claimed since it was queued
+                    if region_pop[r] - neg_p <= hi:
+                        assignment[cand] = r
+                        region_pop[r] -= neg_p
+                        claimed += 1
+                        changed = True
+                        extend(r, cand, opened)
+                        if region_pop[r] >= lo:
+                            break
+                    # else: region_pop only grows, so a node that doesn't fit now never will
+                for item in opened:
+                    heapq.heappush(heap, item)
+
+    grow()
+    if cell is not None:
+        # lift the cell restriction: reopen every region's border and grow into the rest
+        cell = None
+        for n, r in enumerate(assignment):
+            if r != UNASSIGNED:
+                extend(r, n, heaps[r])
+        for h in heaps:
+            heapq.heapify(h)
+        grow()
+
+    leftovers = assign_leftovers(graph, assignment, region_pop, cells)
 
-    return assignment, region_pop
+    if stats is not None:
+        stats.update({"seed_strategy": seed_strategy, "passes": passes, "claimed": claimed, "max_frontier": max_frontier,
+                      "leftovers_repaired": leftovers})
+    return np.array(assignment, dtype=ASSIGNMENT_DTYPE), region_pop
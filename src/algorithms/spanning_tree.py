@@ -0,0 +1,129 @@
+# src/algorithms/spanning_tree.py
+"""
+Random spanning trees and balanced tree cuts on regions of a BlockGraph.
+
+Shared by the ReCom chain (recom.py) and the recombination shifts of the repair step
+(repair_swap.py): a region's local edge list is gathered from the CSR arrays, a random
+spanning tree is drawn by Kruskal over a random edge order and cut on an edge whose sides
+meet a population window.
+"""
+import numpy as np
+
+from src.algorithms.graph import BlockGraph, gather_neighbors
+
+
+def random_spanning_tree(n: int, eu, ev, rng):
+    """
+    Random spanning tree of a local graph with n nodes and edges (eu[i], ev[i]).
+    Kruskal over a random edge order, i.e. the MST under iid uniform weights.
+    Returns (tu, tv) lists, or None if the graph is disconnected.
+    """
+    parent = list(range(n))
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+    eu, ev = eu.tolist(), ev.tolist()
+    tu, tv = [], []
+    for e in rng.permutation(len(eu)).tolist():
+        ru, rv = find(eu[e]), find(ev[e])
+        if ru != rv:
+            parent[ru] = rv
+            tu.append(eu[e]); tv.append(ev[e])
+            if len(tu) == n - 1:
+                break
+    if len(tu) != n - 1:
+        return None
+    return tu, tv
+
+
+def balanced_cuts(n: int, tu, tv, pop, lo: float, hi: float, one_side: bool = False):
+    """
+    Root the tree at 0 and find every tree edge (v, parent[v]) whose removal leaves both
+    sides (with one_side: the subtree side, away from 0) with population in [lo, hi].
+    Returns (preorder, pos, size, candidates): the subtree of v is preorder[pos[v]:pos[v]+size[v]].
+    """
+    adj = [[] for _ in range(n)]
+    for u, v in zip(tu, tv):
+        adj[u].append(v); adj[v].append(u)
+    parent = [-1]*n
+    preorder = []
+    stack = [0]
+    parent[0] = 0
+    while stack:
+        u = stack.pop()
+        preorder.append(u)
+        for v in adj[u]:
+            if parent[v] == -1:
+                parent[v] = u
+                stack.append(v)
+    parent[0] = -1
+
+    sub_pop = pop.astype(np.int64).tolist()
+    size = [1]*n
+    for u in reversed(preorder[1:]):
+        p = parent[u]
+        sub_pop[p] += sub_pop[u]
+        size[p] += size[u]
+
+    total = sub_pop[0]
+    sub = np.asarray(sub_pop)
+    ok = (sub >= lo) & (sub <= hi)
+    if not one_side:
+        ok &= (total - sub >= lo) & (total - sub <= hi)
+    ok[0] = False
+    preorder = np.asarray(preorder)
+    pos = np.empty(n, dtype=np.int64)
+    pos[preorder] = np.arange(n)
+    return preorder, pos, np.asarray(size), np.flatnonzero(ok)
+
+
+def split_region(graph: BlockGraph, nodes, local, lo: float, hi: float, rng, max_attempts=50,
+                 one_side: bool = False, want: float | None = None):
+    """
+    Balanced two-way split of the region `nodes` (node ids) along a random spanning tree:
+    bool mask over `nodes` of one side, both sides with population in [lo, hi], or None if
+    none of max_attempts trees has such an edge (or the region is not connected). With
+    one_side only the masked side has to be in [lo, hi], and it never contains nodes[0]; then
+    `want` asks for the cut that leaves it nearest to `want` people rather than a random one
+    (the best over the trees, stopping at the first within an eighth of [lo, hi] of it).
+    `local` is a reusable int32[n] buffer filled with -1.
+    """
+    m = len(nodes)
+    local[nodes] = np.arange(m, dtype=np.int32)
+    try:
+        nbrs = gather_neighbors(graph.indptr, graph.indices, nodes)
+        eu = np.repeat(np.arange(m, dtype=np.int32), graph.indptr[nodes + 1] - graph.indptr[nodes])
+        ev = local[nbrs]
+        keep = ev > eu  # drops nodes outside the pair (-1) and the reverse copy of each edge
+        eu, ev = eu[keep], ev[keep]
+    finally:
+        local[nodes] = -1
+
+    pop = graph.pop[nodes]
+    best, best_err = None, np.inf
+    for _ in range(max_attempts):
+        tree = random_spanning_tree(m, eu, ev, rng)
+        if tree is None:
+            return None  # not connected; nothing to split
+        preorder, pos, size, cands = balanced_cuts(m, tree[0], tree[1], pop, lo, hi, one_side)
+        if not len(cands):
+            continue
+        if one_side and want is not None:
+            cum = np.concatenate(([0], np.cumsum(pop[preorder], dtype=np.int64)))
+            err = np.abs(cum[pos[cands] + size[cands]] - cum[pos[cands]] - want)
+            i = int(np.argmin(err))
+            if err[i] < best_err:
+                best, best_err = preorder[pos[cands[i]]:pos[cands[i]] + size[cands[i]]], err[i]
+            if best_err > (hi - lo) / 8:
+                continue
+        else:
+            v = cands[rng.integers(len(cands))]
+            best = preorder[pos[v]:pos[v] + size[v]]
+        break
+    if best is None:
+        return None
+    side = np.zeros(m, dtype=bool)
+    side[best] = True
+    return side
@@ -0,0 +1,85 @@
+# src/benchmarks/grow_scaling.py
+"""
+Scaling benchmark for grow_regions: incremental heap frontier vs. the old per-round rescan.
+
+    python -m src.benchmarks.grow_scaling --sides 100 200 400 --k 6 26 38
+
+Runs on synthetic grid states (see synthetic.py; no Census data needed), checks that both
+engines produce the same assignment for the same seed and prints wall time per (n, k).
+"""
+import argparse
+import time
+import numpy as np
+from src.algorithms.graph import BlockGraph, gather_neighbors, UNASSIGNED, ASSIGNMENT_DTYPE
+from src.algorithms.seed_grow import assign_leftovers, grow_regions, seed_nodes
+from src.benchmarks.synthetic import synthetic_graph
+
+
+def grow_regions_rescan(graph: BlockGraph, k: int, target_pop: float, tol: float, rng=None):
+    """Reference engine: rebuilds each region's frontier from a full scan every round."""
+    seeds = seed_nodes(graph, k, rng)
+    pop = graph.pop
+    indptr, indices = graph.indptr, graph.indices
+    lo, hi = target_pop*(1-tol), target_pop*(1+tol)
+
+    assignment = np.full(graph.n, UNASSIGNED, dtype=ASSIGNMENT_DTYPE)
+    region_pop = [0]*k
+    for r, s in enumerate(seeds):
+        assignment[s] = r
+        region_pop[r] += int(pop[s])
+
+    changed = True
+    while changed:
+        changed = False
+        for r in range(k):
+            if region_pop[r] >= lo:
+                continue
+            frontier = gather_neighbors(indptr, indices, np.flatnonzero(assignment == r))
+            frontier = np.unique(frontier[assignment[frontier] == UNASSIGNED])
+            frontier = frontier[np.lexsort((frontier, -pop[frontier]))]
+            for cand, p in zip(frontier.tolist(), pop[frontier].tolist()):
+                if region_pop[r] + p <= hi:
+                    assignment[cand] = r
+                    region_pop[r] += p
+                    changed = True
+                    if region_pop[r] >= lo:
+                        break
+
+    # same leftover pass as grow_regions, so the two engines stay comparable
+    assignment = assignment.tolist()
+    assign_leftovers(graph, assignment, region_pop)
+    return np.array(assignment, dtype=ASSIGNMENT_DTYPE), region_pop
+
+
+def _time(fn, *args, **kw):
+    t0 = time.perf_counter()
+    out = fn(*args, **kw)
+    return time.perf_counter() - t0, out
+
+
+def main():
+    p = argparse.ArgumentParser(description="grow_regions scaling: heap frontier vs rescan")
+    p.add_argument("--sides", type=int, nargs="+", default=[100, 200, 300])
+    p.add_argument("--k", type=int, nargs="+", default=[6, 26, 38])
+    p.add_argument("--tol", type=float, default=0.005)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--max-rescan-n", type=int, default=100_000,
+                   help="Skip the rescan engine above this many nodes (it is O(k*N*rounds))")
+    args = p.parse_args()
+
+    print(f"{'n':>9} {'k':>3} {'heap_s':>9} {'rescan_s':>9} {'speedup':>8}  same")
+    for side in args.sides:
+        graph = synthetic_graph(side * side, "grid", args.seed)
+        for k in args.k:
+            target = graph.pop.sum() / k
+            t_heap, (a_heap, _) = _time(grow_regions, graph, k, target, args.tol, rng=args.seed)
+            if graph.n <= args.max_rescan_n:
+                t_scan, (a_scan, _) = _time(grow_regions_rescan, graph, k, target, args.tol, rng=args.seed)
+                same = "yes" if np.array_equal(a_heap, a_scan) else "NO"
+                print(f"{graph.n:>9} {k:>3} {t_heap:>9.3f} {t_scan:>9.3f} {t_scan/t_heap:>7.1f}x  {same}")
+            else:
+                print(f"{graph.n:>9} {k:>3} {t_heap:>9.3f} {'-':>9} {'-':>8}  -")
+
+
+if __name__ == "__main__":
+    main()
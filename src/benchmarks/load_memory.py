@@ -0,0 +1,115 @@
+# src/benchmarks/load_memory.py
+"""
+Peak-memory / wall-time comparison of block loading + population join.
+
+    python -m src.benchmarks.load_memory --blocks 670000     # TX-sized synthetic input
+
+Writes a synthetic tabblock20-like shapefile (all the usual TIGER attribute columns) and a PL94
+CSV without a geoid column, then runs each loader variant in a fresh subprocess and reports its
+peak RSS (ru_maxrss) and wall time. "legacy" is the original read-everything / row-wise-join
+implementation, kept here only for comparison.
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+VARIANTS = ("legacy", "pruned", "pruned-int64", "no-geometry")
+
+
+def write_synthetic(out_dir: Path, n_blocks: int, seed: int = 0):
+    """synthetic_state grid blocks with TIGER-style attributes + a state/county/tract/block/pop CSV."""
+    import geopandas as gpd
+    import shapely
+    from src.benchmarks.synthetic import synthetic_state, write_pl_csv
+    out_dir.mkdir(parents=True, exist_ok=True)
+    shp, csv = out_dir / "tl_synth_tabblock20.shp", out_dir / "synthetic_pl94_blocks.csv"
+    if shp.exists() and csv.exists():
+        return shp, csv
+    blocks, pl = synthetic_state(n_blocks, "grid", seed, state_fips="48")
+    rng = np.random.default_rng(seed)
+    xy = shapely.get_coordinates(shapely.centroid(blocks.geometry.values))
+    gdf = gpd.GeoDataFrame({
+        "STATEFP20": "48", "COUNTYFP20": pl["county"], "TRACTCE20": pl["tract"], "BLOCKCE20": pl["block"],
+        "GEOID20": blocks["geoid"], "NAME20": "Block " + pl["block"], "MTFCC20": "G5040",
+        "UR20": "U", "UACE20": "", "UATYPE20": "", "FUNCSTAT20": "S",
+        "ALAND20": rng.integers(0, 10**6, n_blocks), "AWATER20": 0,
+        "INTPTLAT20": [f"+{v:.7f}" for v in xy[:, 1]], "INTPTLON20": [f"-{v:.7f}" for v in xy[:, 0]],
+        "HOUSING20": rng.integers(0, 200, n_blocks),
+    }, geometry=blocks.geometry.values, crs="EPSG:4269")
+    gdf.to_file(shp)
+    return shp, write_pl_csv(pl, out_dir)
+
+
+def _legacy(shp, csv):
+    import geopandas as gpd
+    import pandas as pd
+    gdf = gpd.read_file(shp)
+    id_col = next(c for c in gdf.columns if c.upper().startswith("GEOID"))
+    blocks = gdf[[id_col, "geometry"]].rename(columns={id_col: "geoid"})
+    pop = pd.read_csv(csv, dtype=str)
+    pop["geoid"] = pop[["state", "county", "tract", "block"]].astype(str).agg("".join, axis=1)
+    pop["pop"] = pd.to_numeric(pop["pop"], errors="coerce").fillna(0).astype(int)
+    out = blocks.merge(pop[["geoid", "pop"]], on="geoid", how="left")
+    out["pop"] = out["pop"].fillna(0).astype(int)
+    return out
+
+
+def _measure(variant, shp, csv):
+    from src.processing.build_block_graph import load_blocks, attach_population
+    t0 = time.perf_counter()
+    if variant == "legacy":
+        out = _legacy(shp, csv)
+    elif variant == "pruned":
+        out = attach_population(load_blocks(shp), csv)
+    elif variant == "pruned-int64":
+        out = attach_population(load_blocks(shp, geoid_dtype="int64"), csv)
+    else:
+        out = attach_population(load_blocks(shp, geometry=False, geoid_dtype="int64"), csv)
+    seconds = time.perf_counter() - t0
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+    print(json.dumps({"variant": variant, "rows": len(out), "pop": int(out["pop"].sum()),
+                      "seconds": round(seconds, 2), "peak_rss_mb": round(peak_mb, 1)}))
+
+
+def main():
+    p = argparse.ArgumentParser(description="Block loader peak-memory comparison")
+    p.add_argument("--blocks", type=int, default=670_000, help="Synthetic block count (TX ≈ 670k)")
+    p.add_argument("--dir", default="data/bench/load_memory", help="Where to write the synthetic input")
+    p.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=VARIANTS)
+    p.add_argument("--_run", help=argparse.SUPPRESS)
+    args = p.parse_args()
+
+    out_dir = Path(args.dir) / str(args.blocks)
+    if args._run:
+        shp, csv = write_synthetic(out_dir, args.blocks)
+        if args._run != "write":
+            _measure(args._run, shp, csv)
+        return
+
+    # everything heavy runs in child processes: Linux carries ru_maxrss across fork/exec, so a
+    # parent that had built the input itself would set the floor for every measurement
+    print(f"[bench] writing synthetic input ({args.blocks:,} blocks) to {out_dir} …")
+    subprocess.run([sys.executable, "-m", "src.benchmarks.load_memory", "--blocks", str(args.blocks),
+                    "--dir", args.dir, "--_run", "write"], check=True)
+    results = []
+    for variant in args.variants:
+        cmd = [sys.executable, "-m", "src.benchmarks.load_memory", "--blocks", str(args.blocks),
+               "--dir", args.dir, "--_run", variant]
+        res = json.loads(subprocess.run(cmd, check=True, capture_output=True, text=True).stdout.strip().splitlines()[-1])
+        results.append(res)
+        print(f"{res['variant']:>13}: {res['peak_rss_mb']:>8.1f} MB peak, {res['seconds']:>6.2f}s, pop={res['pop']:,}")
+    base = next((r for r in results if r["variant"] == "legacy"), None)
+    if base:
+        for r in results:
+            if r is not base:
+                print(f"{r['variant']:>13}: {r['peak_rss_mb'] / base['peak_rss_mb']:.2f}x memory, "
+                      f"{base['seconds'] / max(r['seconds'], 1e-9):.1f}x faster than legacy")
+
+
+if __name__ == "__main__":
+    main()
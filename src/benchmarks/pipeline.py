@@ -0,0 +1,162 @@
+# src/benchmarks/pipeline.py
+"""
+Stage-by-stage pipeline benchmark on synthetic states (no Census downloads).
+
+    python -m src.benchmarks.pipeline --blocks 10000 100000 --tess grid voronoi --k 6 26 38
+    python -m src.benchmarks.pipeline --blocks 10000 --compare data/bench/pipeline/base.json
+
+For every (tessellation, block count) a synthetic state is built once (see synthetic.py) and
+the shared stages are timed: population join (attach_population on a PL94-style CSV), rook
+adjacency and the CSR graph build. Then for each k (6/26/38 ~ OR/NY/TX) grow_regions,
+border_swaps, dissolve and score_plan are timed. Results go to a JSON file; --compare checks
+them (or an existing --current file) against a baseline and exits non-zero on regressions.
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from src.algorithms.graph import BlockGraph
+from src.algorithms.seed_grow import grow_regions
+from src.algorithms.repair_swap import border_swaps
+from src.algorithms.scoring import score_plan
+from src.benchmarks.synthetic import TESSELLATIONS, synthetic_state, write_pl_csv
+from src.processing.build_block_graph import attach_population, rook_adjacency
+from src.processing.plan_io import dissolve_districts
+from src.processing.run_report import peak_rss_mb
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_OUT = REPO_ROOT / "data" / "bench" / "pipeline"
+
+
+def _timed(results, key: dict, fn, *args, repeat=1, **kw):
+    """Run fn `repeat` times, record the best wall time under `key`, return the last output."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(*args, **kw)
+        best = min(best, time.perf_counter() - t0)
+    results.append({**key, "seconds": round(best, 4)})
+    print(f"[bench] {key['tessellation']:>8} {key['blocks']:>8} k={key.get('k', '-'):>3} "
+          f"{key['stage']:<11} {best:9.3f}s")
+    return out
+
+
+def run_suite(sizes, tessellations, ks, tol=0.005, seed=0, max_swaps=20000, repeat=1, workdir=None):
+    results = []
+    for tess in tessellations:
+        for n in sizes:
+            base = {"tessellation": tess, "blocks": n}
+            blocks, pl = _timed(results, {**base, "stage": "synthesize"}, synthetic_state, n, tess, seed)
+            with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+                csv = write_pl_csv(pl, Path(tmp))
+                blocks = _timed(results, {**base, "stage": "population"}, attach_population,
+                                blocks, csv, repeat=repeat)
+            src, dst, shared_len = _timed(results, {**base, "stage": "adjacency"}, rook_adjacency,
+                                          blocks.geometry.values, repeat=repeat)
+            graph = _timed(results, {**base, "stage": "graph"}, BlockGraph.from_edges, len(blocks), src, dst,
+                           blocks["pop"].to_numpy(), geoids=blocks["geoid"].to_numpy(), shared_len=shared_len,
+                           repeat=repeat)
+            total = int(graph.pop.sum())
+            for k in ks:
+                key = {**base, "k": k}
+                target = total / k
+                grow_stats, swap_stats = {}, {}
+                # grow/repair change with the rng and work in place, so they are always run once
+                assignment, _ = _timed(results, {**key, "stage": "grow"}, grow_regions,
+                                       graph, k, target, tol, rng=seed, stats=grow_stats)
+                _timed(results, {**key, "stage": "repair"}, border_swaps, graph, assignment, target, tol,
+                       max_iters=max_swaps, stats=swap_stats)
+                results[-2].update(grow_stats)
+                results[-1].update({name: swap_stats[name] for name in ("moves", "iterations", "max_dev_after")})
+
+                districts = _timed(results, {**key, "stage": "dissolve"}, dissolve_districts,
+                                   blocks, assignment, repeat=repeat)
+                _timed(results, {**key, "stage": "score"}, score_plan, districts, target, repeat=repeat)
+    return results
+
+
+def _stage_key(r):
+    return (r["tessellation"], r["blocks"], r.get("k"), r["stage"])
+
+
+def compare(baseline: dict, current: dict, threshold=0.2, min_seconds=0.05):
+    """
+    Match stages by (tessellation, blocks, k, stage). A stage regresses when it is more than
+    `threshold` slower relative to the baseline and at least `min_seconds` slower in absolute
+    terms (so noise on tiny stages doesn't trip it). Returns (rows, regressions).
+    """
+    base = {_stage_key(r): r["seconds"] for r in baseline["results"]}
+    rows, regressions = [], []
+    for r in current["results"]:
+        key = _stage_key(r)
+        if key not in base or r["stage"] == "synthesize":
+            continue
+        b, c = base[key], r["seconds"]
+        ratio = c / b if b > 0 else float("inf")
+        regressed = ratio > 1 + threshold and c - b >= min_seconds
+        rows.append((key, b, c, ratio, regressed))
+        if regressed:
+            regressions.append(key)
+    return rows, regressions
+
+
+def _print_compare(rows):
+    print(f"{'tess':>8} {'blocks':>8} {'k':>3} {'stage':<11} {'base_s':>9} {'cur_s':>9} {'ratio':>7}")
+    for (tess, n, k, stage), b, c, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{tess:>8} {n:>8} {k if k is not None else '-':>3} {stage:<11} {b:9.3f} {c:9.3f} {ratio:6.2f}x{flag}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Synthetic-state pipeline benchmark")
+    p.add_argument("--blocks", type=int, nargs="+", default=[10_000, 100_000],
+                   help="Block counts (10k .. 1M)")
+    p.add_argument("--tess", nargs="+", default=list(TESSELLATIONS), choices=TESSELLATIONS)
+    p.add_argument("--k", type=int, nargs="+", default=[6, 26, 38], help="District counts (OR/NY/TX)")
+    p.add_argument("--tol", type=float, default=0.005)
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--max-swaps", type=int, default=20000)
+    p.add_argument("--repeat", type=int, default=1, help="Best-of-N for the deterministic stages")
+    p.add_argument("--out", help="Results JSON (default: data/bench/pipeline/<timestamp>.json)")
+    p.add_argument("--compare", metavar="BASELINE", help="Compare against this results JSON")
+    p.add_argument("--current", help="With --compare: compare this existing results JSON instead of running")
+    p.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown that counts as a regression")
+    p.add_argument("--min-seconds", type=float, default=0.05, help="Ignore slowdowns smaller than this")
+    args = p.parse_args()
+
+    if args.current:
+        if not args.compare:
+            p.error("--current needs --compare")
+        current = json.loads(Path(args.current).read_text())
+    else:
+        t0 = time.perf_counter()
+        results = run_suite(args.blocks, args.tess, args.k, tol=args.tol, seed=args.seed,
+                            max_swaps=args.max_swaps, repeat=args.repeat)
+        current = {
+            "meta": {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                     "platform": platform.platform(), "seconds": round(time.perf_counter() - t0, 2),
+                     "peak_rss_mb": peak_rss_mb(), **{a: getattr(args, a) for a in
+                                                      ("blocks", "tess", "k", "tol", "seed", "max_swaps", "repeat")}},
+            "results": results,
+        }
+        out = Path(args.out) if args.out else DEFAULT_OUT / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps(current, indent=2))
+        print(f"[bench] wrote {out}")
+
+    if args.compare:
+        rows, regressions = compare(json.loads(Path(args.compare).read_text()), current,
+                                    threshold=args.threshold, min_seconds=args.min_seconds)
+        _print_compare(rows)
+        if regressions:
+            print(f"[bench] {len(regressions)} stage(s) regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("[bench] no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# src/benchmarks/recom_scaling.py
+"""
+ReCom step cost: incremental ChainState vs. the old per-step full scans.
+
+    python -m src.benchmarks.recom_scaling --sides 300 700 --k 6 38 --steps 200
+
+Runs on synthetic grid graphs (block-scale at side 700 ≈ 490k nodes) from a striped plan
+(row-major population prefix, so every district is contiguous and within tolerance) and
+prints the mean wall time per step of each engine. The reference rescans every CSR entry for
+cut edges and every node for the merged region on each step, like recom_step used to.
+"""
+import argparse
+import time
+import numpy as np
+from src.algorithms.graph import ASSIGNMENT_DTYPE
+from src.algorithms.recom import ChainState, recom_step
+from src.algorithms.spanning_tree import split_region
+from src.benchmarks.synthetic import synthetic_graph
+
+
+def striped_plan(graph, k: int):
+    """District i = the i-th population k-tile of the nodes in id (row-major) order."""
+    cum = np.cumsum(graph.pop)
+    ends = np.searchsorted(cum, np.arange(1, k) * cum[-1] / k, side="right")
+    return np.searchsorted(ends, np.arange(graph.n), side="right").astype(ASSIGNMENT_DTYPE)
+
+
+def recom_step_rescan(graph, assignment, rows, local, target, tol, rng, max_attempts=50) -> bool:
+    """Reference step: O(E) cut-edge scan and O(N) membership scan every time."""
+    cut = np.flatnonzero(assignment[rows] != assignment[graph.indices])
+    if len(cut) == 0:
+        return False
+    e = cut[rng.integers(len(cut))]
+    a, b = assignment[rows[e]], assignment[graph.indices[e]]
+    nodes = np.flatnonzero((assignment == a) | (assignment == b))
+    side = split_region(graph, nodes, local, target*(1-tol), target*(1+tol), rng, max_attempts)
+    if side is None:
+        return False
+    assignment[nodes] = np.where(side, a, b)
+    return True
+
+
+def main():
+    p = argparse.ArgumentParser(description="ReCom step cost: incremental state vs rescan")
+    p.add_argument("--sides", type=int, nargs="+", default=[300, 700])
+    p.add_argument("--k", type=int, nargs="+", default=[6, 38])
+    p.add_argument("--tol", type=float, default=0.05)
+    p.add_argument("--steps", type=int, default=200)
+    p.add_argument("--seed", type=int, default=0)
+    args = p.parse_args()
+
+    print(f"{'n':>9} {'k':>3} {'rescan_ms':>10} {'incr_ms':>8} {'speedup':>8} {'accepted':>9}")
+    for side in args.sides:
+        graph = synthetic_graph(side * side, "grid", args.seed)
+        local = np.full(graph.n, -1, dtype=np.int32)
+        for k in args.k:
+            target = graph.pop.sum() / k
+            start = striped_plan(graph, k)
+
+            rng, assignment, rows = np.random.default_rng(args.seed), start.copy(), graph.edge_rows()
+            t0 = time.perf_counter()
+            for _ in range(args.steps):
+                recom_step_rescan(graph, assignment, rows, local, target, args.tol, rng)
+            t_scan = (time.perf_counter() - t0) / args.steps
+
+            rng, state, accepted = np.random.default_rng(args.seed), ChainState(graph, start.copy()), 0
+            t0 = time.perf_counter()
+            for _ in range(args.steps):
+                accepted += recom_step(graph, state, local, target, args.tol, rng)
+            t_incr = (time.perf_counter() - t0) / args.steps
+            print(f"{graph.n:>9} {k:>3} {t_scan*1e3:>10.1f} {t_incr*1e3:>8.1f} {t_scan/t_incr:>7.1f}x "
+                  f"{accepted:>5}/{args.steps}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# src/benchmarks/seed_strategies.py
+"""
+Seed placement strategies compared on growth leftovers and repair work.
+
+    python -m src.benchmarks.seed_strategies --blocks 50000 --k 6 26 38 --runs 5
+
+On a synthetic state (see synthetic.py) every strategy in seed_grow.SEED_STRATEGIES runs
+grow_regions + border_swaps for the same rng seeds; the table shows medians over the runs of
+the leftover nodes the greedy pass had to hand out, the max deviation straight after growth,
+repair iterations / seconds and how many runs ended within tolerance.
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+import numpy as np
+
+from src.algorithms.graph import BlockGraph
+from src.algorithms.seed_grow import SEED_STRATEGIES, grow_regions
+from src.algorithms.repair_swap import border_swaps
+from src.benchmarks.synthetic import TESSELLATIONS, synthetic_graph
+
+
+def compare_strategies(graph: BlockGraph, k: int, tol: float, runs: int, strategies=SEED_STRATEGIES,
+                       max_swaps: int = 20000) -> list[dict]:
+    target = graph.pop.sum() / k
+    rows = []
+    for strategy in strategies:
+        for run in range(runs):
+            grow_stats, swap_stats = {}, {}
+            t0 = time.perf_counter()
+            assignment, region_pop = grow_regions(graph, k, target, tol, rng=run, stats=grow_stats,
+                                                  seed_strategy=strategy)
+            grow_s = time.perf_counter() - t0
+            border_swaps(graph, assignment, target, tol, max_iters=max_swaps, stats=swap_stats)
+            rows.append({
+                "strategy": strategy, "k": k, "run": run, "grow_seconds": grow_s,
+                "leftovers": grow_stats["leftovers_repaired"],
+                "grow_max_dev": float(np.max(np.abs(np.asarray(region_pop) - target)) / target),
+                "repair_iterations": swap_stats["iterations"], "repair_seconds": swap_stats["seconds"],
+                "max_dev_after": swap_stats["max_dev_after"], "within_tol": swap_stats["within_tol"],
+            })
+    return rows
+
+
+def main():
+    p = argparse.ArgumentParser(description="Seed strategy comparison on a synthetic state")
+    p.add_argument("--blocks", type=int, default=50_000)
+    p.add_argument("--tess", default="voronoi", choices=TESSELLATIONS)
+    p.add_argument("--k", type=int, nargs="+", default=[6, 26, 38])
+    p.add_argument("--tol", type=float, default=0.005)
+    p.add_argument("--runs", type=int, default=5, help="rng seeds per strategy")
+    p.add_argument("--strategies", nargs="+", default=list(SEED_STRATEGIES), choices=SEED_STRATEGIES)
+    p.add_argument("--max-swaps", type=int, default=20000)
+    p.add_argument("--out", help="Optional JSON with every run")
+    args = p.parse_args()
+
+    graph = synthetic_graph(args.blocks, args.tess)
+    print(f"[bench] {args.tess} {graph.n:,} blocks, {graph.n_edges:,} edges")
+    print(f"{'k':>3} {'strategy':<9} {'leftovers':>9} {'grow_dev':>9} {'grow_s':>7} {'repair_it':>9} {'repair_s':>8} {'in_tol':>6}")
+    rows = []
+    for k in args.k:
+        res = compare_strategies(graph, k, args.tol, args.runs, args.strategies, args.max_swaps)
+        rows += res
+        for strategy in args.strategies:
+            r = [x for x in res if x["strategy"] == strategy]
+            med = lambda name: float(np.median([x[name] for x in r]))
+            print(f"{k:>3} {strategy:<9} {med('leftovers'):>9.0f} {med('grow_max_dev'):>9.3f} {med('grow_seconds'):>7.2f} "
+                  f"{med('repair_iterations'):>9.0f} {med('repair_seconds'):>8.2f} {sum(x['within_tol'] for x in r):>3}/{len(r)}")
+    if args.out:
+        Path(args.out).write_text(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
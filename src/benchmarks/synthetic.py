@@ -0,0 +1,127 @@
+# src/benchmarks/synthetic.py
+"""
+Synthetic states for offline benchmarking: block tessellations with GEOID-style ids and a
+skewed population, written in the same shape as the real inputs (a blocks GeoDataFrame with
+`geoid` + geometry and a PL94-style state/county/tract/block/pop CSV).
+
+Blocks live on a plane with roughly one block per unit area. The GEOID hierarchy is spatial and
+nested: block groups are 7x7-unit cells, tracts 2x2 block groups and counties 8x8 tracts, so
+county/tract/bg prefixes behave like the real ones for multilevel coarsening and county splits.
+synthetic_graph turns a synthetic state straight into a BlockGraph for the algorithm benchmarks.
+"""
+from pathlib import Path
+import numpy as np
+import pandas as pd
+import geopandas as gpd
+import shapely
+
+from src.algorithms.graph import BlockGraph
+from src.processing.build_block_graph import rook_adjacency
+
+TESSELLATIONS = ("grid", "voronoi")
+BG_SIDE = 7.0          # units; one block per unit^2, so ~49 blocks per block group
+TRACT_BGS = 2          # tract = 2x2 block groups (~200 blocks)
+COUNTY_TRACTS = 8      # county = 8x8 tracts (~12.5k blocks)
+
+
+def block_centers(n: int, tessellation: str, rng):
+    """(points, polygons) for n blocks on a sqrt(n) x sqrt(n) square."""
+    side = np.sqrt(n)
+    if tessellation == "grid":
+        cols = int(np.ceil(side))
+        i = np.arange(n)
+        x, y = (i % cols).astype(float), (i // cols).astype(float)
+        return np.column_stack([x + 0.5, y + 0.5]), shapely.box(x, y, x + 1, y + 1)
+    if tessellation == "voronoi":
+        xy = rng.uniform(0, side, size=(n, 2))
+        frame = shapely.box(0, 0, side, side)
+        cells = shapely.voronoi_polygons(shapely.multipoints(xy), extend_to=frame, ordered=True)
+        polys = shapely.intersection(shapely.get_parts(cells), frame)
+        return xy, polys
+    raise ValueError(f"Unknown tessellation {tessellation!r}; expected one of {TESSELLATIONS}")
+
+
+def grid_edges(n: int):
+    """Rook (src, dst) pairs, src < dst, of the row-major grid block_centers lays out for n blocks."""
+    cols = int(np.ceil(np.sqrt(n)))
+    i = np.arange(n)
+    right = i[(i % cols < cols - 1) & (i + 1 < n)]
+    up = i[i + cols < n]
+    src = np.concatenate([right, up])
+    dst = np.concatenate([right + 1, up + cols])
+    order = np.lexsort((dst, src))
+    return src[order].astype(np.int32), dst[order].astype(np.int32)
+
+
+def skewed_population(xy, rng, n_cities: int = 12):
+    """Lognormal base population scaled up around a few city centres; ~25% of blocks are empty."""
+    side = xy.max() if len(xy) else 1.0
+    centres = rng.uniform(0, side, size=(n_cities, 2))
+    sigma = side * rng.uniform(0.02, 0.08, n_cities)
+    weight = rng.pareto(1.5, n_cities) + 1
+    d2 = ((xy[:, None, :] - centres[None, :, :]) ** 2).sum(axis=2)
+    density = 1 + (weight * 20 * np.exp(-d2 / (2 * sigma**2))).sum(axis=1)
+    pop = rng.lognormal(1.5, 1.0, len(xy)) * density
+    pop[rng.random(len(xy)) < 0.25] = 0
+    return pop.astype(np.int64)
+
+
+def geoid_parts(xy, state_fips: str = "41"):
+    """(county, tract, block) code arrays from nested spatial cells around each block's point."""
+    bx, by = (xy[:, 0] // BG_SIDE).astype(np.int64), (xy[:, 1] // BG_SIDE).astype(np.int64)
+    tx, ty = bx // TRACT_BGS, by // TRACT_BGS
+    cx, cy = tx // COUNTY_TRACTS, ty // COUNTY_TRACTS
+    county_idx = cx * (cy.max() + 1) + cy
+    if county_idx.max() > 498:
+        raise ValueError("too many synthetic counties for 3-digit county codes")
+    bg = (bx % TRACT_BGS) * TRACT_BGS + (by % TRACT_BGS) + 1
+    # sequential block number within each block group
+    bg_key = (tx * 10_000 + ty) * 10 + bg
+    order = np.argsort(bg_key, kind="stable")
+    sorted_key = bg_key[order]
+    starts = np.r_[0, np.flatnonzero(np.diff(sorted_key)) + 1]
+    seq = np.empty(len(xy), dtype=np.int64)
+    seq[order] = np.arange(len(xy)) - np.repeat(starts, np.diff(np.r_[starts, len(xy)]))
+    county = np.char.zfill((county_idx * 2 + 1).astype(str), 3)
+    tract = np.char.add(np.char.zfill(tx.astype(str), 3), np.char.zfill(ty.astype(str), 3))
+    block = np.char.add(bg.astype(str), np.char.zfill(seq.astype(str), 3))
+    geoid = np.char.add(np.char.add(np.char.add(state_fips, county), tract), block)
+    return county, tract, block, geoid
+
+
+def synthetic_state(n: int, tessellation: str = "grid", seed: int = 0, state_fips: str = "41"):
+    """(blocks GeoDataFrame[geoid, geometry], PL94-style DataFrame[state, county, tract, block, pop])."""
+    rng = np.random.default_rng(seed)
+    xy, polys = block_centers(n, tessellation, rng)
+    county, tract, block, geoid = geoid_parts(xy, state_fips)
+    blocks = gpd.GeoDataFrame({"geoid": geoid.astype(object)}, geometry=polys)
+    pl = pd.DataFrame({"state": state_fips, "county": county, "tract": tract, "block": block,
+                       "pop": skewed_population(xy, rng)})
+    return blocks, pl
+
+
+def synthetic_graph(n: int, tessellation: str = "grid", seed: int = 0, state_fips: str = "41") -> BlockGraph:
+    """
+    BlockGraph of synthetic_state(n, tessellation, seed) with geoids, centroids and the shape
+    tables. Grid edges come from index arithmetic (unit shared lengths), Voronoi ones from
+    rook_adjacency.
+    """
+    blocks, pl = synthetic_state(n, tessellation, seed, state_fips)
+    geoms = blocks.geometry.values
+    if tessellation == "grid":
+        src, dst = grid_edges(n)
+        shared_len = np.ones(len(src))
+    else:
+        src, dst, shared_len = rook_adjacency(geoms)
+    return BlockGraph.from_edges(n, src, dst, pl["pop"].to_numpy(), geoids=blocks["geoid"].to_numpy(),
+                                 shared_len=shared_len, area=shapely.area(geoms),
+                                 perimeter=shapely.length(geoms),
+                                 xy=shapely.get_coordinates(shapely.centroid(geoms)))
+
+
+def write_pl_csv(pl: pd.DataFrame, out_dir: Path) -> Path:
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / "synthetic_pl94_blocks.csv"
+    pl.to_csv(path, index=False)
+    return path
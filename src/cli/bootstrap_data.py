@@ -11,15 +11,9 @@ from src.processing.fetch_census import (
     fetch_pl_block_pop_state
 )
 
-def main():
-    p = argparse.ArgumentParser(description="Bootstrap Census/TIGER data for a state.")
-    p.add_argument("--state", required=True, help="State postal (OR, NY, TX) or FIPS (41, 36, 48)")
-    p.add_argument("--blocks", action="store_true", help="Download tabblock20 and unzip")
-    p.add_argument("--pl", action="store_true", help="Fetch PL94-171 block population CSV")
-    p.add_argument("--cd", action="store_true", help="Download congressional districts (cd118) and unzip")
-    args = p.parse_args()
-
-    state = args.state.upper()
+def bootstrap_state(state: str, blocks=False, pl=False, cd=False, refresh=False, pl_workers=8):
+    """Download / fetch the requested inputs for one state into data/raw/<STATE>/."""
+    state = state.upper()
     fips = get_state_fips(state)
     if not fips:
         raise SystemExit(f"Unknown state: {state}")
@@ -34,20 +28,32 @@ def main():
     pl_dir.mkdir(parents=True, exist_ok=True)
     cd_dir.mkdir(parents=True, exist_ok=True)
 
-    if args.blocks:
+    if blocks:
         print(f"[+] Downloading tabblock20 for {state} ({fips})...")
-        download_tabblock20(fips, out_dir=blocks_dir)
+        download_tabblock20(fips, out_dir=blocks_dir, refresh=refresh)
 
-    if args.pl:
+    if pl:
         print(f"[+] Fetching PL94-171 block population via API for {state}...")
         counties = list_counties_in_state(fips)   # auto list (no hardcoding)
         out_csv = pl_dir / f"{state.lower()}_pl94_blocks.csv"
-        fetch_pl_block_pop_state(fips, counties, out_csv)
+        fetch_pl_block_pop_state(fips, counties, out_csv, workers=pl_workers)
 
-    if args.cd:
+    if cd:
         print(f"[+] Downloading 118th Congress districts (cd118) for {state}...")
-        download_cd118(fips, out_dir=cd_dir)
+        download_cd118(fips, out_dir=cd_dir, refresh=refresh)
+
+def main():
+    p = argparse.ArgumentParser(description="Bootstrap Census/TIGER data for a state.")
+    p.add_argument("--state", required=True, help="State postal (OR, NY, TX) or FIPS (41, 36, 48)")
+    p.add_argument("--blocks", action="store_true", help="Download tabblock20 and unzip")
+    p.add_argument("--pl", action="store_true", help="Fetch PL94-171 block population CSV")
+    p.add_argument("--cd", action="store_true", help="Download congressional districts (cd118) and unzip")
+    p.add_argument("--refresh", action="store_true", help="Re-check TIGER zips with the server (ETag/Last-Modified)")
+    p.add_argument("--pl-workers", type=int, default=8, help="Concurrent county requests for --pl")
+    args = p.parse_args()
 
+    bootstrap_state(args.state, blocks=args.blocks, pl=args.pl, cd=args.cd, refresh=args.refresh,
+                    pl_workers=args.pl_workers)
     print("[✓] Done.")
 
 if __name__ == "__main__":
@@ -1,95 +1,288 @@
 # src/cli/generate_plan.py
+from contextlib import nullcontext
 from pathlib import Path
 import argparse
-from src.processing.build_block_graph import load_blocks, attach_population, build_adjacency
-from src.algorithms.seed_grow import grow_regions
-import geopandas as gpd
-import yaml
+from src.processing.build_block_graph import load_blocks, attach_population, rook_adjacency, projected_geometry, shape_crs
+from src.processing import graph_cache
+from src.algorithms.graph import BlockGraph, ASSIGNMENT_DTYPE
+from src.algorithms.seed_grow import grow_regions, SEED_STRATEGIES
+from src.algorithms.ensemble import run_ensemble, write_ensemble
+from src.algorithms.multilevel import multilevel_partition
+from src.algorithms.objectives import build_objectives, load_coi_layers
+from src.processing.run_report import RunReport
+from src.processing.state_config import CONFIG_PATH, load_states, state_codes, state_fips
+from src.processing.plan_io import block_fingerprint, save_plan, load_plan, check_fingerprint, dissolve_districts, write_districts
+import numpy as np
+import shapely
 from src.algorithms.repair_swap import border_swaps
-import pickle
 
 REPO_ROOT = Path(__file__).resolve().parents[2]
-STATE_FIPS = {"OR":"41","NY":"36","TX":"48"}
 
-def run(state_code: str, blocks_path: Path, pl94_csv: Path, out_path: Path, configs_path=REPO_ROOT/"configs/states.yaml"):
-    print(f"[run] state={state_code}")
-    print(f"[run] blocks_path={blocks_path}")
-    print(f"[run] pl94_csv={pl94_csv}")
-    if not blocks_path.exists():
-        raise FileNotFoundError(f"Blocks shapefile not found: {blocks_path}")
-    if not pl94_csv.exists():
-        raise FileNotFoundError(f"PL94 CSV not found: {pl94_csv}")
+def default_inputs(st: str):
+    """Default (blocks shapefile, PL94 CSV) paths written by bootstrap_data for a state."""
+    fips = state_fips(st)
+    return (REPO_ROOT / f"data/raw/{st}/blocks/tl_2022_{fips}_tabblock20.shp",
+            REPO_ROOT / f"data/raw/{st}/pl94/{st.lower()}_pl94_blocks.csv")
 
-    cfg = yaml.safe_load(Path(configs_path).read_text())[state_code]
-    k = cfg["districts_congress"]; tol = cfg["pop_tolerance"]
+def prepare_blocks(blocks_path: Path, pl94_csv: Path, use_cache=True, rebuild_cache=False,
+                   report: RunReport | None = None):
+    """Block table with pop + rook edge arrays, served from the graph cache when the inputs match."""
+    stage = report.stage if report else (lambda name: nullcontext({}))
+    key = graph_cache.cache_key(blocks_path, pl94_csv) if use_cache else None
+    if key and not rebuild_cache and graph_cache.has_entry(key):
+        print(f"[run] graph cache hit {key}")
+        with stage("cache_load") as rec:
+            rec["cache_key"] = key
+            blocks, edges = graph_cache.load_prepared(key)
+            blocks.attrs["cache_key"] = key
+            return blocks, edges
 
     # Load & attach pop with defensive logging
     print("[run] loading blocks…")
-    blocks = load_blocks(blocks_path)
+    with stage("load") as rec:
+        blocks = load_blocks(blocks_path, geoid_dtype="int64")
+        rec["rows"] = len(blocks)
     print(f"[run] blocks loaded: {len(blocks)} rows, cols={list(blocks.columns)}")
 
     print("[run] attaching population…")
-    blocks = attach_population(blocks, pl94_csv)
+    with stage("population"):
+        blocks = attach_population(blocks, pl94_csv)
     if "pop" not in blocks.columns:
         raise RuntimeError("Population column 'pop' missing after attach_population()")
-    total_pop = int(blocks["pop"].sum())
-    target = total_pop / k
-    print(f"[run] total_pop={total_pop:,}, target≈{int(target):,}")
 
     print("[run] building adjacency… (first time on big states can be slow)")
-    G = build_adjacency(blocks)
-    print(f"[run] graph nodes={G.number_of_nodes()}, edges={G.number_of_edges()}")
+    with stage("adjacency") as rec:
+        # shared lengths and the block-level shape tables for incremental compactness
+        # (see compactness.DistrictShapes) are measured in metres, not TIGER's lon/lat degrees
+        geoms = projected_geometry(blocks)
+        edges = rook_adjacency(geoms)
+        blocks["area"] = shapely.area(geoms)
+        blocks["perimeter"] = shapely.length(geoms)
+        rec["edges"] = len(edges[0])
 
-    geoid_to_pop = dict(zip(blocks["geoid"], blocks["pop"]))
-    print("[run] growing regions…")
-    assignment, region_pop = grow_regions(G, geoid_to_pop, k, target, tol)
+    if key:
+        with stage("cache_save") as rec:
+            rec["cache_key"] = key
+            crs = shape_crs(blocks)
+            path = graph_cache.save_prepared(key, blocks, edges, meta={
+                "blocks_path": str(blocks_path), "pl94_csv": str(pl94_csv),
+                "shape_crs": crs.to_string() if crs is not None else None,
+            }, overwrite=rebuild_cache)
+        print(f"[run] cached prepared graph -> {path}")
+        blocks.attrs["cache_key"] = key
+    return blocks, edges
 
-    # Optional repair step if you added it:
-    try:
-        from src.algorithms.repair_swap import border_swaps
-        print("[run] repair swaps…")
-        assignment = border_swaps(G, assignment, geoid_to_pop, target, tol)
-        # recompute pops
-        from collections import defaultdict
-        acc = defaultdict(int)
-        for n, d in assignment.items():
-            acc[d] += geoid_to_pop[n]
-        region_pop = [acc[i] for i in range(k)]
-    except Exception:
-        pass
-
-    print("[run] dissolving to districts…")
-    blocks["district"] = blocks["geoid"].map(assignment)
-    districts = blocks.dissolve(by="district", aggfunc={"pop":"sum"}).reset_index()
-
-    # Write based on extension
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-    ext = out_path.suffix.lower()
-    print(f"[run] writing {out_path} …")
-    if ext == ".gpkg":
-        districts.to_file(out_path, layer="districts", driver="GPKG")
-    elif ext in (".geojson", ".json"):
-        districts.to_file(out_path, driver="GeoJSON")
+def _single_plan(graph, k, target, tol, seed, max_swaps, compactness_weight=0.0, weights=None, coi_layers=None,
+                 seed_strategy="random", initial=None, report: RunReport | None = None):
+    """Grow + repair one plan; with `initial` (a full assignment, e.g. the enacted map) repair starts from it."""
+    report = report or RunReport(log=None)
+    if initial is not None:
+        assignment = np.array(initial, dtype=ASSIGNMENT_DTYPE)
+        print("[run] warm start: repairing the given assignment")
     else:
-        districts.to_file(out_path)  # let GeoPandas infer
+        rng = np.random.default_rng(seed)
+        print("[run] growing regions…")
+        grow_stats = {}
+        with report.stage("grow"):
+            assignment, region_pop = grow_regions(graph, k, target, tol, rng=rng, stats=grow_stats,
+                                                  seed_strategy=seed_strategy)
+        report.count("grow", grow_stats)
+        print(f"[run] grow ({seed_strategy}): {grow_stats['claimed']} claimed in {grow_stats['passes']} passes, "
+              f"{grow_stats['leftovers_repaired']} leftovers")
+
+    print("[run] repair swaps…")
+    swap_stats = {}
+    with report.stage("repair"):
+        objectives = build_objectives(graph, assignment, weights, coi_layers)
+        assignment = border_swaps(graph, assignment, target, tol, max_iters=max_swaps,
+                                  compactness_weight=compactness_weight, objectives=objectives, stats=swap_stats)
+    report.count("repair", swap_stats)
+    print(f"[run] swaps: {swap_stats['moves']} moves in {swap_stats['iterations']} iters, "
+          f"{swap_stats['seconds']:.2f}s, max dev {swap_stats['max_dev_before']:.4f} -> {swap_stats['max_dev_after']:.4f}")
+    region_pop = np.bincount(assignment, weights=graph.pop, minlength=k).astype(np.int64).tolist()
+    return assignment, region_pop
+
+def plan_options(cfg: dict, seed, seed_strategy: str, multilevel, max_swaps: int) -> dict:
+    """Settings a plan .npz records in its meta; run_batch regenerates a plan when any of them change."""
+    return {"k": cfg["districts_congress"], "tol": cfg["pop_tolerance"], "weights": cfg.get("weights", {}),
+            "seed": seed, "seed_strategy": seed_strategy, "multilevel": list(multilevel), "max_swaps": max_swaps}
+
+def run(state_code: str, blocks_path: Path, pl94_csv: Path, out_path: Path, configs_path=CONFIG_PATH,
+        use_cache=True, rebuild_cache=False, seed=None, max_swaps=20000,
+        ensemble=0, workers=1, keep=10, ensemble_out: Path | None = None, multilevel=(),
+        report_path: Path | None = None, profile=False, trace_memory=False, coi_path: Path | None = None,
+        seed_strategy="random", warm_start: Path | None = None):
+    """
+    Build (or load) the block graph, draw one plan and write the dissolved districts, or just
+    the assignment-only plan when out_path ends in .npz (see plan_io; materialize it later).
+    `warm_start` is a plan .npz for the same blocks (e.g. the cd118 overlay from score_cd118
+    --out) that border_swaps repairs instead of growing a plan from seeds.
+    A JSON run report with per-stage time/memory and algorithm counters is written to
+    `report_path` (default: <out stem>_report.json next to the output), also when the run
+    fails, with the error as its result.
+    """
+    print(f"[run] state={state_code}")
+    print(f"[run] blocks_path={blocks_path}")
+    print(f"[run] pl94_csv={pl94_csv}")
+    if not blocks_path.exists():
+        raise FileNotFoundError(f"Blocks shapefile not found: {blocks_path}")
+    if not pl94_csv.exists():
+        raise FileNotFoundError(f"PL94 CSV not found: {pl94_csv}")
+
+    cfg = load_states(Path(configs_path))[state_code]
+    k = cfg["districts_congress"]; tol = cfg["pop_tolerance"]
+    weights = cfg.get("weights", {})
+    coi_layers = load_coi_layers(coi_path) if coi_path else None
+    mode = "ensemble" if ensemble else "multilevel" if multilevel else "warm_start" if warm_start else "single"
+    report = RunReport(meta={
+        "state": state_code, "blocks_path": str(blocks_path), "pl94_csv": str(pl94_csv),
+        "out_path": str(out_path), "k": k, "tol": tol, "seed": seed, "mode": mode,
+        "max_swaps": max_swaps, "seed_strategy": seed_strategy, "ensemble": ensemble, "workers": workers, "multilevel": list(multilevel),
+        "warm_start": str(warm_start) if warm_start else None,
+    }, trace_memory=trace_memory, profile=profile)
+
+    report_path = report_path or out_path.with_name(f"{out_path.stem}_report.json")
+    result = None
+    try:
+        blocks, edges = prepare_blocks(blocks_path, pl94_csv, use_cache=use_cache, rebuild_cache=rebuild_cache,
+                                       report=report)
+        total_pop = int(blocks["pop"].sum())
+        target = total_pop / k
+        print(f"[run] total_pop={total_pop:,}, target≈{int(target):,}")
+
+        src, dst, shared_len = edges
+        with report.stage("graph"):
+            # centroids in metres, like the shape tables: seed strategies measure plain distances
+            graph = BlockGraph.from_edges(len(blocks), src, dst, blocks["pop"].to_numpy(),
+                                          geoids=blocks["geoid"].to_numpy(), shared_len=shared_len,
+                                          area=blocks["area"].to_numpy(), perimeter=blocks["perimeter"].to_numpy(),
+                                          xy=shapely.get_coordinates(shapely.centroid(projected_geometry(blocks))))
+        report.count("graph", {"nodes": graph.n, "edges": graph.n_edges})
+        print(f"[run] graph nodes={graph.n}, edges={graph.n_edges}")
+
+        if ensemble:
+            print(f"[run] ensemble of {ensemble} runs on {workers} worker(s)…")
+            with report.stage("ensemble"):
+                records, best = run_ensemble(graph, k, target, tol, ensemble, workers=workers,
+                                             base_seed=seed or 0, weights=weights,
+                                             keep=keep, max_swaps=max_swaps, seed_strategy=seed_strategy,
+                                             coi_layers=coi_layers)
+            report.count("ensemble", {
+                "runs": len(records), "best_run_id": best[0][0]["run_id"], "best_score": best[0][0]["score"],
+                "run_seconds_total": sum(r["seconds"] for r in records),
+                "swap_moves_total": sum(r["swap_moves"] for r in records),
+                "swap_iterations_total": sum(r["swap_iterations"] for r in records),
+            })
+            ensemble_out = ensemble_out or out_path.with_name(f"{out_path.stem}_ensemble.npz")
+            write_ensemble(ensemble_out, records, best, meta={
+                "state": state_code, "k": k, "target": target, "tol": tol, "base_seed": seed or 0,
+                "weights": weights, "blocks_path": str(blocks_path), "pl94_csv": str(pl94_csv),
+            })
+            print(f"[run] wrote ensemble {ensemble_out}; best run {best[0][0]['run_id']} score {best[0][0]['score']:.3f}")
+            assignment = best[0][1]
+            region_pop = np.bincount(assignment, weights=graph.pop, minlength=k).astype(np.int64).tolist()
+        elif multilevel:
+            print(f"[run] multilevel partition via {'/'.join(multilevel)}…")
+            ml_stats = {}
+            with report.stage("multilevel"):
+                assignment, region_pop = multilevel_partition(
+                    graph, k, target, tol, levels=multilevel, rng=np.random.default_rng(seed), max_swaps=max_swaps,
+                    compactness_weight=weights.get("compactness", 0.0), objective_weights=weights,
+                    coi_layers=coi_layers, seed_strategy=seed_strategy, stats=ml_stats)
+            report.count("multilevel", ml_stats)
+            for lv in ml_stats["levels"]:
+                print(f"[run]   {lv['level']}: {lv['nodes']:,} nodes, {lv['moves']} moves, "
+                      f"{lv['seconds']:.2f}s, max dev {lv['max_dev_after']:.4f}")
+        else:
+            initial = None
+            if warm_start:
+                with report.stage("warm_start"):
+                    start = load_plan(warm_start)
+                    check_fingerprint(start, blocks["geoid"])
+                    initial = start["district"]
+                if start["meta"].get("k", k) != k:
+                    raise ValueError(f"warm start {warm_start} has {start['meta']['k']} districts, {state_code} needs {k}")
+            assignment, region_pop = _single_plan(graph, k, target, tol, seed, max_swaps,
+                                                  compactness_weight=weights.get("compactness", 0.0),
+                                                  weights=weights, coi_layers=coi_layers, seed_strategy=seed_strategy,
+                                                  initial=initial, report=report)
+
+        if out_path.suffix.lower() == ".npz":
+            print(f"[run] writing plan {out_path} …")
+            with report.stage("write"):
+                save_plan(out_path, assignment, block_fingerprint(blocks["geoid"]), meta={
+                    "state": state_code, "mode": mode,
+                    "blocks_path": str(blocks_path), "pl94_csv": str(pl94_csv),
+                    "cache_key": blocks.attrs.get("cache_key"),
+                    **plan_options(cfg, seed, seed_strategy, multilevel, max_swaps),
+                })
+        else:
+            print("[run] dissolving to districts…")
+            with report.stage("dissolve"):
+                districts = dissolve_districts(blocks, assignment)
+            print(f"[run] writing {out_path} …")
+            with report.stage("write"):
+                write_districts(districts, out_path)
+
+        dev = np.abs(np.asarray(region_pop) - target) / target
+        result = {
+            "total_pop": total_pop, "target": target, "region_pop": [int(p) for p in region_pop],
+            "pop_max_dev": float(dev.max()), "within_tol": bool(dev.max() <= tol),
+        }
+    except BaseException as e:
+        # still write the report (and stop the profiler / tracemalloc) for failed runs
+        result = {"error": f"{type(e).__name__}: {e}"}
+        raise
+    finally:
+        report.write(report_path, result=result)
+        print(f"[run] wrote run report {report_path}")
 
     return total_pop, region_pop, target, out_path
 
 def main():
     p = argparse.ArgumentParser()
-    p.add_argument("--state", choices=["OR","NY","TX"], default="OR")
+    p.add_argument("--state", choices=state_codes(), default="OR")
     p.add_argument("--blocks", help="Path to tabblock20 .shp (defaults based on state)")
     p.add_argument("--pl", help="Path to PL94 CSV (defaults based on state)")
-    p.add_argument("--out", help="Output GeoJSON path (defaults based on state)")
+    p.add_argument("--out", help="Output GeoJSON/GPKG path, or .npz for an assignment-only plan (defaults based on state)")
+    p.add_argument("--seed", type=int, help="RNG seed for seed placement (reproducible runs)")
+    p.add_argument("--seed-strategy", choices=SEED_STRATEGIES, default="random",
+                   help="Seed placement: population-weighted random, kmeans++ on block centroids, or balanced cells")
+    p.add_argument("--max-swaps", type=int, default=20000, help="Iteration cap for border_swaps repair")
+    p.add_argument("--ensemble", type=int, default=0, metavar="N", help="Run N seeds and keep the best plan")
+    p.add_argument("--workers", type=int, default=1, help="Processes for --ensemble")
+    p.add_argument("--keep", type=int, default=10, help="Number of best ensemble plans to store")
+    p.add_argument("--ensemble-out", help="Ensemble .npz path (default: next to --out)")
+    p.add_argument("--multilevel", help="Grow on coarse levels first, e.g. 'tract' or 'tract,bg'")
+    p.add_argument("--warm-start", help="Plan .npz to repair instead of growing from seeds (e.g. score_cd118 --out)")
+    p.add_argument("--rebuild-cache", action="store_true", help="Ignore any cached block graph and rebuild it")
+    p.add_argument("--no-cache", action="store_true", help="Don't read or write the block graph cache")
+    p.add_argument("--coi", help="COI layers (JSON/YAML: name -> list of block-group GEOIDs), weighted by 'coi'")
+    p.add_argument("--report", help="Run report JSON path (default: <out>_report.json)")
+    p.add_argument("--profile", action="store_true", help="Run under cProfile; top functions go into the report, raw stats to .prof")
+    p.add_argument("--trace-memory", action="store_true", help="Track per-stage Python heap peaks with tracemalloc (slow)")
     args = p.parse_args()
+    if args.ensemble and args.multilevel:
+        p.error("--ensemble and --multilevel can't be combined yet")
+    if args.warm_start and (args.ensemble or args.multilevel):
+        p.error("--warm-start only applies to a single plan")
 
     st = args.state
-    fips = STATE_FIPS[st]
-    blocks_path = Path(args.blocks) if args.blocks else REPO_ROOT / f"data/raw/{st}/blocks/tl_2022_{fips}_tabblock20.shp"
-    pl94_csv    = Path(args.pl)     if args.pl     else REPO_ROOT / f"data/raw/{st}/pl94/{st.lower()}_pl94_blocks.csv"
+    default_blocks, default_pl = default_inputs(st)
+    blocks_path = Path(args.blocks) if args.blocks else default_blocks
+    pl94_csv    = Path(args.pl)     if args.pl     else default_pl
     out_geojson = Path(args.out)    if args.out    else REPO_ROOT / f"data/outputs/{st}_congress_seedgrow.geojson"
 
-    total_pop, region_pop, target, out_path = run(st, blocks_path, pl94_csv, out_geojson)
+    total_pop, region_pop, target, out_path = run(st, blocks_path, pl94_csv, out_geojson,
+                                                 use_cache=not args.no_cache, rebuild_cache=args.rebuild_cache, seed=args.seed, max_swaps=args.max_swaps,
+                                                 ensemble=args.ensemble, workers=args.workers, keep=args.keep,
+                                                 ensemble_out=Path(args.ensemble_out) if args.ensemble_out else None,
+                                                 multilevel=tuple(args.multilevel.split(",")) if args.multilevel else (),
+                                                 report_path=Path(args.report) if args.report else None,
+                                                 profile=args.profile, trace_memory=args.trace_memory,
+                                                 coi_path=Path(args.coi) if args.coi else None,
+                                                 seed_strategy=args.seed_strategy,
+                                                 warm_start=Path(args.warm_start) if args.warm_start else None)
     print(f"{st}: total pop={total_pop:,}, target per district ≈ {int(target):,}")
     print("Achieved pops per district:", [int(p) for p in region_pop])
     print(f"Wrote: {out_path}")
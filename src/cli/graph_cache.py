@@ -0,0 +1,47 @@
+# src/cli/graph_cache.py
+import argparse
+import json
+import time
+from pathlib import Path
+from src.processing import graph_cache
+
+def _fmt_bytes(n):
+    for unit in ("B","KB","MB","GB"):
+        if n < 1024: return f"{n:.0f}{unit}"
+        n /= 1024
+    return f"{n:.1f}TB"
+
+def main():
+    p = argparse.ArgumentParser(description="Inspect or prune the prepared block-graph cache.")
+    p.add_argument("--root", default=str(graph_cache.CACHE_ROOT), help="Cache directory")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("list", help="List cache entries")
+    show = sub.add_parser("show", help="Print meta.json for one entry")
+    show.add_argument("key")
+    pr = sub.add_parser("prune", help="Delete cache entries")
+    pr.add_argument("--keep", type=int, help="Keep only the N newest entries")
+    pr.add_argument("--older-than", type=float, help="Delete entries older than DAYS")
+    pr.add_argument("--keep-stale", action="store_true", help="Keep entries built by other builder versions")
+    pr.add_argument("--dry-run", action="store_true")
+    args = p.parse_args()
+    root = Path(args.root)
+
+    if args.cmd == "list":
+        entries = graph_cache.list_entries(root)
+        if not entries:
+            print(f"(no cache entries in {root})")
+        for m in entries:
+            stale = "" if m.get("version") == graph_cache.GRAPH_BUILDER_VERSION else "  [stale]"
+            created = time.strftime("%Y-%m-%d %H:%M", time.localtime(m.get("created", 0)))
+            print(f"{m['key']}  {created}  blocks={m.get('n_blocks'):,} edges={m.get('n_edges'):,}"
+                  f"  {_fmt_bytes(m['bytes'])}  {m.get('blocks_path','')}{stale}")
+    elif args.cmd == "show":
+        print(json.dumps(graph_cache.load_meta(args.key, root), indent=2))
+    elif args.cmd == "prune":
+        removed = graph_cache.prune(root, keep=args.keep, older_than_days=args.older_than,
+                                    stale_versions=not args.keep_stale, dry_run=args.dry_run)
+        verb = "would remove" if args.dry_run else "removed"
+        print(f"{verb} {len(removed)} entries" + ("".join(f"\n  {k}" for k in removed)))
+
+if __name__ == "__main__":
+    main()
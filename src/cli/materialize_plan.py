@@ -0,0 +1,28 @@
+# src/cli/materialize_plan.py
+from pathlib import Path
+import argparse
+from src.cli.generate_plan import prepare_blocks
+from src.processing.plan_io import load_plan, check_fingerprint, dissolve_districts, write_districts
+
+def main():
+    p = argparse.ArgumentParser(description="Dissolve an assignment-only plan (.npz) into district polygons.")
+    p.add_argument("--plan", required=True, help="Plan .npz written by generate_plan --out *.npz")
+    p.add_argument("--out", help="GeoJSON/GPKG/Shapefile path (default: plan path with .geojson)")
+    p.add_argument("--blocks", help="Blocks shapefile (default: the one recorded in the plan)")
+    p.add_argument("--pl", help="PL94 CSV (default: the one recorded in the plan)")
+    args = p.parse_args()
+
+    plan_path = Path(args.plan)
+    plan = load_plan(plan_path)
+    blocks_path = Path(args.blocks or plan["meta"]["blocks_path"])
+    pl94_csv = Path(args.pl or plan["meta"]["pl94_csv"])
+    out = Path(args.out) if args.out else plan_path.with_suffix(".geojson")
+
+    blocks, _ = prepare_blocks(blocks_path, pl94_csv)
+    check_fingerprint(plan, blocks["geoid"])
+    print(f"[materialize] dissolving {len(blocks):,} blocks into {plan['meta']['k']} districts…")
+    write_districts(dissolve_districts(blocks, plan["district"]), out)
+    print(f"Wrote: {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# src/cli/render_plan.py
+from pathlib import Path
+import argparse
+import json
+import geopandas as gpd
+import numpy as np
+from src.algorithms.compactness import shape_metrics
+from src.processing.plan_io import load_plan, is_plan_file, check_fingerprint, dissolve_districts
+from src.visualization import map_cache
+from src.visualization.render import save_png, web_map
+
+def _scored(districts, target=None):
+    """district, pop, dev, pp columns on full-resolution geometry (before any simplification)."""
+    g = districts[[c for c in ("district", "pop", "geometry") if c in districts.columns]].copy()
+    if "pop" in g.columns:
+        target = g["pop"].sum() / len(g) if target is None else target
+        g["dev"] = ((g["pop"] - target) / target).round(5)
+    projected = g if g.crs is None or g.crs.is_projected else g.to_crs(g.estimate_utm_crs())
+    g["pp"] = shape_metrics(projected.geometry.values)[2].round(4)
+    return g
+
+def plan_levels(plan_path: Path, blocks=None, pl=None, rebuild=False) -> dict:
+    """
+    {level: GeoJSON path} of the simplified levels for a plan .npz or a district file, from the
+    map cache; the plan is only dissolved (or the file read) on a cache miss.
+    """
+    plan_path = Path(plan_path)
+    if is_plan_file(plan_path):
+        plan = load_plan(plan_path)
+        key = map_cache.plan_key(plan["district"], plan["fingerprint"])
+    else:
+        key = map_cache.file_key(plan_path)
+    paths = None if rebuild else map_cache.cached_levels(key)
+    if paths:
+        return paths
+    if is_plan_file(plan_path):
+        from src.cli.generate_plan import prepare_blocks
+        blocks_gdf, _ = prepare_blocks(Path(blocks or plan["meta"]["blocks_path"]), Path(pl or plan["meta"]["pl94_csv"]))
+        check_fingerprint(plan, blocks_gdf["geoid"])
+        print(f"[map] dissolving {len(blocks_gdf):,} blocks…")
+        districts = dissolve_districts(blocks_gdf, plan["district"])
+    else:
+        districts = gpd.read_file(plan_path)
+        if "district" not in districts.columns:
+            districts["district"] = np.arange(len(districts))
+    print(f"[map] simplifying {len(districts)} districts at {', '.join(map_cache.LEVELS)}…")
+    return map_cache.build_levels(_scored(districts), key, overwrite=rebuild)
+
+def pick_level(paths: dict, max_vertices: int) -> str:
+    """Finest cached level whose vertex count fits the budget (coarsest if none does)."""
+    meta = json.loads((next(iter(paths.values())).parent / "meta.json").read_text())["levels"]
+    cached = [lv for lv in map_cache.LEVELS if lv in paths]  # coarse to fine
+    fitting = [lv for lv in cached if meta[lv]["vertices"] <= max_vertices]
+    return fitting[-1] if fitting else cached[0]
+
+def render_plan(plan_path: Path, html: Path | None = None, png: Path | None = None, level="auto",
+                column="district", max_vertices=200_000, blocks=None, pl=None, rebuild=False) -> dict:
+    """Write the requested outputs for a plan; returns {"level": ..., "html": ..., "png": ...}."""
+    paths = plan_levels(plan_path, blocks, pl, rebuild)
+    level = pick_level(paths, max_vertices) if level == "auto" else level
+    districts = map_cache.load_level(paths[level])
+    out = {"level": level}
+    if png:
+        out["png"] = str(save_png(districts, png, column=column, title=f"{Path(plan_path).stem} ({level})"))
+    if html:
+        out["html"] = str(web_map(districts, html, column=column))
+    return out
+
+def main():
+    p = argparse.ArgumentParser(description="Render a plan as a web map and/or PNG from cached simplified geometry.")
+    p.add_argument("--plan", required=True, help="Plan .npz or district file (GeoJSON/GPKG/Shapefile with pop)")
+    p.add_argument("--html", help="folium web map output (default: <plan>_map.html unless only --png is given)")
+    p.add_argument("--png", help="Headless PNG output")
+    p.add_argument("--level", choices=["auto", *map_cache.LEVELS], default="auto",
+                   help="Simplification level; auto = finest within --max-vertices")
+    p.add_argument("--max-vertices", type=int, default=200_000, help="Vertex budget for --level auto")
+    p.add_argument("--color", choices=["district", "pp", "dev", "pop"], default="district", help="Fill color")
+    p.add_argument("--blocks", help="Plan .npz only: blocks shapefile (default: the one recorded in the plan)")
+    p.add_argument("--pl", help="Plan .npz only: PL94 CSV (default: the one recorded in the plan)")
+    p.add_argument("--rebuild", action="store_true", help="Recompute the simplified levels")
+    args = p.parse_args()
+
+    plan_path = Path(args.plan)
+    html = Path(args.html) if args.html else None if args.png else plan_path.with_name(f"{plan_path.stem}_map.html")
+    out = render_plan(plan_path, html=html, png=Path(args.png) if args.png else None, level=args.level,
+                      column=args.color, max_vertices=args.max_vertices, blocks=args.blocks, pl=args.pl,
+                      rebuild=args.rebuild)
+    for kind in ("html", "png"):
+        if kind in out:
+            print(f"Wrote: {out[kind]} ({out['level']})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# src/cli/run_batch.py
+"""
+Regenerate plans for every state in configs/states.yaml in one bounded job.
+
+    python -m src.cli.run_batch --workers 3 --memory-gb 24 --deadline-minutes 240
+
+Each state runs in its own worker process (fresh per state, so its peak RSS is its own):
+bootstrap of any missing inputs, graph build (served from the graph cache when the inputs are
+unchanged) and plan generation via generate_plan.run. A state is skipped outright when its
+plan .npz already exists for the same inputs and settings (seed, seed strategy, multilevel,
+max swaps and the state's k / tol / weights).
+
+Scheduling is memory-aware: every state gets an estimated peak (its measured peak from the
+previous summary, else states.yaml `memory_mb`, else a guess from the blocks shapefile size),
+states start largest first, and a state only starts while the estimates of everything running
+fit the budget, so big states get fewer concurrent slots. One that exceeds the budget on its
+own runs alone. No new state starts after the deadline; those are reported as skipped.
+Per-state logs, run reports and a summary.json land in the output directory; --png adds a
+headless map per state (see cli/render_plan.py).
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import redirect_stderr, redirect_stdout
+from pathlib import Path
+import argparse
+import json
+import os
+import time
+import traceback
+
+from src.cli.bootstrap_data import bootstrap_state
+from src.cli.generate_plan import REPO_ROOT, default_inputs, plan_options, run
+from src.algorithms.seed_grow import SEED_STRATEGIES
+from src.processing import graph_cache
+from src.processing.plan_io import is_plan_file, load_plan
+from src.processing.run_report import _git_revision, peak_rss_mb
+from src.processing.state_config import load_states
+
+DEFAULT_OUT = REPO_ROOT / "data" / "outputs" / "batch"
+# rough peak-memory guess when a state has never run: fixed overhead + a multiple of the
+# blocks shapefile (.shp + .dbf) size, or per district if the inputs aren't downloaded yet
+BASE_MB = 400
+SHP_FACTOR = 6
+MB_PER_DISTRICT = 150
+
+
+def total_memory_mb() -> float:
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") / 2**20
+
+
+def estimate_mb(state: str, cfg: dict, previous: dict) -> float:
+    """Expected peak RSS of one state's run (see module docstring for the order of sources)."""
+    prev = previous.get(state, {})
+    if prev.get("plan_peak_rss_mb"):
+        return float(prev["plan_peak_rss_mb"])
+    if cfg.get("memory_mb"):
+        return float(cfg["memory_mb"])
+    blocks_path, _ = default_inputs(state)
+    files = [blocks_path.with_suffix(s) for s in (".shp", ".dbf")]
+    if all(f.exists() for f in files):
+        return BASE_MB + SHP_FACTOR * sum(f.stat().st_size for f in files) / 2**20
+    return BASE_MB + MB_PER_DISTRICT * cfg["districts_congress"]
+
+
+def plan_up_to_date(out_path: Path, blocks_path: Path, pl94_csv: Path, options: dict) -> bool:
+    """
+    True if out_path is a plan built from these exact inputs (graph cache key) with the same
+    settings (generate_plan.plan_options: k, tol, weights, seed, seed strategy, multilevel, max swaps).
+    """
+    if not (is_plan_file(out_path) and out_path.exists() and blocks_path.exists() and pl94_csv.exists()):
+        return False
+    meta = load_plan(out_path)["meta"]
+    return (meta.get("cache_key") == graph_cache.cache_key(blocks_path, pl94_csv)
+            and all(meta.get(name) == value for name, value in options.items()))
+
+
+def run_state(state: str, opts: dict) -> dict:
+    """One state's bootstrap + graph + plan, with output going to <out_dir>/<state>.log."""
+    t0 = time.perf_counter()
+    out_dir = Path(opts["out_dir"])
+    out_path = out_dir / f"{state}_plan{opts['suffix']}"
+    report_path = out_dir / f"{state}_report.json"
+    rec = {"state": state, "status": "ok", "out": str(out_path), "log": str(out_dir / f"{state}.log")}
+    with open(rec["log"], "w") as log, redirect_stdout(log), redirect_stderr(log):
+        try:
+            blocks_path, pl94_csv = default_inputs(state)
+            missing = {"blocks": not blocks_path.exists(), "pl": not pl94_csv.exists()}
+            rec["bootstrapped"] = [name for name, m in missing.items() if m]
+            if rec["bootstrapped"]:
+                if not opts["bootstrap"]:
+                    raise FileNotFoundError(f"inputs missing ({', '.join(rec['bootstrapped'])}) and --no-bootstrap given")
+                bootstrap_state(state, **missing, pl_workers=opts["pl_workers"])
+            options = plan_options(load_states()[state], opts["seed"], opts["seed_strategy"],
+                                   opts["multilevel"], opts["max_swaps"])
+            if not opts["force"] and plan_up_to_date(out_path, blocks_path, pl94_csv, options):
+                print(f"[batch] {out_path} is up to date")
+                rec["status"] = "up_to_date"
+            else:
+                run(state, blocks_path, pl94_csv, out_path, seed=opts["seed"], max_swaps=opts["max_swaps"],
+                    multilevel=opts["multilevel"], seed_strategy=opts["seed_strategy"], report_path=report_path)
+                report = json.loads(report_path.read_text())
+                rec["cache_hit"] = any(s["stage"] == "cache_load" for s in report["stages"])
+                rec["pop_max_dev"] = report["result"]["pop_max_dev"]
+                rec["within_tol"] = report["result"]["within_tol"]
+                rec["report"] = str(report_path)
+            if opts["png"]:
+                from src.cli.render_plan import render_plan
+                rec["png"] = render_plan(out_path, png=out_dir / f"{state}.png", column=opts["png"])["png"]
+        except Exception as e:
+            rec["status"] = "failed"
+            rec["error"] = f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+    rec["seconds"] = round(time.perf_counter() - t0, 2)
+    rec["peak_rss_mb"] = peak_rss_mb()
+    return rec
+
+
+def run_batch(states: dict, opts: dict, workers: int, budget_mb: float, deadline: float | None = None,
+              previous: dict | None = None) -> list[dict]:
+    """Run run_state for each state under the worker / memory budget; returns one record per state."""
+    est = {st: estimate_mb(st, cfg, previous or {}) for st, cfg in states.items()}
+    pending = sorted(states, key=lambda st: -est[st])
+    running, results = {}, []
+    # max_tasks_per_child=1: each state gets a fresh process, so memory is returned between states
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as pool:
+        while pending or running:
+            if deadline is not None and time.time() > deadline:
+                results += [{"state": st, "status": "skipped", "error": "deadline reached"} for st in pending]
+                pending = []
+            used = sum(est[st] for st in running.values())
+            for st in list(pending):
+                if len(running) >= workers:
+                    break
+                if running and used + est[st] > budget_mb:
+                    continue  # a smaller state further down may still fit
+                print(f"[batch] start {st} (est. {est[st]:,.0f} MB, {used + est[st]:,.0f}/{budget_mb:,.0f} MB in use)")
+                running[pool.submit(run_state, st, opts)] = st
+                used += est[st]
+                pending.remove(st)
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                st = running.pop(fut)
+                try:
+                    rec = fut.result()
+                except Exception as e:  # worker died (e.g. killed for memory)
+                    rec = {"state": st, "status": "failed", "error": f"{type(e).__name__}: {e}"}
+                rec["est_mb"] = round(est[st])
+                results.append(rec)
+                print(f"[batch] {st}: {rec['status']} in {rec.get('seconds', 0):.1f}s, "
+                      f"peak {rec.get('peak_rss_mb') or 0:,.0f} MB" + (f" ({rec['error']})" if "error" in rec else ""))
+    order = list(states)
+    return sorted(results, key=lambda r: order.index(r["state"]))
+
+
+def _print_summary(results):
+    print(f"{'state':<6} {'status':<11} {'seconds':>8} {'peak_mb':>8} {'est_mb':>7} {'max_dev':>8} {'cache':>6}")
+    for r in results:
+        dev = f"{r['pop_max_dev']:.4f}" if "pop_max_dev" in r else "-"
+        print(f"{r['state']:<6} {r['status']:<11} {r.get('seconds', 0):8.1f} {r.get('peak_rss_mb') or 0:8.0f} "
+              f"{r.get('est_mb', 0):7.0f} {dev:>8} {str(r.get('cache_hit', '-')):>6}")
+
+
+def main():
+    p = argparse.ArgumentParser(description="Bootstrap, build and plan every state in configs/states.yaml")
+    p.add_argument("--states", nargs="+", help="Subset of states.yaml codes (default: all)")
+    p.add_argument("--workers", type=int, help="Concurrent states (default: CPU count)")
+    p.add_argument("--memory-gb", type=float, help="Memory budget for concurrent states (default: 80%% of RAM)")
+    p.add_argument("--deadline-minutes", type=float, help="Don't start new states after this long")
+    p.add_argument("--out-dir", default=str(DEFAULT_OUT), help="Plans, logs, run reports and summary.json")
+    p.add_argument("--format", choices=[".npz", ".geojson", ".gpkg"], default=".npz",
+                   help="Plan output: assignment-only .npz or dissolved districts")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--seed-strategy", choices=SEED_STRATEGIES, default="random")
+    p.add_argument("--max-swaps", type=int, default=20000)
+    p.add_argument("--multilevel", help="Grow on coarse levels first, e.g. 'tract' or 'tract,bg'")
+    p.add_argument("--no-bootstrap", action="store_true", help="Fail states with missing inputs instead of downloading")
+    p.add_argument("--pl-workers", type=int, default=8, help="Concurrent county requests when fetching PL94")
+    p.add_argument("--force", action="store_true", help="Regenerate plans even when they are up to date")
+    p.add_argument("--png", nargs="?", const="district", choices=["district", "pp", "dev", "pop"],
+                   help="Also write <state>.png from the cached simplified geometry (colored by district or a score)")
+    args = p.parse_args()
+
+    states = load_states()
+    if args.states:
+        unknown = set(args.states) - set(states)
+        if unknown:
+            p.error(f"not in states.yaml: {', '.join(sorted(unknown))}")
+        states = {st: states[st] for st in args.states}
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    summary_path = out_dir / "summary.json"
+    previous = {}
+    if summary_path.exists():
+        previous = {r["state"]: r for r in json.loads(summary_path.read_text())["states"]}
+
+    workers = args.workers or min(len(states), os.cpu_count() or 1)
+    budget_mb = args.memory_gb * 1024 if args.memory_gb else 0.8 * total_memory_mb()
+    opts = {"out_dir": str(out_dir), "suffix": args.format, "seed": args.seed, "seed_strategy": args.seed_strategy,
+            "max_swaps": args.max_swaps, "multilevel": tuple(args.multilevel.split(",")) if args.multilevel else (),
+            "bootstrap": not args.no_bootstrap, "pl_workers": args.pl_workers, "force": args.force,
+            "png": args.png}
+    t0 = time.time()
+    deadline = t0 + args.deadline_minutes * 60 if args.deadline_minutes else None
+    results = run_batch(states, opts, workers, budget_mb, deadline, previous)
+
+    summary = {
+        "meta": {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "git_revision": _git_revision(),
+                 "seconds": round(time.time() - t0, 2), "workers": workers, "budget_mb": round(budget_mb),
+                 "deadline_minutes": args.deadline_minutes, **{k: v for k, v in opts.items() if k != "out_dir"}},
+        "states": results,
+    }
+    # keep the peak of the last real plan run per state for the next estimate
+    for rec in results:
+        if rec["status"] == "ok":
+            rec["plan_peak_rss_mb"] = rec["peak_rss_mb"]
+        elif previous.get(rec["state"], {}).get("plan_peak_rss_mb"):
+            rec["plan_peak_rss_mb"] = previous[rec["state"]]["plan_peak_rss_mb"]
+    # states not in this run keep their last record
+    summary["states"] = results + [rec for st, rec in previous.items() if st not in states]
+    summary_path.write_text(json.dumps(summary, indent=2))
+    _print_summary(results)
+    print(f"Wrote: {summary_path}")
+    failed = [r["state"] for r in results if r["status"] in ("failed", "skipped")]
+    if failed:
+        raise SystemExit(f"[batch] not completed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
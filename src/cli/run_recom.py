@@ -0,0 +1,80 @@
+# src/cli/run_recom.py
+from pathlib import Path
+import argparse
+import numpy as np
+from src.cli.generate_plan import REPO_ROOT, default_inputs, prepare_blocks
+from src.processing.build_block_graph import projected_geometry
+from src.algorithms.graph import BlockGraph
+from src.algorithms.seed_grow import grow_regions, SEED_STRATEGIES
+import shapely
+from src.algorithms.repair_swap import border_swaps
+from src.algorithms.recom import recom_chain, write_chain
+from src.algorithms.multilevel import LEVELS, level_labels, coarsen
+from src.algorithms.objectives import build_objectives, load_coi_layers
+from src.processing.state_config import load_states, state_codes
+
+def main():
+    p = argparse.ArgumentParser(description="Run a ReCom chain from a seed-grow plan and stream it to disk.")
+    p.add_argument("--state", choices=state_codes(), default="OR")
+    p.add_argument("--blocks", help="Path to tabblock20 .shp (defaults based on state)")
+    p.add_argument("--pl", help="Path to PL94 CSV (defaults based on state)")
+    p.add_argument("--level", choices=sorted(LEVELS), default="block", help="Run the chain on a GEOID-aggregated graph")
+    p.add_argument("--steps", type=int, default=1000)
+    p.add_argument("--every", type=int, default=1, help="Write every Nth state")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--seed-strategy", choices=SEED_STRATEGIES, default="random", help="Seed placement for the starting plan")
+    p.add_argument("--max-attempts", type=int, default=50, help="Spanning trees tried per step")
+    p.add_argument("--out", help="Chain output (raw int16 rows + .json header)")
+    p.add_argument("--coi", help="COI layers (JSON/YAML: name -> list of block-group GEOIDs) to track")
+    p.add_argument("--allow-infeasible", action="store_true",
+                   help="Start the chain even if the repaired plan is outside the population tolerance")
+    args = p.parse_args()
+
+    st = args.state
+    cfg = load_states()[st]
+    k = cfg["districts_congress"]; tol = cfg["pop_tolerance"]
+    default_blocks, default_pl = default_inputs(st)
+    blocks_path = Path(args.blocks) if args.blocks else default_blocks
+    pl94_csv = Path(args.pl) if args.pl else default_pl
+    out = Path(args.out) if args.out else REPO_ROOT / f"data/outputs/{st}_recom_chain.i16"
+
+    blocks, (src, dst, shared_len) = prepare_blocks(blocks_path, pl94_csv)
+    graph = BlockGraph.from_edges(len(blocks), src, dst, blocks["pop"].to_numpy(),
+                                  geoids=blocks["geoid"].to_numpy(), shared_len=shared_len,
+                                  area=blocks["area"].to_numpy(), perimeter=blocks["perimeter"].to_numpy(),
+                                  xy=shapely.get_coordinates(shapely.centroid(projected_geometry(blocks))))
+    if args.level != "block":
+        labels, ids = level_labels(blocks["geoid"].to_numpy(), args.level)
+        graph = coarsen(graph, labels, geoids=ids)
+        print(f"[recom] {args.level} graph: {graph.n:,} nodes, {graph.n_edges:,} edges")
+    target = graph.pop.sum() / k
+
+    rng = np.random.default_rng(args.seed)
+    assignment, _ = grow_regions(graph, k, target, tol, rng=rng, seed_strategy=args.seed_strategy)
+    repair = {}
+    border_swaps(graph, assignment, target, tol, stats=repair)
+    print(f"[recom] starting plan: max dev {repair['max_dev_after']:.4f} (tol {tol}) after "
+          f"{repair['moves']} repair moves")
+    if not repair["within_tol"]:
+        msg = f"starting plan is outside tolerance: max dev {repair['max_dev_after']:.4f} > {tol}"
+        if not args.allow_infeasible:
+            raise SystemExit(f"[recom] {msg}; rerun with another --seed or pass --allow-infeasible")
+        print(f"[recom] warning: {msg}")
+
+    # track county splits / COI pieces along the chain (whatever states.yaml weights ask for)
+    objectives = build_objectives(graph, assignment, cfg.get("weights", {}),
+                                  load_coi_layers(args.coi) if args.coi else None)
+    stats = {}
+    chain = recom_chain(graph, assignment, target, tol, args.steps, rng=rng,
+                        max_attempts=args.max_attempts, objectives=objectives, stats=stats)
+    rows = write_chain(out, chain, graph.n, every=args.every,
+                       meta={"state": st, "k": k, "tol": tol, "seed": args.seed, "level": args.level,
+                             "repair": repair})
+    rate = stats["steps"] / stats["seconds"] * 60 if stats.get("seconds") else float("nan")
+    print(f"[recom] {stats['steps']} steps ({stats['accepted']} accepted) in {stats['seconds']:.1f}s "
+          f"≈ {rate:,.0f} steps/min; wrote {rows} rows to {out}")
+    if objectives is not None:
+        print("[recom] final:", objectives.summary())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# src/cli/score_batch.py
+"""
+Score many plans at once into one table.
+
+    python -m src.cli.score_batch data/outputs/ "runs/*.npz" --workers 8 --out scores.csv --cd118 OR
+
+Inputs are files, directories (every .geojson/.gpkg/.shp/plan .npz inside) or globs. District
+files are scored with vectorized shapely area/length, assignment-only plans (.npz) with a
+population bincount plus Polsby-Popper from the graph cache shape tables (see score_plan).
+--cd118 adds the enacted districts through their block overlay (see score_cd118), so they are
+scored on the same block populations and shape tables as the generated plans.
+Files are spread over a process pool; each worker keeps the block data of the plans it has
+already seen, so plans from the same graph don't reload it.
+
+The output has one row per district with that plan's summary stats repeated on every row
+(plan_* columns), so per-plan and per-district views are a groupby away. .parquet output
+needs pyarrow; anything else is written as CSV.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+import glob
+import importlib.util
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+
+from src.algorithms.compactness import shape_metrics
+from src.algorithms.scoring import population_deviation, score_assignment
+from src.processing import district_overlay
+from src.processing.plan_io import load_plan, is_plan_file
+from src.processing.state_config import state_codes
+from src.cli.generate_plan import default_inputs
+from src.cli.score_cd118 import enacted_overlay, load_cd118
+from src.cli.score_plan import plan_block_data
+
+PLAN_SUFFIXES = (".geojson", ".json", ".gpkg", ".shp", ".npz")
+# directory scans skip .json (run reports) and ensemble bundles, which aren't single plans
+DIR_SUFFIXES = (".geojson", ".gpkg", ".shp", ".npz")
+
+
+def expand_inputs(inputs) -> list[Path]:
+    """Files, directories and globs -> sorted unique plan files."""
+    out = set()
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            out.update(p for p in path.iterdir()
+                       if p.suffix.lower() in DIR_SUFFIXES and not p.name.endswith("_ensemble.npz"))
+        elif path.exists():
+            out.add(path)
+        else:
+            out.update(Path(p) for p in glob.glob(item, recursive=True) if Path(p).suffix.lower() in PLAN_SUFFIXES)
+    return sorted(out)
+
+
+# per-worker (block pop, graph) keyed by the plan's cache key / inputs
+_block_data = {}
+
+def _plan_rows(path: Path, target):
+    plan = load_plan(path)
+    meta = plan["meta"]
+    key = meta.get("cache_key") or (meta.get("blocks_path"), meta.get("pl94_csv"))
+    if key not in _block_data:
+        _block_data[key] = plan_block_data(plan)
+    pop, graph = _block_data[key]
+    stats, per_d = score_assignment(plan["district"], pop, target, k=meta.get("k"), graph=graph)
+    if "area" in per_d:
+        with np.errstate(divide="ignore"):
+            per_d["perimeter_area_ratio"] = np.where(per_d["area"] > 0, per_d["perimeter"] / per_d["area"], np.inf)
+    return stats, per_d
+
+
+def _district_rows(path: Path, target):
+    g = gpd.read_file(path)
+    if "pop" not in g.columns:
+        g["pop"] = np.nan
+    area, perimeter, pp, ratio = shape_metrics(g.geometry.values)
+    per_d = pd.DataFrame({"district": g["district"] if "district" in g.columns else np.arange(len(g)),
+                          "pop": g["pop"].to_numpy(), "area": area, "perimeter": perimeter,
+                          "pp": pp, "perimeter_area_ratio": ratio})
+    target = target if target is not None else per_d["pop"].sum() / len(per_d)
+    max_dev, mean_dev = population_deviation(per_d["pop"], target) if g["pop"].notna().any() else (np.nan, np.nan)
+    stats = {"n_districts": len(per_d), "pop_target": float(target), "pop_max_dev": max_dev,
+             "pop_mean_dev": mean_dev, "pp_mean": float(pp.mean()), "pp_min": float(pp.min())}
+    return stats, per_d
+
+
+def score_file(task):
+    """One plan file -> per-district DataFrame with plan_* summary columns."""
+    path, target, label = task
+    path = Path(path)
+    stats, per_d = (_plan_rows if is_plan_file(path) else _district_rows)(path, target)
+    per_d.insert(0, "plan", label or str(path))
+    for name, value in stats.items():
+        per_d[f"plan_{name}"] = value
+    return per_d
+
+
+def score_batch(paths, target=None, workers=1, extra=()) -> pd.DataFrame:
+    """Score every path (plus (path, label) pairs in `extra`) into one district-level table."""
+    tasks = [(str(p), target, None) for p in paths] + [(str(p), None, label) for p, label in extra]
+    if workers <= 1 or len(tasks) <= 1:
+        frames = [score_file(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            frames = list(pool.map(score_file, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def main():
+    os.environ.setdefault("OGR_GEOJSON_MAX_OBJ_SIZE", "0")
+
+    p = argparse.ArgumentParser(description="Score a batch of plans into one table")
+    p.add_argument("inputs", nargs="+", help="Plan files, directories or globs (.geojson/.gpkg/.shp/.npz)")
+    p.add_argument("--target", type=float, help="Target district population (default: per plan, total / districts)")
+    p.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p.add_argument("--out", default="plan_scores.csv", help="Output table (.csv or .parquet)")
+    p.add_argument("--cd118", choices=state_codes(), help="Add the enacted 118th Congress districts as a reference plan")
+    args = p.parse_args()
+
+    out = Path(args.out)
+    if out.suffix.lower() == ".parquet" and not any(importlib.util.find_spec(m) for m in ("pyarrow", "fastparquet")):
+        p.error("parquet output needs pyarrow (or fastparquet); use a .csv --out")
+    paths = expand_inputs(args.inputs)
+    extra = []
+    if args.cd118:
+        # scored like any assignment-only plan: block populations and the projected shape tables
+        blocks_path, pl94_csv = default_inputs(args.cd118)
+        cd_path, cd = load_cd118(args.cd118)
+        enacted = enacted_overlay(blocks_path, pl94_csv, cd_path, cd)
+        extra.append((district_overlay.overlay_path(enacted["fingerprint"], cd_path), "cd118"))
+    if not paths and not extra:
+        p.error("no plan files matched")
+    print(f"[score] {len(paths)} plan(s) on {args.workers} worker(s)…")
+
+    table = score_batch(paths, args.target, workers=args.workers, extra=extra)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    if out.suffix.lower() == ".parquet":
+        table.to_parquet(out, index=False)
+    else:
+        table.to_csv(out, index=False)
+
+    summary = table.groupby("plan", sort=False)[[c for c in table.columns if c.startswith("plan_")]].first()
+    print(summary.sort_values("plan_pop_max_dev").to_string())
+    print(f"Wrote: {out} ({len(table)} district rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,76 @@
 from pathlib import Path
-import argparse, geopandas as gpd
-from src.algorithms.scoring import score_plan
+import argparse, shutil, geopandas as gpd
+from src.algorithms.compactness import shape_metrics
+from src.algorithms.scoring import score_assignment
+from src.processing import graph_cache, district_overlay
+from src.processing.plan_io import load_plan
+from src.processing.state_config import state_codes, state_fips
+from src.cli.generate_plan import default_inputs, prepare_blocks
+from src.cli.score_plan import plan_block_data
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+def load_cd118(st: str):
+    """(path, GeoDataFrame) of a state's 118th Congress districts, without the 'ZZ' water pseudo-district."""
+    cd_path = REPO_ROOT / f"data/raw/{st}/districts/tl_2023_{state_fips(st)}_cd118.shp"
+    cd = gpd.read_file(cd_path)
+    return cd_path, cd[cd["CD118FP"] != "ZZ"]  # 'ZZ' = water / no district
+
+def enacted_overlay(blocks_path: Path, pl94_csv: Path, cd_path: Path, cd, rebuild=False):
+    """Block -> cd118 overlay plan, built once per block set / district file and then read from cache."""
+    key = graph_cache.cache_key(blocks_path, pl94_csv)
+    if not rebuild and graph_cache.has_entry(key):
+        plan = district_overlay.load_overlay(graph_cache.entry_fingerprint(key), cd_path)
+        if plan is not None:
+            print(f"[cd118] overlay cache hit ({len(plan['district']):,} blocks)")
+            return plan
+    blocks, _ = prepare_blocks(blocks_path, pl94_csv)
+    print(f"[cd118] overlaying {len(blocks):,} blocks on {len(cd)} districts…")
+    plan = district_overlay.build_overlay(blocks, cd, cd_path, meta={
+        "blocks_path": str(blocks_path), "pl94_csv": str(pl94_csv)})
+    if plan["meta"]["unmatched_blocks"]:
+        print(f"[cd118] {plan['meta']['unmatched_blocks']} block points outside every district; used the nearest")
+    return plan
 
 def main():
     p = argparse.ArgumentParser()
-    p.add_argument("--state", choices=["OR","NY","TX"], required=True)
+    p.add_argument("--state", choices=state_codes(), required=True)
+    p.add_argument("--plan", help="Assignment-only plan .npz to score alongside the enacted districts")
+    p.add_argument("--blocks", help="Blocks shapefile (defaults based on state)")
+    p.add_argument("--pl", help="PL94 CSV (defaults based on state)")
+    p.add_argument("--rebuild-overlay", action="store_true", help="Recompute the cached block -> cd118 overlay")
+    p.add_argument("--out", help="Also copy the enacted overlay plan here (e.g. for generate_plan --warm-start)")
     args = p.parse_args()
-    root = Path(__file__).resolve().parents[2]
-    fips = {"OR":"41","NY":"36","TX":"48"}[args.state]
-    cd = gpd.read_file(root / f"data/raw/{args.state}/districts/tl_2023_{fips}_cd118.shp")
-    # try to find pop; if not present, just print count (we’ll wire pop join later)
-    if "pop" not in cd.columns:
-        print("Note: cd118 has no 'pop' column; compactness only.")
-    cd["pp"] = cd.geometry.buffer(0).apply(lambda g: (4*3.14159*g.area)/(g.length**2) if g.length else 0)
-    print(cd[["GEOID","NAMELSAD","pp"]].to_string(index=False))
+    cd_path, cd = load_cd118(args.state)
+
+    default_blocks, default_pl = default_inputs(args.state)
+    blocks_path = Path(args.blocks) if args.blocks else default_blocks
+    pl94_csv = Path(args.pl) if args.pl else default_pl
+    enacted = enacted_overlay(blocks_path, pl94_csv, cd_path, cd, rebuild=args.rebuild_overlay)
+    pop, graph = plan_block_data(enacted)
+    stats, per_d = score_assignment(enacted["district"], pop, k=enacted["meta"]["k"], graph=graph)
+    cd = cd.set_index("GEOID").loc[enacted["meta"]["district_ids"]]
+    per_d.insert(0, "GEOID", cd.index.to_numpy())
+    per_d.insert(1, "NAMELSAD", cd["NAMELSAD"].to_numpy())
+    per_d["dev"] = (per_d["pop"] - stats["pop_target"]) / stats["pop_target"]
+    # Polsby-Popper of the published shapes, for reference, in the CRS of the block shape tables.
+    # The block-based pp differs where district lines cut through blocks (each block goes whole
+    # to the district holding its representative point) and where the two layers trace
+    # shorelines differently.
+    key = enacted["meta"].get("cache_key")
+    crs = graph_cache.load_meta(key).get("shape_crs") if key and graph_cache.has_entry(key) else None
+    per_d["pp_shape"] = shape_metrics(cd.to_crs(crs or cd.estimate_utm_crs()).geometry.values)[2]
+    print("Enacted:", stats)
+    print(per_d.drop(columns=["area", "perimeter"], errors="ignore").to_string(index=False))
+    if args.out:
+        src = district_overlay.overlay_path(enacted["fingerprint"], cd_path)
+        shutil.copyfile(src, args.out)
+        print(f"Wrote: {args.out}")
+    if args.plan:
+        plan = load_plan(Path(args.plan))
+        pop, graph = plan_block_data(plan)
+        plan_stats, per_d = score_assignment(plan["district"], pop, k=plan["meta"].get("k"), graph=graph)
+        print("Plan:", plan_stats)
+        print(per_d.to_string(index=False))
 if __name__ == "__main__":
     main()
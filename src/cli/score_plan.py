@@ -1,18 +1,49 @@
 from pathlib import Path
 import argparse, geopandas as gpd
-from src.algorithms.scoring import score_plan
+from src.algorithms.scoring import score_plan, score_assignment
+from src.algorithms.graph import BlockGraph
+from src.processing import graph_cache
+from src.processing.build_block_graph import load_blocks, attach_population
+from src.processing.plan_io import load_plan, is_plan_file, check_fingerprint
 import os
 
+def plan_block_data(plan: dict, blocks_path=None, pl94_csv=None):
+    """
+    (block pop, graph or None) for an assignment-only plan. Served from the plan's graph cache
+    entry when it still exists (plain .npy arrays, and the shape tables for Polsby-Popper);
+    otherwise the block GEOIDs + population are read without geometry.
+    """
+    key = plan["meta"].get("cache_key")
+    if key and not (blocks_path or pl94_csv) and graph_cache.has_entry(key):
+        check_fingerprint(plan, fingerprint=graph_cache.entry_fingerprint(key))
+        a = graph_cache.load_arrays(key, ("pop", "area", "perimeter", "src", "dst", "shared_len"), mmap=True)
+        graph = BlockGraph.from_edges(len(a["pop"]), a["src"], a["dst"], a["pop"], shared_len=a["shared_len"],
+                                      area=a["area"], perimeter=a["perimeter"])
+        return a["pop"], graph
+    blocks_path = Path(blocks_path or plan["meta"]["blocks_path"])
+    pl94_csv = Path(pl94_csv or plan["meta"]["pl94_csv"])
+    table = attach_population(load_blocks(blocks_path, geometry=False, geoid_dtype="int64"), pl94_csv)
+    check_fingerprint(plan, table["geoid"])
+    return table["pop"].to_numpy(), None
+
 def main():
     os.environ.setdefault("OGR_GEOJSON_MAX_OBJ_SIZE", "0")
 
     p = argparse.ArgumentParser()
-    p.add_argument("--plan", required=True, help="GeoJSON/Shapefile of districts (must include pop)")
-    p.add_argument("--target", type=float, required=True)
+    p.add_argument("--plan", required=True, help="GeoJSON/Shapefile of districts (must include pop), or a plan .npz")
+    p.add_argument("--target", type=float, help="Target district population (default: total pop / districts)")
+    p.add_argument("--blocks", help="Plan .npz only: blocks shapefile, if the graph cache entry is gone")
+    p.add_argument("--pl", help="Plan .npz only: PL94 CSV, if the graph cache entry is gone")
     args = p.parse_args()
 
-    g = gpd.read_file(Path(args.plan))
-    plan_stats, per_d = score_plan(g, args.target)
+    if is_plan_file(args.plan):
+        plan = load_plan(Path(args.plan))
+        pop, graph = plan_block_data(plan, args.blocks, args.pl)
+        plan_stats, per_d = score_assignment(plan["district"], pop, args.target, k=plan["meta"].get("k"), graph=graph)
+    else:
+        g = gpd.read_file(Path(args.plan))
+        target = args.target if args.target is not None else g["pop"].sum() / len(g)
+        plan_stats, per_d = score_plan(g, target)
     print("Plan:", plan_stats)
     print(per_d.to_string(index=False))
 
@@ -1,87 +1,177 @@
 # src/processing/build_block_graph.py
 from pathlib import Path
+import importlib.util
 import geopandas as gpd
+import numpy as np
 import pandas as pd
-import networkx as nx
+import shapely
 
-def load_blocks(blocks_path: Path) -> gpd.GeoDataFrame:
-    gdf = gpd.read_file(blocks_path)
+_POP_COLS = ("P1_001N","P0010001","TOT_POP","TOTAL","POP")
+# optional fast paths: pyogrio column projection / Arrow transport, pyarrow CSV parsing
+_HAS_PYOGRIO = importlib.util.find_spec("pyogrio") is not None
+_HAS_ARROW = importlib.util.find_spec("pyarrow") is not None
+
+def _list_fields(path: Path) -> list[str]:
+    """Attribute column names without reading any features."""
+    if _HAS_PYOGRIO:
+        import pyogrio
+        return list(pyogrio.read_info(path)["fields"])
+    return [c for c in gpd.read_file(path, rows=0).columns if c != "geometry"]
+
+def _numeric_geoids(s: pd.Series) -> np.ndarray:
+    keys = pd.to_numeric(s, errors="coerce")
+    bad = keys.isna().to_numpy()
+    if bad.any():
+        raise ValueError(f"{int(bad.sum())} non-numeric GEOIDs, e.g. {s[bad].head(3).tolist()}")
+    return keys.to_numpy(np.int64)
+
+def geoid_key(geoids) -> np.ndarray:
+    """GEOIDs as int64 (15-digit block GEOIDs fit); raises ValueError on missing or non-numeric values."""
+    s = pd.Series(geoids)
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = s.cat.codes.to_numpy()
+        if (codes < 0).any():
+            raise ValueError(f"{int((codes < 0).sum())} missing GEOIDs")
+        return _numeric_geoids(pd.Series(s.cat.categories))[codes]
+    if pd.api.types.is_integer_dtype(s.dtype):
+        return s.to_numpy(np.int64)
+    return _numeric_geoids(s)
+
+def load_blocks(blocks_path: Path, geometry: bool = True, geoid_dtype: str = "str"):
+    """
+    Read just the GEOID column (plus a population column when the file has one) and the geometry.
+    Uses pyogrio column projection, with Arrow transport when pyarrow is installed.
+    geometry=False returns a plain DataFrame for topology/population-only pipelines.
+    geoid_dtype: "str", "category" or "int64" (see geoid_key; leading zeros are dropped,
+    graph.geoid_strings restores them).
+    """
+    fields = _list_fields(blocks_path)
     # Find a GEOID-like column
-    id_col = next((c for c in gdf.columns if c.upper().startswith("GEOID")), None)
+    id_col = next((c for c in fields if c.upper().startswith("GEOID")), None)
     if id_col is None:
-        raise ValueError(f"No GEOID* column found in {blocks_path}. Columns: {list(gdf.columns)}")
-    return gdf[[id_col, "geometry"]].rename(columns={id_col: "geoid"})
+        raise ValueError(f"No GEOID* column found in {blocks_path}. Columns: {fields}")
+    pop_col = next((c for name in _POP_COLS for c in fields if c.upper() == name), None)
+    columns = [id_col] + ([pop_col] if pop_col else [])
 
-def _use_pop_if_present(blocks: gpd.GeoDataFrame) -> gpd.GeoDataFrame | None:
-    pop_cols = ("P1_001N","P0010001","TOT_POP","TOTAL","POP")
-    for name in pop_cols:
+    kw = {"columns": columns, "ignore_geometry": not geometry}
+    if _HAS_PYOGRIO:
+        kw.update(engine="pyogrio", use_arrow=_HAS_ARROW)
+    gdf = gpd.read_file(blocks_path, **kw).rename(columns={id_col: "geoid"})
+    if geoid_dtype == "category":
+        gdf["geoid"] = gdf["geoid"].astype("category")
+    elif geoid_dtype == "int64":
+        gdf["geoid"] = geoid_key(gdf["geoid"])
+    elif geoid_dtype != "str":
+        raise ValueError(f"geoid_dtype must be 'str', 'category' or 'int64', not {geoid_dtype!r}")
+    return gdf
+
+def _use_pop_if_present(blocks):
+    for name in _POP_COLS:
         cand = [c for c in blocks.columns if c.upper() == name]
         if cand:
-            gdf = blocks.copy()
-            gdf["pop"] = pd.to_numeric(gdf[cand[0]], errors="coerce").fillna(0).astype(int)
-            return gdf[["geoid","geometry","pop"]]
+            pop = pd.to_numeric(blocks[cand[0]], errors="coerce").fillna(0).astype(np.int64)
+            return blocks.drop(columns=cand).assign(pop=pop)
     return None
 
-def attach_population(blocks: gpd.GeoDataFrame, pl94_csv: Path) -> gpd.GeoDataFrame:
+def _find_col(columns, names):
+    for name in names:
+        for c in columns:
+            if c.upper() == name.upper():
+                return c
+    return None
+
+def attach_population(blocks, pl94_csv: Path):
     # If the block shapefile already has pop, use it
     direct = _use_pop_if_present(blocks)
     if direct is not None:
         return direct
 
-    pop = pd.read_csv(pl94_csv, dtype=str)
-    # find or build geoid
-    geoid_csv_col = next((c for c in pop.columns if c.lower()=="geoid" or c.upper().startswith("GEOID")), None)
-    if geoid_csv_col is None:
-        cols_lower = {c.lower(): c for c in pop.columns}
-        needed = {"state","county","tract","block"}
-        if needed.issubset(cols_lower.keys()):
-            pop["geoid"] = (
-                pop[[cols_lower["state"], cols_lower["county"], cols_lower["tract"], cols_lower["block"]]]
-                .astype(str).agg("".join, axis=1)
-            )
-            geoid_csv_col = "geoid"
-        else:
-            raise ValueError(f"Can't find GEOID/state/county/tract/block in {pl94_csv}. Columns: {list(pop.columns)}")
-
-    # find population column
-    pop_col = None
-    for name in ("pop","P1_001N","P0010001","TOT_POP","TOTAL"):
-        if name in pop.columns: pop_col = name; break
-        for c in pop.columns:
-            if c.upper() == name: pop_col = c; break
-        if pop_col: break
+    # only parse the columns we need
+    columns = list(pd.read_csv(pl94_csv, nrows=0).columns)
+    pop_col = _find_col(columns, ("pop","P1_001N","P0010001","TOT_POP","TOTAL"))
     if pop_col is None:
-        raise ValueError(f"Can't find population column in {pl94_csv}. Columns: {list(pop.columns)}")
+        raise ValueError(f"Can't find population column in {pl94_csv}. Columns: {columns}")
+    geoid_col = next((c for c in columns if c.lower()=="geoid" or c.upper().startswith("GEOID")), None)
+    engine = {"engine": "pyarrow"} if _HAS_ARROW else {}
 
-    pop["pop"] = pd.to_numeric(pop[pop_col], errors="coerce").fillna(0).astype(int)
-    pop = pop[[geoid_csv_col, "pop"]].rename(columns={geoid_csv_col: "geoid"})
+    if geoid_col is not None:
+        pop = pd.read_csv(pl94_csv, usecols=[geoid_col, pop_col], dtype={geoid_col: str}, **engine)
+        keys = geoid_key(pop[geoid_col])
+    else:
+        # build the GEOID arithmetically: SS CCC TTTTTT BBBB
+        parts = [_find_col(columns, (name,)) for name in ("state","county","tract","block")]
+        if None in parts:
+            raise ValueError(f"Can't find GEOID/state/county/tract/block in {pl94_csv}. Columns: {columns}")
+        pop = pd.read_csv(pl94_csv, usecols=parts + [pop_col], dtype={c: np.int64 for c in parts}, **engine)
+        st, co, tr, bl = (pop[c].to_numpy(np.int64) for c in parts)
+        keys = st * 10**13 + co * 10**10 + tr * 10**4 + bl
 
-    gdf = blocks.merge(pop, on="geoid", how="left")
-    gdf["pop"] = gdf["pop"].fillna(0).astype(int)
-    return gdf
+    values = pd.to_numeric(pop[pop_col], errors="coerce").fillna(0).to_numpy(np.int64)
+    keys, inverse = np.unique(keys, return_inverse=True)
+    values = np.bincount(inverse, weights=values, minlength=len(keys)).astype(np.int64)
 
-def build_adjacency(blocks: gpd.GeoDataFrame) -> nx.Graph:
+    # vectorized join on int64 GEOID keys; blocks missing from the CSV get 0
+    idx = pd.Index(keys).get_indexer(geoid_key(blocks["geoid"]))
+    return blocks.assign(pop=np.where(idx >= 0, values[idx], 0))
+
+def rook_adjacency(geoms, chunk_size: int = 100_000):
+    """
+    Bulk rook contiguity over a geometry array.
+    One STRtree query (chunked to bound memory) finds intersecting pairs, then the shared
+    boundary of every pair is measured with vectorized shapely ops. Corner-only touches
+    (shared length 0) are dropped.
+    Returns (src, dst, shared_len) with src < dst as positional indices into `geoms`.
     """
-    Build contiguity graph: nodes are block GEOIDs; edges if polygons touch along a boundary.
-    Uses the GeoPandas spatial index for speed.
+    geoms = np.asarray(geoms)
+    tree = shapely.STRtree(geoms)
+    boundaries = shapely.boundary(geoms)
+
+    src_parts, dst_parts, len_parts = [], [], []
+    for start in range(0, len(geoms), chunk_size):
+        left, right = tree.query(geoms[start:start + chunk_size], predicate="intersects")
+        left = left + start
+        keep = left < right
+        left, right = left[keep], right[keep]
+        shared = shapely.length(shapely.intersection(boundaries[left], boundaries[right]))
+        rook = shared > 0
+        src_parts.append(left[rook]); dst_parts.append(right[rook]); len_parts.append(shared[rook])
+
+    if not src_parts:
+        return np.empty(0, np.int32), np.empty(0, np.int32), np.empty(0, np.float64)
+    src = np.concatenate(src_parts).astype(np.int32)
+    dst = np.concatenate(dst_parts).astype(np.int32)
+    shared_len = np.concatenate(len_parts).astype(np.float64)
+    order = np.lexsort((dst, src))
+    return src[order], dst[order], shared_len[order]
+
+def shape_crs(gdf):
+    """CRS the shape tables are measured in: the frame's own if projected, else its UTM zone."""
+    if gdf.crs is None or gdf.crs.is_projected:
+        return gdf.crs
+    return gdf.estimate_utm_crs()
+
+def projected_geometry(gdf):
     """
-    # spatial index (requires shapely>=2 or rtree)
-    sindex = blocks.sindex
+    Geometry values in shape_crs (metres for TIGER's lon/lat files). Reprojection moves every
+    shared vertex the same way, so rook adjacency is unchanged, but lengths and areas stop
+    depending on latitude the way degrees do.
+    """
+    crs = shape_crs(gdf)
+    return gdf.geometry.values if crs == gdf.crs else gdf.geometry.to_crs(crs).values
+
+def graph_from_edges(geoids, edges):
+    """networkx view of (src, dst, shared_len) edge arrays over positional `geoids`."""
+    import networkx as nx
+    geoids = np.asarray(geoids)
+    src, dst, shared_len = edges
     G = nx.Graph()
-    geoms = blocks.geometry.values
-    geoids = blocks["geoid"].values
-
-    for i, geoid in enumerate(geoids):
-        G.add_node(geoid)
-
-    for i, geom in enumerate(geoms):
-        # candidate neighbors via bbox intersection
-        for j in sindex.intersection(geom.bounds):
-            if j <= i: 
-                continue
-            other = geoms[j]
-            # require shared boundary (avoid corner-only)
-            if geom.touches(other) or geom.intersects(other):
-                if geom.boundary.intersects(other.boundary):
-                    G.add_edge(geoids[i], geoids[j])
+    G.add_nodes_from(geoids)
+    G.add_weighted_edges_from(zip(geoids[src], geoids[dst], shared_len), weight="shared_len")
     return G
+
+def build_adjacency(blocks: gpd.GeoDataFrame):
+    """
+    Build rook contiguity graph: nodes are block GEOIDs; edges where polygons share a boundary
+    segment of positive length. Each edge carries `shared_len` (shared boundary length, CRS units).
+    """
+    return graph_from_edges(blocks["geoid"].values, rook_adjacency(blocks.geometry.values))
@@ -0,0 +1,81 @@
+# src/processing/district_overlay.py
+"""
+Block -> district overlay for existing maps (e.g. the enacted cd118 districts).
+
+Each block goes to the district containing its representative point (shapely
+point_on_surface, always inside the block), found with one vectorized STRtree query; points
+that land in no district (water, sliver gaps in the district file) go to the nearest one.
+The result is stored as an ordinary assignment-only plan (see plan_io) under
+data/cache/overlays, keyed by the block fingerprint and a hash of the district file, so
+enacted maps are scored by the same population / compactness path as generated plans and
+can seed border_swaps as a warm start.
+"""
+from pathlib import Path
+import hashlib
+
+import numpy as np
+import shapely
+
+from src.processing.graph_cache import REPO_ROOT, hash_inputs
+from src.processing.plan_io import block_fingerprint, load_plan, save_plan
+
+OVERLAY_ROOT = REPO_ROOT / "data" / "cache" / "overlays"
+
+
+def _lowest_match(pt, dist):
+    """(points, district) keeping the lowest district index per point from STRtree query pairs."""
+    order = np.lexsort((dist, pt))
+    pt, dist = pt[order], dist[order]
+    first = np.unique(pt, return_index=True)[1]
+    return pt[first], dist[first]
+
+
+def block_districts(block_geoms, district_geoms):
+    """(district index per block int64[n], blocks placed by nearest district instead of containment)."""
+    points = shapely.point_on_surface(np.asarray(block_geoms))
+    tree = shapely.STRtree(np.asarray(district_geoms))
+    out = np.full(len(points), -1, dtype=np.int64)
+    # a point on a shared boundary hits two districts (ties for nearest too); the query result
+    # order is not specified, so the lowest district index wins explicitly
+    pt, dist = _lowest_match(*tree.query(points, predicate="intersects"))
+    out[pt] = dist
+    miss = np.flatnonzero(out < 0)
+    if len(miss):
+        pt, dist = _lowest_match(*tree.query_nearest(points[miss]))
+        out[miss[pt]] = dist
+    return out, len(miss)
+
+
+def overlay_key(fingerprint: str, districts_path: Path) -> str:
+    """sha256 over the block fingerprint and the district file (with sidecars)."""
+    return hash_inputs(hashlib.sha256(fingerprint.encode()), districts_path).hexdigest()[:24]
+
+
+def overlay_path(fingerprint: str, districts_path: Path, root: Path = OVERLAY_ROOT) -> Path:
+    return Path(root) / f"{Path(districts_path).stem}_{overlay_key(fingerprint, districts_path)}.npz"
+
+
+def load_overlay(fingerprint: str, districts_path: Path, root: Path = OVERLAY_ROOT):
+    """Cached overlay plan for this block set and district file, or None."""
+    path = overlay_path(fingerprint, districts_path, root)
+    return load_plan(path) if path.exists() else None
+
+
+def build_overlay(blocks, districts, districts_path: Path, id_col: str = "GEOID", meta: dict | None = None,
+                  root: Path = OVERLAY_ROOT) -> dict:
+    """
+    Overlay `districts` (GeoDataFrame, one row per district) on the block table and cache it.
+    District ids follow the order of `id_col`; the ids themselves go into meta["district_ids"].
+    """
+    districts = districts.sort_values(id_col).reset_index(drop=True)
+    if blocks.crs is not None and districts.crs is not None and districts.crs != blocks.crs:
+        districts = districts.to_crs(blocks.crs)
+    district, unmatched = block_districts(blocks.geometry.values, districts.geometry.values)
+    fingerprint = block_fingerprint(blocks["geoid"])
+    path = overlay_path(fingerprint, districts_path, root)
+    save_plan(path, district, fingerprint, meta={
+        "mode": "overlay", "k": len(districts), "districts_path": str(districts_path), "id_col": id_col,
+        "district_ids": districts[id_col].astype(str).tolist(), "unmatched_blocks": unmatched,
+        "cache_key": blocks.attrs.get("cache_key"), **(meta or {}),
+    })
+    return load_plan(path)
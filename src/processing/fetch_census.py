@@ -1,102 +1,275 @@
 import os
 import csv
+import hashlib
+import json
+import random
+import shutil
+import tempfile
+import time
 import requests
 import zipfile
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import urllib3
+from requests.adapters import HTTPAdapter
+from src.processing.state_config import load_states, state_fips
 
 # Honour CENSUS_VERIFY=0 to skip SSL verification
 VERIFY_SSL = os.environ.get("CENSUS_VERIFY", "1") != "0"
 
+PL_API = "https://api.census.gov/data/2020/dec/pl"
+# max concurrent connections kept alive per host (bounds the PL94 thread pool too)
+POOL_SIZE = 16
+
 _session = requests.Session()
 _session.verify = VERIFY_SSL  # <-- dynamically set verification
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE))
+_session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE))
 if _session.verify is False:
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
-def _download_and_extract(url, out_dir: Path):
+# ---------- TIGER downloads (streamed, cached, atomic) ----------
+MANIFEST_NAME = ".downloads.json"
+ARCHIVE_DIR = ".archives"
+
+def _read_manifest(out_dir: Path) -> dict:
+    path = out_dir / MANIFEST_NAME
+    return json.loads(path.read_text()) if path.exists() else {}
+
+def _write_manifest(out_dir: Path, manifest: dict):
+    tmp = out_dir / (MANIFEST_NAME + ".part")
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, out_dir / MANIFEST_NAME)
+
+def _sha256(path: Path, chunk=1 << 20) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for buf in iter(lambda: f.read(chunk), b""):
+            h.update(buf)
+    return h.hexdigest()
+
+def _archive_ok(path: Path, entry: dict) -> bool:
+    return path.exists() and path.stat().st_size == entry.get("size") and _sha256(path) == entry.get("sha256")
+
+def _extracted_ok(out_dir: Path, entry: dict) -> bool:
+    members = entry.get("members") or {}
+    return bool(members) and all((out_dir / name).exists() and (out_dir / name).stat().st_size == size
+                                 for name, size in members.items())
+
+def _stream_to_file(r, dest: Path, chunk=1 << 20):
+    """Write a streamed response to dest in chunks; returns (size, sha256). Checks Content-Length."""
+    h = hashlib.sha256()
+    size = 0
+    with dest.open("wb") as f:
+        for buf in r.iter_content(chunk_size=chunk):
+            f.write(buf)
+            h.update(buf)
+            size += len(buf)
+    expected = r.headers.get("Content-Length")
+    if expected is not None and r.headers.get("Content-Encoding") in (None, "identity") and int(expected) != size:
+        raise IOError(f"Truncated download: got {size} of {expected} bytes")
+    return size, h.hexdigest()
+
+def _extract_atomic(archive: Path, out_dir: Path) -> dict:
+    """
+    Extract into a temp dir next to out_dir, then os.replace each file into place, main .shp last,
+    so readers never see a half-written file. The files are replaced one at a time, so callers
+    must drop the manifest's member record first (see _download_and_extract). Returns
+    {member name: size}.
+    """
+    tmp = Path(tempfile.mkdtemp(prefix=".extract_", dir=out_dir))
+    try:
+        with zipfile.ZipFile(archive) as zf:
+            zf.extractall(tmp)
+        files = sorted((p for p in tmp.rglob("*") if p.is_file()), key=lambda p: p.suffix.lower() == ".shp")
+        members = {}
+        for p in files:
+            rel = p.relative_to(tmp)
+            (out_dir / rel).parent.mkdir(parents=True, exist_ok=True)
+            members[str(rel)] = p.stat().st_size
+            os.replace(p, out_dir / rel)
+        return members
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def _download_and_extract(url, out_dir: Path, refresh: bool = False):
+    """
+    Download a zip and extract it into out_dir, skipping work that is already done:
+      - extracted files present with the recorded sizes -> nothing to do (unless refresh)
+      - with refresh, a conditional GET (ETag / Last-Modified) keeps the local copy on 304
+      - cached archive present with the recorded size + sha256 -> extract only
+    The body is streamed to a temp file in chunks (never held in memory), checked against
+    Content-Length, then kept under out_dir/.archives/. State lives in out_dir/.downloads.json.
+    """
     out_dir.mkdir(parents=True, exist_ok=True)
-    print(f"[+] Downloading from {url} (SSL verify={_session.verify})...")
-    r = _session.get(url, timeout=180)
-    r.raise_for_status()
+    archives = out_dir / ARCHIVE_DIR
+    archives.mkdir(exist_ok=True)
+    archive = archives / url.rsplit("/", 1)[-1]
+    manifest = _read_manifest(out_dir)
+    entry = manifest.get(url, {})
+
+    if entry and not refresh and _extracted_ok(out_dir, entry):
+        print(f"[=] Up to date: {url}")
+        return
+
+    headers = {}
+    have_archive = bool(entry) and _archive_ok(archive, entry)
+    if refresh and have_archive:
+        if entry.get("etag"): headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"): headers["If-Modified-Since"] = entry["last_modified"]
+
+    if not have_archive or refresh:
+        print(f"[+] Downloading from {url} (SSL verify={_session.verify})...")
+        with _session.get(url, timeout=180, stream=True, headers=headers) as r:
+            if r.status_code == 304:
+                print(f"[=] Not modified: {url}")
+                if _extracted_ok(out_dir, entry):
+                    return
+            else:
+                r.raise_for_status()
+                fd, part = tempfile.mkstemp(prefix=".download_", dir=archives)
+                os.close(fd)
+                part = Path(part)
+                try:
+                    size, digest = _stream_to_file(r, part)
+                    zipfile.ZipFile(part).close()  # fails fast on a corrupt archive
+                    os.replace(part, archive)
+                finally:
+                    part.unlink(missing_ok=True)
+                entry = {"etag": r.headers.get("ETag"), "last_modified": r.headers.get("Last-Modified"),
+                         "size": size, "sha256": digest, "archive": str(archive.relative_to(out_dir))}
+    else:
+        print(f"[=] Using cached archive {archive}")
 
-    with zipfile.ZipFile(BytesIO(r.content)) as zf:
-        zf.extractall(out_dir)
+    # an interrupted extraction can leave old and new sidecars side by side: forget the extracted
+    # members before the first replace so the next run extracts again instead of trusting them
+    entry.pop("members", None)
+    manifest[url] = entry
+    _write_manifest(out_dir, manifest)
+    entry["members"] = _extract_atomic(archive, out_dir)
+    _write_manifest(out_dir, manifest)
 
-# State postal -> FIPS (add more as you expand)
-_STATE_FIPS = {"OR": "41", "NY": "36", "TX": "48"}
+# State postal -> FIPS from configs/states.yaml (add a state there)
 def get_state_fips(state_or_fips: str) -> str | None:
     s = state_or_fips.upper()
     if s.isdigit() and len(s) in (2, 3):  # accept "41" or "041"
         return s.zfill(2)
-    return _STATE_FIPS.get(s)
+    return state_fips(s) if s in load_states() else None
+
+# ---------- Census API with retries ----------
+_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+def _get_json(url, params=None, timeout=240, retries=5, backoff=1.0):
+    """
+    GET a Census API URL and decode its JSON, retrying connection errors, timeouts and
+    429/5xx with exponential backoff + jitter. An empty body (204) decodes to [].
+    """
+    for attempt in range(retries + 1):
+        try:
+            r = _session.get(url, params=params, timeout=timeout)
+            if r.status_code in _RETRY_STATUS:
+                raise requests.HTTPError(f"{r.status_code} from {r.url}", response=r)
+            r.raise_for_status()
+            return r.json() if r.content.strip() else []
+        except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+            resp = getattr(e, "response", None)
+            retryable = resp is None or resp.status_code in _RETRY_STATUS
+            if not retryable or attempt == retries:
+                raise
+            delay = backoff * (2 ** attempt) * (1 + random.random())
+            print(f"[!] {e}; retry {attempt + 1}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
 
 # ---------- counties ----------
-def list_counties_in_state(state_fips: str) -> list[str]:
+def list_counties_in_state(state_fips: str, base_url: str = PL_API) -> list[str]:
     """
     Returns 3-digit county FIPS codes for the state via Census API.
     """
-    url = f"https://api.census.gov/data/2020/dec/pl?get=NAME&for=county:*&in=state:{state_fips}"
-    r = requests.get(url, timeout=120)
-    r.raise_for_status()
-    rows = r.json()
+    rows = _get_json(f"{base_url}?get=NAME&for=county:*&in=state:{state_fips}", timeout=120)
     # rows[0] is header; county code at index -1
     return sorted({row[-1].zfill(3) for row in rows[1:]})
 
 # ---------- TIGER downloads ----------
-def download_tabblock20(state_fips: str, out_dir: Path):
+def download_tabblock20(state_fips: str, out_dir: Path, refresh: bool = False):
     """
     Downloads and extracts 2022-posted tabblock20 (2020 blocks) for a state.
     You can switch to TIGER2020 if you prefer: TIGER2020/TABBLOCK20/tl_2020_{fips}_tabblock20.zip
     """
     url = f"https://www2.census.gov/geo/tiger/TIGER2022/TABBLOCK20/tl_2022_{state_fips}_tabblock20.zip"
-    _download_and_extract(url, out_dir)
+    _download_and_extract(url, out_dir, refresh=refresh)
 
-def download_cd118(state_fips: str, out_dir: Path):
+def download_cd118(state_fips: str, out_dir: Path, refresh: bool = False):
     """
     Downloads and extracts 118th Congress districts for a state.
     """
     url = f"https://www2.census.gov/geo/tiger/TIGER2023/CD/tl_2023_{state_fips}_cd118.zip"
-    _download_and_extract(url, out_dir)
+    _download_and_extract(url, out_dir, refresh=refresh)
 
 # ---------- PL94-171 (Total pop per block) ----------
-def fetch_pl_block_pop_state(state_fips: str, counties: list[str], out_csv: Path):
+def _fetch_county_rows(state_fips: str, county: str, cache_dir: Path, base_url: str, retries: int):
     """
-    Writes CSV: state,county,tract,block,geoid,pop
-    Uses PL 2020 API: P1_001N = Total population.
+    PL rows for one county, served from cache_dir/<state><county>.json when present.
+    Responses are written to a temp file and renamed so a crash never leaves a partial cache file.
     """
-    out_csv.parent.mkdir(parents=True, exist_ok=True)
-    with out_csv.open("w", newline="", encoding="utf-8") as f:
+    cached = cache_dir / f"{state_fips}{county}.json"
+    if cached.exists():
+        return json.loads(cached.read_text())
+    # IMPORTANT: only request variables in 'get='. Geo fields come from for/in.
+    url = f"{base_url}?get=P1_001N&for=block:*&in=state:{state_fips}&in=county:{county}"
+    rows = _get_json(url, timeout=240, retries=retries)
+    tmp = cached.with_suffix(".json.part")
+    tmp.write_text(json.dumps(rows))
+    os.replace(tmp, cached)
+    return rows
+
+def _write_pl_csv(tmp_csv: Path, counties: list[str], futures):
+    """Stream each county's rows (futures in county order) into tmp_csv."""
+    with tmp_csv.open("w", newline="", encoding="utf-8") as f:
         w = csv.writer(f)
         w.writerow(["state","county","tract","block","geoid","pop"])
 
-        for co in counties:
-            # IMPORTANT: only request variables in 'get='. Geo fields come from for/in.
-            url = (
-                "https://api.census.gov/data/2020/dec/pl"
-                f"?get=P1_001N&for=block:*&in=state:{state_fips}&in=county:{co}"
-            )
-            r = _session.get(url, timeout=240)
-            r.raise_for_status()
-            rows = r.json()
+        # consume in county order; later counties keep downloading meanwhile
+        for co, fut in zip(counties, futures):
+            rows = fut.result()
             if not rows or len(rows) < 2:
                 continue
 
             header = rows[0]
             idx = {name: i for i, name in enumerate(header)}
             # Expect names: 'P1_001N', 'state', 'county', 'tract', 'block'
+            try:
+                ip, ist, ico, itr, ibl = (idx[k] for k in ("P1_001N", "state", "county", "tract", "block"))
+            except KeyError:
+                # If the API ever renames fields, dump header for debugging
+                raise RuntimeError(f"Unexpected PL header: {header}")
             for row in rows[1:]:
-                try:
-                    p1 = row[idx["P1_001N"]]
-                    st = row[idx["state"]]
-                    cnty = row[idx["county"]]
-                    tr = row[idx["tract"]]
-                    bl = row[idx["block"]]
-                except KeyError:
-                    # If the API ever renames fields, dump header for debugging
-                    raise RuntimeError(f"Unexpected PL header: {header}")
-
-                geoid = f"{st}{cnty}{tr}{bl}"
-                w.writerow([st, cnty, tr, bl, geoid, p1])
+                st, cnty, tr, bl = row[ist], row[ico], row[itr], row[ibl]
+                w.writerow([st, cnty, tr, bl, f"{st}{cnty}{tr}{bl}", row[ip]])
+
+def fetch_pl_block_pop_state(state_fips: str, counties: list[str], out_csv: Path, workers: int = 8,
+                             cache_dir: Path | None = None, base_url: str = PL_API, retries: int = 5):
+    """
+    Writes CSV: state,county,tract,block,geoid,pop
+    Uses PL 2020 API: P1_001N = Total population.
+    Counties are fetched `workers` at a time over the pooled session, each response cached on
+    disk (default: <out_csv dir>/.pl94_cache/<state>/), so a rerun only requests what is missing.
+    Rows are written in the given county order to a temp file that replaces out_csv on success.
+    The first failed county cancels every request that has not started yet.
+    """
+    out_csv = Path(out_csv)
+    out_csv.parent.mkdir(parents=True, exist_ok=True)
+    cache_dir = Path(cache_dir) if cache_dir else out_csv.parent / ".pl94_cache" / state_fips
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_csv = out_csv.with_suffix(out_csv.suffix + ".part")
 
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, POOL_SIZE))) as pool:
+        futures = [pool.submit(_fetch_county_rows, state_fips, co, cache_dir, base_url, retries)
+                   for co in counties]
+        try:
+            _write_pl_csv(tmp_csv, counties, futures)
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            tmp_csv.unlink(missing_ok=True)
+            raise
+    os.replace(tmp_csv, out_csv)
@@ -0,0 +1,222 @@
+# src/processing/graph_cache.py
+"""
+On-disk cache of the prepared block graph (block table + rook adjacency).
+
+Each entry is a directory of plain .npy arrays plus a meta.json, keyed by a hash of the
+blocks file, the PL94 CSV and GRAPH_BUILDER_VERSION. Arrays are uncompressed so they can be
+memory-mapped straight back in.
+"""
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from src.processing.build_block_graph import geoid_key
+from src.processing.plan_io import block_fingerprint
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+CACHE_ROOT = REPO_ROOT / "data" / "cache" / "graphs"
+
+# bump whenever load/attach/adjacency output changes so stale entries stop matching
+GRAPH_BUILDER_VERSION = "rook-strtree-4"
+
+# prune leaves temp dirs younger than this alone: they may belong to a save still in progress
+TEMP_GRACE_SECONDS = 6 * 3600
+
+# shapefile sidecars that affect what load_blocks() returns
+_SHP_SIDECARS = (".shp", ".shx", ".dbf", ".prj", ".cpg")
+
+
+def _hash_file(h, path: Path, chunk=1 << 20):
+    with path.open("rb") as f:
+        while True:
+            buf = f.read(chunk)
+            if not buf:
+                break
+            h.update(buf)
+
+
+def _input_files(path: Path) -> list[Path]:
+    if path.suffix.lower() == ".shp":
+        return [p for p in (path.with_suffix(s) for s in _SHP_SIDECARS) if p.exists()]
+    return [path]
+
+
+def hash_inputs(h, *paths: Path):
+    """Feed each input file (a shapefile with its sidecars) into hashlib object `h`, name then bytes."""
+    for path in paths:
+        for f in _input_files(Path(path)):
+            h.update(f.name.encode())
+            _hash_file(h, f)
+    return h
+
+
+def cache_key(blocks_path: Path, pl94_csv: Path, version: str = GRAPH_BUILDER_VERSION) -> str:
+    """sha256 over the block file (with sidecars), the PL94 CSV and the builder version."""
+    return hash_inputs(hashlib.sha256(version.encode()), blocks_path, pl94_csv).hexdigest()[:24]
+
+
+def entry_dir(key: str, root: Path = CACHE_ROOT) -> Path:
+    return Path(root) / key
+
+
+def has_entry(key: str, root: Path = CACHE_ROOT) -> bool:
+    return (entry_dir(key, root) / "meta.json").exists()
+
+
+def save_prepared(key: str, blocks: gpd.GeoDataFrame, edges, meta: dict | None = None,
+                  root: Path = CACHE_ROOT, overwrite: bool = False) -> Path:
+    """
+    Store the block table (int64 geoid, pop, area, perimeter, geometry as WKB) and the edge
+    arrays (src, dst, shared_len).
+    Written to a unique temp dir and moved into place with one os.replace, so readers never see
+    a partial entry; if another writer got there first, its entry (same inputs) is kept. With
+    `overwrite` an existing entry is renamed aside before the swap, never deleted in place.
+    """
+    src, dst, shared_len = edges
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    final = entry_dir(key, root)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{key}.", dir=root))
+    try:
+        wkb = shapely.to_wkb(blocks.geometry.values)
+        sizes = np.fromiter((len(b) for b in wkb), dtype=np.int64, count=len(wkb))
+        offsets = np.zeros(len(wkb) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+
+        np.save(tmp / "geoid.npy", geoid_key(blocks["geoid"]))
+        np.save(tmp / "pop.npy", blocks["pop"].to_numpy(dtype=np.int64))
+        np.save(tmp / "area.npy", blocks["area"].to_numpy(dtype=np.float64))
+        np.save(tmp / "perimeter.npy", blocks["perimeter"].to_numpy(dtype=np.float64))
+        np.save(tmp / "geometry_wkb.npy", np.frombuffer(b"".join(wkb), dtype=np.uint8))
+        np.save(tmp / "geometry_offsets.npy", offsets)
+        np.save(tmp / "src.npy", np.asarray(src, dtype=np.int32))
+        np.save(tmp / "dst.npy", np.asarray(dst, dtype=np.int32))
+        np.save(tmp / "shared_len.npy", np.asarray(shared_len, dtype=np.float64))
+
+        info = dict(meta or {})
+        info.update({
+            "key": key,
+            "version": GRAPH_BUILDER_VERSION,
+            "created": time.time(),
+            "n_blocks": int(len(blocks)),
+            "n_edges": int(len(src)),
+            "fingerprint": block_fingerprint(blocks["geoid"]),
+            "crs": blocks.crs.to_wkt() if blocks.crs is not None else None,
+        })
+        (tmp / "meta.json").write_text(json.dumps(info, indent=2))
+
+        if overwrite and final.exists():
+            stale = Path(tempfile.mkdtemp(prefix=f".{key}.old.", dir=root))
+            try:
+                os.replace(final, stale / key)
+            except FileNotFoundError:
+                pass  # a concurrent overwrite already moved it
+            shutil.rmtree(stale, ignore_errors=True)
+        try:
+            os.replace(tmp, final)
+        except OSError:
+            # a concurrent writer finished first: a non-empty dir can't be replaced
+            if not has_entry(key, root):
+                raise
+            shutil.rmtree(tmp, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return final
+
+
+def load_meta(key: str, root: Path = CACHE_ROOT) -> dict:
+    return json.loads((entry_dir(key, root) / "meta.json").read_text())
+
+
+def load_arrays(key: str, names=("geoid", "pop"), root: Path = CACHE_ROOT, mmap: bool = False) -> dict:
+    """Selected per-block / edge arrays of an entry, without decoding any geometry."""
+    d = entry_dir(key, root)
+    mode = "r" if mmap else None
+    return {name: np.load(d / f"{name}.npy", mmap_mode=mode) for name in names}
+
+
+def entry_fingerprint(key: str, root: Path = CACHE_ROOT) -> str:
+    """Block fingerprint of an entry (computed from geoid.npy for entries written before it was stored)."""
+    meta = load_meta(key, root)
+    return meta.get("fingerprint") or block_fingerprint(load_arrays(key, ("geoid",), root)["geoid"])
+
+
+def load_edges(key: str, root: Path = CACHE_ROOT, mmap: bool = False):
+    d = entry_dir(key, root)
+    mode = "r" if mmap else None
+    return tuple(np.load(d / f"{name}.npy", mmap_mode=mode) for name in ("src", "dst", "shared_len"))
+
+
+def load_prepared(key: str, root: Path = CACHE_ROOT):
+    """Inverse of save_prepared: returns (blocks GeoDataFrame, (src, dst, shared_len))."""
+    d = entry_dir(key, root)
+    meta = load_meta(key, root)
+    buf = np.load(d / "geometry_wkb.npy", mmap_mode="r")
+    offsets = np.load(d / "geometry_offsets.npy")
+    wkb = [buf[a:b].tobytes() for a, b in zip(offsets[:-1], offsets[1:])]
+    blocks = gpd.GeoDataFrame(
+        {"geoid": np.load(d / "geoid.npy"), "pop": np.load(d / "pop.npy"),
+         "area": np.load(d / "area.npy"), "perimeter": np.load(d / "perimeter.npy")},
+        geometry=shapely.from_wkb(wkb),
+        crs=meta.get("crs"),
+    )
+    return blocks, load_edges(key, root)
+
+
+def _dir_size(d: Path) -> int:
+    return sum(p.stat().st_size for p in d.iterdir() if p.is_file())
+
+
+def list_entries(root: Path = CACHE_ROOT) -> list[dict]:
+    """meta.json of every complete entry plus its size on disk, newest first."""
+    root = Path(root)
+    if not root.exists():
+        return []
+    out = []
+    for d in root.iterdir():
+        if d.is_dir() and not d.name.startswith(".") and (d / "meta.json").exists():
+            meta = json.loads((d / "meta.json").read_text())
+            meta["bytes"] = _dir_size(d)
+            meta["path"] = str(d)
+            out.append(meta)
+    return sorted(out, key=lambda m: m.get("created", 0), reverse=True)
+
+
+def prune(root: Path = CACHE_ROOT, keep: int | None = None, older_than_days: float | None = None,
+          stale_versions: bool = True, dry_run: bool = False) -> list[str]:
+    """
+    Remove cache entries. Drops entries from other builder versions (if stale_versions),
+    entries older than `older_than_days`, and everything beyond the newest `keep` of the
+    entries that survive those two checks. Temp dirs of interrupted writes are removed once
+    they are older than TEMP_GRACE_SECONDS. Returns removed keys.
+    """
+    root = Path(root)
+    removed = []
+    now = time.time()
+    kept = 0
+    for meta in list_entries(root):
+        drop = (
+            (stale_versions and meta.get("version") != GRAPH_BUILDER_VERSION)
+            or (older_than_days is not None and now - meta.get("created", 0) > older_than_days * 86400)
+        )
+        if not drop:
+            kept += 1
+            drop = keep is not None and kept > keep
+        if drop:
+            removed.append(meta["key"])
+            if not dry_run:
+                shutil.rmtree(meta["path"], ignore_errors=True)
+    if root.exists() and not dry_run:
+        for d in root.glob(".*"):
+            if d.is_dir() and now - d.stat().st_mtime > TEMP_GRACE_SECONDS:
+                shutil.rmtree(d, ignore_errors=True)
+    return removed
@@ -0,0 +1,119 @@
+# src/processing/plan_io.py
+"""
+Assignment-only plan files and on-demand geometry.
+
+A plan is a .npz holding the block-ordered district vector (int8 when k <= 127, else int16),
+the fingerprint of the block set it indexes (hash of the ordered GEOIDs) and a JSON `meta`
+string (state, k, inputs, graph cache key, ...). That's ~1 byte per block, so plans are cheap
+to write per run or per ensemble member; district polygons are only built by
+dissolve_districts when a map is actually needed (see cli/materialize_plan.py).
+"""
+from pathlib import Path
+import hashlib
+import json
+
+import numpy as np
+import shapely
+
+from src.algorithms.graph import geoid_strings
+
+PLAN_FORMAT_VERSION = 1
+
+
+def block_fingerprint(geoids) -> str:
+    """
+    sha256 over the ordered GEOIDs, so a plan can't be applied to a different block table.
+    String and int64 GEOID columns of the same blocks give the same fingerprint.
+    """
+    h = hashlib.sha256()
+    h.update("\n".join(geoid_strings(geoids).tolist()).encode())
+    return h.hexdigest()[:24]
+
+
+def district_dtype(k: int):
+    return np.int8 if k <= np.iinfo(np.int8).max else np.int16
+
+
+def save_plan(path: Path, assignment, fingerprint: str, meta: dict | None = None) -> Path:
+    """Write `assignment` (one district id per block, in block-table order) as a plan .npz."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    assignment = np.asarray(assignment)
+    k = int(assignment.max()) + 1
+    info = {"format": PLAN_FORMAT_VERSION, "n_blocks": int(len(assignment)), "k": k, **(meta or {})}
+    np.savez(path, district=assignment.astype(district_dtype(k)),
+             fingerprint=np.array(fingerprint), meta=np.array(json.dumps(info)))
+    return path
+
+
+def load_plan(path: Path) -> dict:
+    """{"district": int8/int16 array, "fingerprint": str, "meta": dict} from a plan .npz."""
+    with np.load(Path(path)) as z:
+        if "district" not in z.files:
+            raise ValueError(f"{path} is not a plan file (no 'district' array)")
+        return {"district": z["district"], "fingerprint": str(z["fingerprint"]),
+                "meta": json.loads(str(z["meta"]))}
+
+
+def is_plan_file(path: Path) -> bool:
+    return Path(path).suffix.lower() == ".npz"
+
+
+def check_fingerprint(plan: dict, geoids=None, fingerprint: str | None = None):
+    """Raise ValueError unless the plan was made for this block table."""
+    fingerprint = fingerprint or block_fingerprint(geoids)
+    if plan["fingerprint"] != fingerprint:
+        raise ValueError(f"plan block fingerprint {plan['fingerprint']} does not match the block table "
+                         f"({fingerprint}); was it built from different inputs?")
+    if len(plan["district"]) != plan["meta"].get("n_blocks", len(plan["district"])):
+        raise ValueError("plan district vector length does not match its n_blocks")
+
+
+def dissolve_districts(blocks, assignment, method: str = "coverage", rtol: float = 1e-6):
+    """
+    District polygons with summed pop from a block GeoDataFrame and a district vector.
+
+    method="coverage" groups the block geometries by district and uses shapely's
+    coverage_union_all: blocks tile the state edge-to-edge, so only the linework shared by two
+    blocks of the same district has to be dropped instead of running a general overlay union.
+    A district whose result is invalid or whose area differs from the sum of its block areas
+    by more than `rtol` (i.e. the blocks weren't a clean coverage) falls back to union_all.
+    method="union" is the plain GeoDataFrame.dissolve.
+    """
+    import geopandas as gpd
+    district = np.asarray(assignment)
+    if method == "union" or not hasattr(shapely, "coverage_union_all"):
+        blocks = blocks[["geoid", "pop", "geometry"]].assign(district=district)
+        return blocks.dissolve(by="district", aggfunc={"pop": "sum"}).reset_index()
+    if method != "coverage":
+        raise ValueError(f"method must be 'coverage' or 'union', not {method!r}")
+
+    geoms = np.asarray(blocks.geometry.values)
+    k = int(district.max()) + 1
+    order = np.argsort(district, kind="stable")
+    bounds = np.searchsorted(district[order], np.arange(k + 1))
+    block_area = np.bincount(district, weights=shapely.area(geoms), minlength=k)
+    out = []
+    for d in range(k):
+        part = geoms[order[bounds[d]:bounds[d + 1]]]
+        geom = shapely.coverage_union_all(part)
+        if not shapely.is_valid(geom) or abs(shapely.area(geom) - block_area[d]) > rtol * max(block_area[d], 1e-300):
+            geom = shapely.union_all(part)
+        out.append(geom)
+    pop = np.bincount(district, weights=blocks["pop"].to_numpy(), minlength=k).astype(np.int64)
+    return gpd.GeoDataFrame({"district": np.arange(k), "pop": pop}, geometry=out,
+                            crs=blocks.crs)[["district", "geometry", "pop"]]
+
+
+def write_districts(districts, out_path: Path) -> Path:
+    """Write district polygons, picking the driver from the extension."""
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    ext = out_path.suffix.lower()
+    if ext == ".gpkg":
+        districts.to_file(out_path, layer="districts", driver="GPKG")
+    elif ext in (".geojson", ".json"):
+        districts.to_file(out_path, driver="GeoJSON")
+    else:
+        districts.to_file(out_path)  # let GeoPandas infer
+    return out_path
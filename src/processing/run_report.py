@@ -0,0 +1,150 @@
+# src/processing/run_report.py
+"""
+Stage timing / memory instrumentation and the JSON run report for generate_plan.
+
+    report = RunReport(meta={"state": "OR"})
+    with report.stage("load"):
+        blocks = load_blocks(path)
+    report.count("grow", grow_stats)
+    report.write(out_path.with_name(f"{out_path.stem}_report.json"))
+
+Every stage records wall time, the process RSS after the stage and the process peak RSS
+(ru_maxrss) so far. With trace_memory=True tracemalloc is also running and each stage records
+the peak Python heap it reached; with profile=True the whole run is under cProfile and the top
+functions by cumulative time go into the report (and the raw stats to a .prof file).
+"""
+from contextlib import contextmanager
+from pathlib import Path
+import cProfile
+import json
+import os
+import platform
+import pstats
+import subprocess
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def rss_mb() -> float | None:
+    """Current resident set size in MB (Linux only; None elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process in MB."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # KiB on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _git_revision() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                             capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def _round(v, nd=3):
+    return None if v is None else round(v, nd)
+
+
+class RunReport:
+    """Collects per-stage timings/memory and algorithm counters for one run."""
+
+    def __init__(self, meta: dict | None = None, trace_memory: bool = False, profile: bool = False,
+                 log=print):
+        self.meta = dict(meta or {})
+        self.stages = []
+        self.counters = {}
+        self.trace_memory = trace_memory
+        self.log = log
+        self._t0 = time.perf_counter()
+        self._profiler = cProfile.Profile() if profile else None
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self._profiler:
+            self._profiler.enable()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block of work; the record is kept even if the block raises."""
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        rec = {"stage": name}
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        except BaseException as e:
+            rec["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            rec["seconds"] = _round(time.perf_counter() - t0)
+            rec["rss_mb"] = _round(rss_mb(), 1)
+            rec["peak_rss_mb"] = _round(peak_rss_mb(), 1)
+            if self.trace_memory:
+                rec["py_peak_mb"] = _round(tracemalloc.get_traced_memory()[1] / 2**20, 1)
+            self.stages.append(rec)
+            if self.log:
+                self.log(f"[run] stage {name}: {rec['seconds']:.2f}s, rss {rec['rss_mb'] or 0:.0f} MB, "
+                         f"peak {rec['peak_rss_mb'] or 0:.0f} MB")
+
+    def count(self, name: str, values: dict):
+        """Merge algorithm counters (e.g. a `stats` dict) under `name`."""
+        self.counters.setdefault(name, {}).update(values)
+
+    def stop(self, top: int = 30):
+        """Stop profiling/tracing; returns the profile summary (or None)."""
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        if not self._profiler:
+            return None
+        self._profiler.disable()
+        st = pstats.Stats(self._profiler)
+        rows = []
+        for (file, line, func), (cc, nc, tt, ct, _) in sorted(st.stats.items(), key=lambda kv: -kv[1][3])[:top]:
+            rows.append({"function": f"{Path(file).name}:{line}({func})", "calls": nc,
+                         "tottime": _round(tt), "cumtime": _round(ct)})
+        return rows
+
+    def to_dict(self) -> dict:
+        return {
+            **self.meta,
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seconds": _round(time.perf_counter() - self._t0),
+            "peak_rss_mb": _round(peak_rss_mb(), 1),
+            "stages": self.stages,
+            "counters": self.counters,
+        }
+
+    def write(self, path: Path, result: dict | None = None) -> Path:
+        """Stop any profiler and write the report (plus `<path stem>.prof` when profiling)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        report = self.to_dict()
+        if result:
+            report["result"] = result
+        profile = self.stop()
+        if profile is not None:
+            prof_path = path.with_suffix(".prof")
+            self._profiler.dump_stats(prof_path)
+            report["profile"] = {"path": str(prof_path), "top": profile}
+        path.write_text(json.dumps(report, indent=2, default=str))
+        return path
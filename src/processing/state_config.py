@@ -0,0 +1,27 @@
+# src/processing/state_config.py
+"""
+configs/states.yaml as the single list of supported states: postal code -> name, FIPS,
+district count, tolerance and objective weights. CLIs take their --state choices and FIPS
+codes from here, so adding a state is one YAML entry.
+"""
+from functools import lru_cache
+from pathlib import Path
+
+import yaml
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+CONFIG_PATH = REPO_ROOT / "configs" / "states.yaml"
+
+
+@lru_cache(maxsize=None)
+def load_states(path: Path = CONFIG_PATH) -> dict:
+    return yaml.safe_load(Path(path).read_text())
+
+
+def state_codes(path: Path = CONFIG_PATH) -> list[str]:
+    return list(load_states(path))
+
+
+def state_fips(state: str, path: Path = CONFIG_PATH) -> str:
+    """Two-digit FIPS for a postal code in states.yaml (KeyError for unknown states)."""
+    return str(load_states(path)[state.upper()]["fips"]).zfill(2)
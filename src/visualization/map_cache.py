@@ -0,0 +1,122 @@
+# src/visualization/map_cache.py
+"""
+Simplified district geometry at a few zoom levels, computed once per plan and cached.
+
+District polygons share their borders, so they are simplified together with shapely's
+coverage_simplify: each shared edge is simplified once and both neighbours keep the same
+line (no slivers or gaps), unlike simplifying every polygon on its own. Tolerances are a
+fraction of the state's bounding-box diagonal, so the vertex count of a level depends on the
+map extent rather than on how many blocks went into the districts.
+
+Each level is stored as EPSG:4326 GeoJSON with coordinates rounded to ~1 m under
+data/cache/maps/<plan key>/, ready for the web map and quick to re-render.
+"""
+from pathlib import Path
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import shapely
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+MAP_CACHE_ROOT = REPO_ROOT / "data" / "cache" / "maps"
+
+# level -> tolerance as a fraction of the bbox diagonal (coarse to fine)
+LEVELS = {"state": 1 / 400, "region": 1 / 2000, "detail": 1 / 10000}
+COORD_DECIMALS = 5  # ~1 m in lon/lat
+
+
+def plan_key(district, fingerprint: str) -> str:
+    """Identity of a plan: its block fingerprint plus the district vector."""
+    h = hashlib.sha256(fingerprint.encode())
+    h.update(np.ascontiguousarray(np.asarray(district, dtype=np.int16)).tobytes())
+    return h.hexdigest()[:24]
+
+
+def file_key(path: Path) -> str:
+    """Identity of a district file (GeoJSON/GPKG/...): hash of its bytes."""
+    h = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for buf in iter(lambda: f.read(1 << 20), b""):
+            h.update(buf)
+    return h.hexdigest()[:24]
+
+
+def simplify_coverage(geoms, tolerance: float):
+    """Topology-preserving simplification of polygons that tile an area edge-to-edge."""
+    geoms = np.asarray(geoms)
+    if hasattr(shapely, "coverage_simplify"):
+        out = shapely.coverage_simplify(geoms, tolerance)
+        if shapely.is_valid(out).all():
+            return out
+    # older GEOS, or not a clean coverage: per-polygon simplify (shared edges may drift apart)
+    return shapely.simplify(geoms, tolerance, preserve_topology=True)
+
+
+def level_path(key: str, level: str, root: Path = MAP_CACHE_ROOT) -> Path:
+    return Path(root) / key / f"{level}.geojson"
+
+
+def build_levels(districts, key: str, levels=tuple(LEVELS), root: Path = MAP_CACHE_ROOT,
+                 overwrite: bool = False) -> dict:
+    """
+    Simplify `districts` (GeoDataFrame, projected or not) at each level and write the cache
+    entry. Non-geometry columns are kept as feature properties. Returns {level: path}.
+    Like graph_cache.save_prepared, the entry is written to a temp dir and moved into place with
+    one os.replace; a complete entry from a concurrent writer is kept unless `overwrite`.
+    """
+    geoms = districts.geometry.values
+    xmin, ymin, xmax, ymax = shapely.total_bounds(geoms)
+    diag = float(np.hypot(xmax - xmin, ymax - ymin))
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    final = root / key
+    tmp = Path(tempfile.mkdtemp(prefix=f".{key}.", dir=root))
+    try:
+        info = {}
+        for level in levels:
+            simple = districts.set_geometry(simplify_coverage(geoms, diag * LEVELS[level]), crs=districts.crs)
+            if simple.crs is not None:
+                simple = simple.to_crs(4326)
+            simple = simple.set_geometry(shapely.set_precision(simple.geometry.values, 10.0**-COORD_DECIMALS))
+            path = tmp / level_path(key, level, root).name
+            path.write_text(simple.to_json(drop_id=True))
+            info[level] = {"vertices": int(shapely.get_num_coordinates(simple.geometry.values).sum()),
+                           "bytes": path.stat().st_size}
+        (tmp / "meta.json").write_text(json.dumps({"key": key, "districts": len(districts), "levels": info}, indent=2))
+
+        if final.exists() and (overwrite or cached_levels(key, levels, root) is None):
+            # rebuilding, or a partial entry left by an older writer: move it aside, never delete in place
+            stale = Path(tempfile.mkdtemp(prefix=f".{key}.old.", dir=root))
+            try:
+                os.replace(final, stale / key)
+            except FileNotFoundError:
+                pass
+            shutil.rmtree(stale, ignore_errors=True)
+        try:
+            os.replace(tmp, final)
+        except OSError:
+            # a concurrent writer finished first: a non-empty dir can't be replaced
+            if cached_levels(key, levels, root) is None:
+                raise
+            shutil.rmtree(tmp, ignore_errors=True)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return {level: level_path(key, level, root) for level in levels}
+
+
+def cached_levels(key: str, levels=tuple(LEVELS), root: Path = MAP_CACHE_ROOT) -> dict | None:
+    """{level: path} if the entry's meta.json and every requested level are cached, else None."""
+    paths = {level: level_path(key, level, root) for level in levels}
+    if not (Path(root) / key / "meta.json").exists():
+        return None
+    return paths if all(p.exists() for p in paths.values()) else None
+
+
+def load_level(path: Path):
+    import geopandas as gpd
+    return gpd.read_file(path)
@@ -1,7 +1,11 @@
 import matplotlib.pyplot as plt
 
-def plot_compactness(gdf, score_column='polsby_popper', cmap='viridis'):
-    """Plot districts color-coded by a compactness score."""
+def plot_compactness(gdf, score_column='polsby_popper', cmap='viridis', out_path=None):
+    """Plot districts color-coded by a compactness score (to a headless PNG if out_path is given)."""
+    if out_path:
+        from src.visualization.render import save_png
+        return save_png(gdf, out_path, column=score_column, cmap=cmap,
+                        title=f"District Compactness by {score_column}")
     fig, ax = plt.subplots(1, 1, figsize=(10, 8))
     gdf.plot(column=score_column, cmap=cmap, legend=True, ax=ax)
     ax.set_title(f"District Compactness by {score_column}")
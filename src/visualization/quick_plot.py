@@ -1,6 +1,10 @@
 import matplotlib.pyplot as plt
 
-def plot_districts(gdf, label_col="district"):
+def plot_districts(gdf, label_col="district", out_path=None):
+    """Show the districts, or with out_path write a headless PNG instead (batch runs)."""
+    if out_path:
+        from src.visualization.render import save_png
+        return save_png(gdf, out_path, column=label_col, title="Generated Districts")
     ax = gdf.plot(edgecolor="black", linewidth=0.2, figsize=(8,8))
     ax.set_axis_off()
     plt.title("Generated Districts")
@@ -0,0 +1,72 @@
+# src/visualization/render.py
+"""
+Headless PNG and lightweight web-map output for district layers (usually a cached
+simplified level from map_cache). Both color either by district (categorical) or by a
+numeric column such as pp or dev.
+"""
+from pathlib import Path
+
+import numpy as np
+
+DISTRICT_PALETTE = ["#1f77b4", "#ff7f0e", "#2ca02c", "#d62728", "#9467bd", "#8c564b", "#e377c2",
+                    "#7f7f7f", "#bcbd22", "#17becf", "#aec7e8", "#ffbb78", "#98df8a", "#ff9896",
+                    "#c5b0d5", "#c49c94", "#f7b6d2", "#dbdb8d", "#9edae5", "#393b79"]
+
+
+def district_colors(district):
+    return [DISTRICT_PALETTE[int(d) % len(DISTRICT_PALETTE)] for d in district]
+
+
+def save_png(districts, out_path: Path, column: str = "district", title: str | None = None,
+             cmap: str = "viridis", size: float = 8.0, dpi: int = 120) -> Path:
+    """
+    Render to a PNG without a display: uses a bare matplotlib Figure (Agg canvas), so it
+    works in batch runs and never touches the pyplot global state.
+    """
+    from matplotlib.figure import Figure
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    fig = Figure(figsize=(size, size))
+    ax = fig.add_subplot()
+    if column == "district":
+        districts.plot(color=district_colors(districts["district"]), edgecolor="black", linewidth=0.3, ax=ax)
+    else:
+        districts.plot(column=column, cmap=cmap, legend=True, edgecolor="black", linewidth=0.3, ax=ax)
+    ax.set_axis_off()
+    ax.set_title(title or ("Districts" if column == "district" else f"Districts by {column}"))
+    fig.savefig(out_path, dpi=dpi, bbox_inches="tight")
+    return out_path
+
+
+def web_map(districts, out_path: Path, column: str = "district", cmap: str = "viridis",
+            tooltip=("district", "pop", "dev", "pp")) -> Path:
+    """Self-contained folium HTML map of an EPSG:4326 district layer."""
+    try:
+        import folium
+        import branca.colormap as cm
+    except ImportError as e:
+        raise RuntimeError("web maps need folium (pip install folium)") from e
+    out_path = Path(out_path)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    xmin, ymin, xmax, ymax = districts.total_bounds
+    m = folium.Map(tiles="OpenStreetMap", control_scale=True)
+    m.fit_bounds([[ymin, xmin], [ymax, xmax]])
+
+    if column == "district":
+        colors = dict(zip(districts["district"].astype(int), district_colors(districts["district"])))
+        color_of = lambda props: colors[int(props["district"])]
+    else:
+        values = districts[column].to_numpy(dtype=float)
+        scale = getattr(cm.linear, cmap).scale(float(np.nanmin(values)), float(np.nanmax(values)))
+        scale.caption = column
+        scale.add_to(m)
+        color_of = lambda props: scale(props[column])
+    fields = [f for f in tooltip if f in districts.columns]
+    folium.GeoJson(
+        districts.__geo_interface__, name="districts",
+        style_function=lambda f: {"fillColor": color_of(f["properties"]), "color": "#333333",
+                                  "weight": 0.8, "fillOpacity": 0.6},
+        tooltip=folium.GeoJsonTooltip(fields=fields) if fields else None,
+    ).add_to(m)
+    m.save(str(out_path))
+    return out_path
@@ -0,0 +1,68 @@
+# tests/test_compactness.py
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+
+from src.algorithms.compactness import DistrictShapes, shape_metrics
+from src.algorithms.graph import BlockGraph
+from src.processing.build_block_graph import projected_geometry, rook_adjacency
+
+ROWS, COLS = 8, 10
+
+
+@pytest.fixture
+def blocks():
+    """Lon/lat (EPSG:4269) grid of 0.01-degree blocks in Oregon, like a TIGER tabblock file."""
+    cells = [shapely.box(-122.6 + 0.01 * x, 44.9 + 0.01 * y, -122.6 + 0.01 * (x + 1), 44.9 + 0.01 * (y + 1))
+             for y in range(ROWS) for x in range(COLS)]
+    return gpd.GeoDataFrame({"pop": np.ones(len(cells), dtype=np.int64)}, geometry=cells, crs=4269)
+
+
+def block_graph(blocks):
+    geoms = projected_geometry(blocks)
+    src, dst, shared_len = rook_adjacency(geoms)
+    return BlockGraph.from_edges(len(blocks), src, dst, blocks["pop"].to_numpy(), shared_len=shared_len,
+                                 area=shapely.area(geoms), perimeter=shapely.length(geoms))
+
+
+def dissolved_pp(blocks, assignment):
+    districts = blocks.assign(district=assignment).dissolve(by="district")
+    return shape_metrics(districts.to_crs(blocks.estimate_utm_crs()).geometry.values)[2]
+
+
+def test_projected_geometry_is_metric(blocks):
+    area = shapely.area(projected_geometry(blocks))
+    # a 0.01-degree cell at 45N is roughly 790 m x 1110 m
+    assert area == pytest.approx(np.full(len(blocks), 790 * 1110), rel=0.02)
+
+
+def test_incremental_pp_matches_dissolve(blocks):
+    graph = block_graph(blocks)
+    # three vertical bands, then move a few blocks across the borders
+    assignment = np.arange(len(blocks)) % COLS * 3 // COLS
+    shapes = DistrictShapes(graph, assignment, 3)
+    np.testing.assert_allclose(shapes.scores(), dissolved_pp(blocks, assignment), rtol=1e-6)
+
+    for n, dst in ((4, 0), (14, 0), (26, 2), (57, 1)):
+        shapes.apply(n, assignment, dst)
+        assignment[n] = dst
+    np.testing.assert_allclose(shapes.scores(), dissolved_pp(blocks, assignment), rtol=1e-6)
+
+
+def test_unit_delta_matches_moving_blocks_one_by_one(blocks):
+    graph = block_graph(blocks)
+    assignment = np.arange(len(blocks)) % COLS * 3 // COLS
+    shapes = DistrictShapes(graph, assignment, 3)
+    unit = (4, 14, 15, 24)  # an L of band-1 blocks on the 0 | 1 border
+    gain = shapes.unit_gain(unit, assignment, 0)
+    da, d_src, d_dst = shapes.unit_delta(unit, assignment, 0)
+
+    before = shapes.scores()
+    area, perimeter = list(shapes.area), list(shapes.perimeter)
+    for n in unit:
+        shapes.apply(n, assignment, 0)
+        assignment[n] = 0
+    assert (da, d_src, d_dst) == pytest.approx((shapes.area[0] - area[0], shapes.perimeter[1] - perimeter[1],
+                                                shapes.perimeter[0] - perimeter[0]))
+    assert gain == pytest.approx(sum(shapes.scores()) - sum(before))
@@ -0,0 +1,58 @@
+# tests/test_dissolve.py
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+
+from src.processing import plan_io
+from src.processing.plan_io import dissolve_districts
+
+SIDE = 6
+
+pytestmark = pytest.mark.skipif(not hasattr(shapely, "coverage_union_all"),
+                                reason="shapely without coverage_union_all always uses the plain dissolve")
+
+
+def grid_blocks(overlap=0.0):
+    """SIDE x SIDE unit blocks; `overlap` widens every block so neighbours overlap (not a coverage)."""
+    cells = [shapely.box(x, y, x + 1 + overlap, y + 1) for y in range(SIDE) for x in range(SIDE)]
+    return gpd.GeoDataFrame({"geoid": [f"41001000100{i:04d}" for i in range(len(cells))],
+                             "pop": np.arange(len(cells), dtype=np.int64)}, geometry=cells)
+
+
+def assignment():
+    """Three districts: an L along the left and bottom edges and two bands over the rest."""
+    i = np.arange(SIDE * SIDE)
+    x, y = i % SIDE, i // SIDE
+    return np.where((x < 2) | (y < 1), 0, np.where(x < 4, 1, 2))
+
+
+def assert_same_geometry(got, blocks, district, tol=1e-9):
+    ref = blocks.assign(district=district).dissolve(by="district", aggfunc={"pop": "sum"})
+    assert got["district"].tolist() == ref.index.tolist()
+    assert got["pop"].tolist() == ref["pop"].tolist()
+    for geom, ref_geom in zip(got.geometry.values, ref.geometry.values):
+        assert shapely.is_valid(geom)
+        assert shapely.area(shapely.symmetric_difference(geom, ref_geom)) <= tol * shapely.area(ref_geom)
+
+
+def test_coverage_union_matches_dissolve(monkeypatch):
+    real_union_all = shapely.union_all
+    calls = []
+    monkeypatch.setattr(plan_io.shapely, "union_all", lambda *a, **kw: calls.append(1) or real_union_all(*a, **kw))
+    blocks, district = grid_blocks(), assignment()
+    got = dissolve_districts(blocks, district)
+    assert not calls  # a clean coverage never needs the general union
+    monkeypatch.undo()
+    assert_same_geometry(got, blocks, district)
+
+
+def test_fallback_union_matches_dissolve(monkeypatch):
+    real_union_all = shapely.union_all
+    calls = []
+    monkeypatch.setattr(plan_io.shapely, "union_all", lambda *a, **kw: calls.append(1) or real_union_all(*a, **kw))
+    blocks, district = grid_blocks(overlap=0.25), assignment()
+    got = dissolve_districts(blocks, district)
+    assert len(calls) == 3  # overlapping blocks: every district falls back
+    monkeypatch.undo()
+    assert_same_geometry(got, blocks, district)
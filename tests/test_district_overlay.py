@@ -0,0 +1,18 @@
+# tests/test_district_overlay.py
+import shapely
+
+from src.processing.district_overlay import block_districts
+
+
+def test_ties_go_to_the_lowest_district_index():
+    districts = [shapely.box(2, 0, 3, 1), shapely.box(1, 0, 2, 1), shapely.box(0, 0, 1, 1)]
+    blocks = [
+        shapely.box(1.9, 0.4, 2.1, 0.6),   # representative point on the 0 | 1 border
+        shapely.box(0.9, 0.4, 1.1, 0.6),   # on the 1 | 2 border
+        shapely.box(0.4, 0.4, 0.6, 0.6),   # inside 2
+        shapely.box(1.4, 2.0, 1.6, 2.2),   # outside every district, nearest is 1
+        shapely.box(1.9, 2.0, 2.1, 2.2),   # outside, equally near 0 and 1
+    ]
+    district, unmatched = block_districts(blocks, districts)
+    assert district.tolist() == [0, 1, 2, 1, 0]
+    assert unmatched == 2
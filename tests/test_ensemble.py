@@ -0,0 +1,27 @@
+# tests/test_ensemble.py
+import numpy as np
+import pytest
+
+from src.algorithms.ensemble import plan_metrics, plan_score
+from src.algorithms.graph import BlockGraph
+from src.algorithms.objectives import build_objectives
+
+
+@pytest.fixture
+def path_graph():
+    """Six blocks in a row; blocks 0-2 and 3-5 are two block groups."""
+    geoids = np.array([f"41001000100{bg}{i:03d}" for i, bg in enumerate([1, 1, 1, 2, 2, 2])])
+    src, dst = np.arange(5), np.arange(1, 6)
+    return BlockGraph.from_edges(6, src, dst, np.full(6, 10), geoids=geoids)
+
+
+def test_coi_splits_are_scored_with_the_coi_weight(path_graph):
+    layers = {"river": ["410010001001"], "valley": ["410010001002"]}
+    weights = {"coi": 0.5}
+    assignment = np.array([0, 0, 1, 1, 1, 1])  # "river" is split, "valley" is not
+    objectives = build_objectives(path_graph, assignment, weights, layers)
+
+    metrics = plan_metrics(path_graph, assignment, 2, 30.0, objectives=objectives)
+    assert metrics["coi_splits"] == 1
+    without = plan_score({**metrics, "coi_splits": 0}, weights, 0.01)
+    assert plan_score(metrics, weights, 0.01) == pytest.approx(without + 0.5)
@@ -0,0 +1,118 @@
+# tests/test_fetch_census.py
+import csv
+import json
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import requests
+
+from src.processing import fetch_census
+from src.processing.fetch_census import fetch_pl_block_pop_state
+
+HEADER = ["P1_001N", "state", "county", "tract", "block"]
+
+
+@pytest.fixture
+def pl_api():
+    """Local stand-in for the PL API: two blocks per county, HTTP 400 for county "999"."""
+    seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        delay = 0.0
+
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            county = next(v.split(":")[1] for v in query["in"] if v.startswith("county:"))
+            seen.append(county)
+            if county == "999":
+                self.send_response(400)
+                self.end_headers()
+                return
+            time.sleep(Handler.delay)
+            rows = [HEADER] + [[str(10 * b + 1), "41", county, "000100", f"100{b}"] for b in range(2)]
+            body = json.dumps(rows).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}/data/2020/dec/pl", seen, Handler
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_writes_counties_in_order_and_reuses_cache(pl_api, tmp_path):
+    base_url, seen, _ = pl_api
+    out = tmp_path / "pl.csv"
+    fetch_pl_block_pop_state("41", ["003", "001", "005"], out, workers=3, base_url=base_url)
+
+    with out.open(newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["state", "county", "tract", "block", "geoid", "pop"]
+    assert [r[1] for r in rows[1:]] == ["003", "003", "001", "001", "005", "005"]
+    assert rows[1] == ["41", "003", "000100", "1000", "410030001001000", "1"]
+    assert sorted(seen) == ["001", "003", "005"]
+
+    fetch_pl_block_pop_state("41", ["003", "001", "005"], out, base_url=base_url)
+    assert len(seen) == 3  # second run is served from the on-disk cache
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_failed_county_cancels_pending_requests(pl_api, tmp_path):
+    base_url, seen, handler = pl_api
+    handler.delay = 0.2
+    out = tmp_path / "pl.csv"
+    counties = ["999"] + [f"{c:03d}" for c in range(1, 20)]
+    with pytest.raises(requests.HTTPError):
+        fetch_pl_block_pop_state("41", counties, out, workers=1, base_url=base_url, retries=0)
+
+    # the one request already in flight may finish; nothing after it is sent
+    assert len(seen) <= 2
+    assert not out.exists()
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_interrupted_extraction_is_redone(tmp_path, monkeypatch):
+    """A refresh that dies between sidecar replaces must not leave members recorded as current."""
+    url = "https://example.invalid/tl_2022_41_tabblock20.zip"
+    out = tmp_path / "raw"
+    (out / fetch_census.ARCHIVE_DIR).mkdir(parents=True)
+    archive = out / fetch_census.ARCHIVE_DIR / "tl_2022_41_tabblock20.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("tl.dbf", "new dbf")
+        zf.writestr("tl.shp", "new shp")
+    (out / "tl.dbf").write_text("old")
+    (out / "tl.shp").write_text("old")
+    fetch_census._write_manifest(out, {url: {
+        "size": archive.stat().st_size, "sha256": fetch_census._sha256(archive),
+        "members": {"tl.dbf": 3, "tl.shp": 4},  # stale sizes: the archive is newer than the files
+    }})
+
+    real_replace = fetch_census.os.replace
+    def replace(src, dst):
+        if str(dst).endswith(".shp"):
+            raise OSError("interrupted")
+        real_replace(src, dst)
+    monkeypatch.setattr(fetch_census.os, "replace", replace)
+    with pytest.raises(OSError):
+        fetch_census._download_and_extract(url, out)
+    assert (out / "tl.dbf").read_text() == "new dbf" and (out / "tl.shp").read_text() == "old"
+    assert "members" not in fetch_census._read_manifest(out)[url]
+
+    monkeypatch.setattr(fetch_census.os, "replace", real_replace)
+    fetch_census._download_and_extract(url, out)
+    assert (out / "tl.shp").read_text() == "new shp"
+    assert fetch_census._read_manifest(out)[url]["members"] == {"tl.dbf": 7, "tl.shp": 7}
@@ -0,0 +1,18 @@
+# tests/test_generate_plan_report.py
+import json
+
+import pytest
+
+from src.cli.generate_plan import run
+
+
+def test_failed_run_still_writes_report(tmp_path):
+    blocks, pl = tmp_path / "blocks.shp", tmp_path / "pl94.csv"
+    blocks.write_bytes(b"not a shapefile")
+    pl.write_text("geoid,pop\n")
+    with pytest.raises(Exception):
+        run("OR", blocks, pl, tmp_path / "plan.npz", use_cache=False)
+
+    report = json.loads((tmp_path / "plan_report.json").read_text())
+    assert report["result"]["error"]
+    assert report["stages"][-1]["stage"] == "load" and "error" in report["stages"][-1]
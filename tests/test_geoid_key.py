@@ -0,0 +1,24 @@
+# tests/test_geoid_key.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.algorithms.graph import geoid_strings
+from src.processing.build_block_graph import geoid_key
+from src.processing.plan_io import block_fingerprint
+
+GEOIDS = ["010010201001000", "010010201001001", "480010201001002"]
+
+
+def test_int64_keys_round_trip_and_keep_fingerprint():
+    keys = geoid_key(GEOIDS)
+    assert keys.dtype == np.int64
+    assert geoid_strings(keys).tolist() == GEOIDS
+    assert block_fingerprint(keys) == block_fingerprint(GEOIDS)
+    assert geoid_key(pd.Series(GEOIDS).astype("category")).tolist() == keys.tolist()
+
+
+@pytest.mark.parametrize("bad", [["01001x", "1"], [None, "1"], pd.Series(["1", None]).astype("category")])
+def test_non_numeric_geoids_raise(bad):
+    with pytest.raises(ValueError):
+        geoid_key(bad)
@@ -0,0 +1,35 @@
+# tests/test_graph_cache_prune.py
+import json
+import os
+import time
+
+from src.processing import graph_cache
+
+
+def _entry(root, key, version=graph_cache.GRAPH_BUILDER_VERSION, age_days=0.0):
+    d = root / key
+    d.mkdir()
+    meta = {"key": key, "version": version, "created": time.time() - age_days * 86400}
+    (d / "meta.json").write_text(json.dumps(meta))
+
+
+def test_keep_counts_only_valid_entries(tmp_path):
+    _entry(tmp_path, "new-stale", version="old", age_days=0)
+    _entry(tmp_path, "a", age_days=1)
+    _entry(tmp_path, "b", age_days=2)
+    _entry(tmp_path, "c", age_days=3)
+    removed = graph_cache.prune(tmp_path, keep=2)
+    assert sorted(removed) == ["c", "new-stale"]
+    assert sorted(d.name for d in tmp_path.iterdir()) == ["a", "b"]
+
+
+def test_recent_temp_dirs_survive(tmp_path):
+    fresh, old = tmp_path / ".k.fresh", tmp_path / ".k.old"
+    for d in (fresh, old):
+        d.mkdir()
+        (d / "meta.json").write_text("{}")
+    past = time.time() - graph_cache.TEMP_GRACE_SECONDS - 60
+    os.utime(old, (past, past))
+    assert graph_cache.list_entries(tmp_path) == []
+    graph_cache.prune(tmp_path)
+    assert fresh.exists() and not old.exists()
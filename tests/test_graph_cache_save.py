@@ -0,0 +1,24 @@
+# tests/test_graph_cache_save.py
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from src.processing import graph_cache
+
+
+def _prepared(pop):
+    geoms = [shapely.box(0, 0, 1, 1), shapely.box(1, 0, 2, 1)]
+    blocks = gpd.GeoDataFrame({"geoid": ["410010001001000", "410010001001001"], "pop": pop,
+                               "area": [1.0, 1.0], "perimeter": [4.0, 4.0]}, geometry=geoms)
+    return blocks, (np.array([0]), np.array([1]), np.array([1.0]))
+
+
+def test_existing_entry_is_kept_unless_overwritten(tmp_path):
+    graph_cache.save_prepared("k", *_prepared([1, 2]), root=tmp_path)
+    path = graph_cache.save_prepared("k", *_prepared([5, 6]), root=tmp_path)
+    assert path == tmp_path / "k"
+    assert graph_cache.load_arrays("k", ("pop",), root=tmp_path)["pop"].tolist() == [1, 2]
+
+    graph_cache.save_prepared("k", *_prepared([5, 6]), root=tmp_path, overwrite=True)
+    assert graph_cache.load_arrays("k", ("pop",), root=tmp_path)["pop"].tolist() == [5, 6]
+    assert [d.name for d in tmp_path.iterdir()] == ["k"]  # no temp dirs left behind
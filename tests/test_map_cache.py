@@ -0,0 +1,70 @@
+# tests/test_map_cache.py
+import json
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+
+from src.cli.render_plan import pick_level
+from src.visualization import map_cache
+from src.visualization.render import save_png
+
+
+@pytest.fixture
+def districts():
+    """Four wavy strips tiling a 40 km square (UTM 10N), so coarser levels drop vertices."""
+    x0, y0, width = 500_000.0, 5_000_000.0, 10_000.0
+    ys = np.linspace(0, 4 * width, 401)
+    border = [x0 + i * width + 300 * np.sin(ys / 700) for i in range(5)]
+    border[0][:], border[-1][:] = x0, x0 + 4 * width
+    geoms = [shapely.Polygon(np.r_[np.c_[border[i], y0 + ys], np.c_[border[i + 1], y0 + ys][::-1]])
+             for i in range(4)]
+    return gpd.GeoDataFrame({"district": np.arange(4), "pop": [10, 20, 30, 40]}, geometry=geoms, crs=32610)
+
+
+def test_build_and_cached_levels_round_trip(districts, tmp_path):
+    assert map_cache.cached_levels("k", root=tmp_path) is None
+    paths = map_cache.build_levels(districts, "k", root=tmp_path)
+    assert map_cache.cached_levels("k", root=tmp_path) == paths
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["k"]  # no temp dirs left behind
+
+    level = map_cache.load_level(paths["detail"])
+    assert level.crs.to_epsg() == 4326
+    assert level["district"].tolist() == [0, 1, 2, 3] and level["pop"].tolist() == [10, 20, 30, 40]
+    meta = json.loads((tmp_path / "k" / "meta.json").read_text())["levels"]
+    assert meta["state"]["vertices"] < meta["detail"]["vertices"]
+
+    # an existing entry is kept unless overwritten
+    map_cache.build_levels(districts.assign(pop=0), "k", root=tmp_path)
+    assert map_cache.load_level(paths["state"])["pop"].tolist() == [10, 20, 30, 40]
+    map_cache.build_levels(districts.assign(pop=0), "k", root=tmp_path, overwrite=True)
+    assert map_cache.load_level(paths["state"])["pop"].tolist() == [0, 0, 0, 0]
+
+
+def test_entry_without_meta_is_a_miss(districts, tmp_path):
+    paths = map_cache.build_levels(districts, "k", root=tmp_path)
+    (tmp_path / "k" / "meta.json").unlink()
+    assert map_cache.cached_levels("k", root=tmp_path) is None
+
+    map_cache.build_levels(districts, "k", root=tmp_path)  # the partial entry is replaced
+    assert map_cache.cached_levels("k", root=tmp_path) == paths
+
+
+def test_pick_level_honours_max_vertices(districts, tmp_path):
+    paths = map_cache.build_levels(districts, "k", root=tmp_path)
+    meta = json.loads((tmp_path / "k" / "meta.json").read_text())["levels"]
+    assert pick_level(paths, meta["detail"]["vertices"]) == "detail"
+    assert pick_level(paths, meta["detail"]["vertices"] - 1) == "region"
+    assert pick_level(paths, meta["region"]["vertices"] - 1) == "state"
+    assert pick_level(paths, 1) == "state"  # nothing fits: coarsest level
+    assert pick_level({lv: paths[lv] for lv in reversed(paths)}, 1) == "state"
+
+
+def test_save_png_writes_a_file_headless(districts, tmp_path):
+    import matplotlib
+    matplotlib.use("Agg")
+    level = map_cache.load_level(map_cache.build_levels(districts, "k", root=tmp_path)["region"])
+    for column in ("district", "pop"):
+        out = save_png(level, tmp_path / "png" / f"{column}.png", column=column, size=2, dpi=50)
+        assert out.read_bytes()[:8] == b"\x89PNG\r\n\x1a\n"
@@ -0,0 +1,70 @@
+# tests/test_repair_swap.py
+import numpy as np
+import pytest
+
+from src.algorithms.graph import BlockGraph
+from src.algorithms.objectives import Objectives
+from src.algorithms.repair_swap import border_swaps
+from src.algorithms.seed_grow import grow_regions
+
+TOL = 0.005
+
+
+@pytest.fixture(scope="module")
+def grid():
+    """100x100 rook grid, lognormal block populations with a quarter of the blocks empty."""
+    side, rng = 100, np.random.default_rng(1)
+    ids = np.arange(side * side).reshape(side, side)
+    src = np.concatenate([ids[:, :-1].ravel(), ids[:-1, :].ravel()])
+    dst = np.concatenate([ids[:, 1:].ravel(), ids[1:, :].ravel()])
+    pop = rng.lognormal(1.5, 1.0, side * side)
+    pop[rng.random(side * side) < 0.25] = 0
+    return BlockGraph.from_edges(side * side, src, dst, pop.astype(np.int64))
+
+
+def connected(graph, assignment, d) -> bool:
+    nodes = np.flatnonzero(assignment == d)
+    seen, queue = {int(nodes[0])}, [int(nodes[0])]
+    for u in queue:
+        for v in graph.indices[graph.indptr[u]:graph.indptr[u + 1]].tolist():
+            if assignment[v] == d and v not in seen:
+                seen.add(v)
+                queue.append(v)
+    return len(seen) == len(nodes)
+
+
+@pytest.mark.parametrize("k", [26, 38])
+def test_repair_reaches_tolerance_on_synthetic_grid(grid, k):
+    target = grid.pop.sum() / k
+    assignment, _ = grow_regions(grid, k, target, TOL, rng=0)
+    stats = {}
+    border_swaps(grid, assignment, target, TOL, stats=stats)
+
+    assert stats["within_tol"], stats
+    dev = np.abs(np.bincount(assignment, weights=grid.pop, minlength=k) - target) / target
+    assert dev.max() <= TOL
+    assert all(connected(grid, assignment, d) for d in range(k))
+
+
+def test_piece_moves_are_scored_as_a_whole():
+    """
+    District 1 = {0} pulls from district 0 = {1..6}. Moving 1 or 3 alone would cut off the
+    leaf 2 or 4, so each goes with it as a piece. 1 and 3 (and 4) are in the same county as 0,
+    2 is in the county of 5 and 6: only the whole piece (1, 2) splits a county, which the
+    first node alone doesn't show.
+    """
+    edges = [(0, 1), (0, 3), (1, 2), (1, 5), (3, 4), (3, 5), (5, 6)]
+    src, dst = np.array(edges).T
+    pop = np.array([10, 5, 5, 5, 5, 20, 20])
+    county = ["41001", "41001", "41003", "41001", "41001", "41003", "41003"]
+    geoids = np.array([f"{c}000100{i:04d}" for i, c in enumerate(county)])
+    graph = BlockGraph.from_edges(7, src, dst, pop, geoids=geoids)
+    assignment = np.array([1, 0, 0, 0, 0, 0, 0], dtype=np.int16)
+    objectives = Objectives(graph, assignment, {"county_splits": 5.0})
+
+    stats = {}
+    border_swaps(graph, assignment, pop.sum() / 2, 0.5, max_iters=1, objectives=objectives, stats=stats)
+
+    assert stats["piece_moves"] == 1
+    assert assignment.tolist() == [1, 0, 0, 1, 1, 0, 0]
+    assert objectives.summary()["county_splits"] == 1
@@ -0,0 +1,45 @@
+# tests/test_rook_adjacency.py
+import itertools
+
+import numpy as np
+import pytest
+import shapely
+
+from src.processing.build_block_graph import rook_adjacency
+
+
+@pytest.fixture
+def polygons():
+    """3x3 unit grid plus a top row of two 1.5-wide strips (edges of length 1 and 0.5)."""
+    cells = [shapely.box(x, y, x + 1, y + 1) for y in range(3) for x in range(3)]
+    return np.array(cells + [shapely.box(0, 3, 1.5, 4), shapely.box(1.5, 3, 3, 4)])
+
+
+def legacy_pairs(geoms):
+    """The old build_adjacency test: any intersection of the two boundaries, corners included."""
+    return {(i, j) for i, j in itertools.combinations(range(len(geoms)), 2)
+            if geoms[i].intersects(geoms[j]) and geoms[i].boundary.intersects(geoms[j].boundary)}
+
+
+def test_rook_edges_are_legacy_pairs_without_corner_touches(polygons):
+    src, dst, _ = rook_adjacency(polygons)
+    corner_only = {(i, j) for i, j in legacy_pairs(polygons)
+                   if polygons[i].boundary.intersection(polygons[j].boundary).length == 0}
+
+    assert corner_only  # the diagonal grid neighbours
+    assert set(zip(src.tolist(), dst.tolist())) == legacy_pairs(polygons) - corner_only
+    assert (src < dst).all()
+
+
+def test_rook_shared_lengths(polygons):
+    src, dst, shared_len = rook_adjacency(polygons, chunk_size=4)
+    got = dict(zip(zip(src.tolist(), dst.tolist()), shared_len.tolist()))
+
+    assert got[(0, 1)] == pytest.approx(1.0)   # grid cells
+    assert got[(0, 3)] == pytest.approx(1.0)
+    assert got[(6, 9)] == pytest.approx(1.0)   # left strip over the top-left cell
+    assert got[(7, 9)] == pytest.approx(0.5)   # both strips share the top-middle cell
+    assert got[(7, 10)] == pytest.approx(0.5)
+    assert got[(8, 10)] == pytest.approx(1.0)
+    assert got[(9, 10)] == pytest.approx(1.0)  # the strips' common side
+    assert len(got) == 12 + 5
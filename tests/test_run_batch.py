@@ -0,0 +1,30 @@
+# tests/test_run_batch.py
+import numpy as np
+
+from src.cli.generate_plan import plan_options
+from src.cli.run_batch import plan_up_to_date
+from src.processing import graph_cache
+from src.processing.plan_io import save_plan
+
+CFG = {"districts_congress": 2, "pop_tolerance": 0.005, "weights": {"compactness": 1.0}}
+
+
+def test_plan_is_stale_when_any_setting_changes(tmp_path):
+    blocks, pl = tmp_path / "blocks.shp", tmp_path / "pl.csv"
+    blocks.write_bytes(b"shp")
+    pl.write_text("state,county,tract,block,pop\n")
+    options = plan_options(CFG, 7, "balanced", ("tract",), 20000)
+    out = save_plan(tmp_path / "OR_plan.npz", np.array([0, 1, 1]), "fp", meta={
+        "cache_key": graph_cache.cache_key(blocks, pl), **options})
+
+    assert plan_up_to_date(out, blocks, pl, plan_options(CFG, 7, "balanced", ("tract",), 20000))
+    for changed in (plan_options(CFG, 8, "balanced", ("tract",), 20000),
+                    plan_options(CFG, 7, "random", ("tract",), 20000),
+                    plan_options(CFG, 7, "balanced", (), 20000),
+                    plan_options(CFG, 7, "balanced", ("tract",), 5000),
+                    plan_options({**CFG, "districts_congress": 3}, 7, "balanced", ("tract",), 20000),
+                    plan_options({**CFG, "pop_tolerance": 0.01}, 7, "balanced", ("tract",), 20000)):
+        assert not plan_up_to_date(out, blocks, pl, changed)
+
+    pl.write_text("state,county,tract,block,pop\n41,001,000100,1000,5\n")
+    assert not plan_up_to_date(out, blocks, pl, options)  # inputs changed